@@ -0,0 +1,140 @@
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+_EVICT_EVERY_N_WRITES = 50
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+def normalize_resume_text(resume_text):
+    return " ".join(resume_text.split())
+
+def resume_text_hash(resume_text):
+    # Identifies a resume by its extracted text, so the same file under another name maps to the same key
+    return hashlib.sha256(normalize_resume_text(resume_text).encode("utf-8")).hexdigest()
+
+def make_cache_key(resume_text, jd_title, jd_requirements, model_id, model_kwargs):
+    model_kwargs = dict(model_kwargs or {})
+    # A streamed reply is the same analysis unless an early stop can cut it short
+    if not (model_kwargs.get("streaming") and model_kwargs.get("early_stop_score")):
+        model_kwargs.pop("streaming", None)
+        model_kwargs.pop("early_stop_score", None)
+    key_material = json.dumps({
+        "resume": normalize_resume_text(resume_text),
+        "jd_title": jd_title,
+        "jd_requirements": jd_requirements,
+        "model": model_id,
+        "model_kwargs": model_kwargs
+    }, sort_keys=True)
+    return hashlib.sha256(key_material.encode("utf-8")).hexdigest()
+
+class AnalysisCache:
+    def __init__(self, cache_dir, max_size_mb=200, max_age_days=30):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.db_path = self.cache_dir / "analysis_cache.sqlite3"
+        self.max_size_bytes = int(max_size_mb * 1024 * 1024)
+        self.max_age_seconds = max_age_days * 24 * 3600
+        self.hits = 0
+        self.misses = 0
+        self._writes = 0
+        self._lock = threading.Lock()
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS analyses ("
+                "key TEXT PRIMARY KEY, analysis TEXT NOT NULL, size INTEGER NOT NULL, "
+                "created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_analyses_accessed ON analyses (accessed_at)")
+        self.evict()
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def get(self, key):
+        now = time.time()
+        try:
+            with closing(self._connect()) as conn, conn:
+                row = conn.execute(
+                    "SELECT analysis FROM analyses WHERE key = ? AND created_at >= ?",
+                    (key, now - self.max_age_seconds)
+                ).fetchone()
+                if row:
+                    conn.execute("UPDATE analyses SET accessed_at = ? WHERE key = ?", (now, key))
+        except sqlite3.Error as e:
+            logger.error(f"Analysis cache read failed: {e}")
+            row = None
+        with self._lock:
+            if row:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return row[0] if row else None
+
+    def set(self, key, analysis):
+        now = time.time()
+        try:
+            with closing(self._connect()) as conn, conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO analyses (key, analysis, size, created_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                    (key, analysis, len(analysis.encode("utf-8")), now, now)
+                )
+        except sqlite3.Error as e:
+            logger.error(f"Analysis cache write failed: {e}")
+            return
+        with self._lock:
+            self._writes += 1
+            evict_now = self._writes % _EVICT_EVERY_N_WRITES == 0
+        if evict_now:
+            self.evict()
+
+    def evict(self):
+        try:
+            with closing(self._connect()) as conn, conn:
+                expired = conn.execute(
+                    "DELETE FROM analyses WHERE created_at < ?", (time.time() - self.max_age_seconds,)
+                ).rowcount
+                total_size = conn.execute("SELECT COALESCE(SUM(size), 0) FROM analyses").fetchone()[0]
+                evicted = 0
+                if total_size > self.max_size_bytes:
+                    # Drop least recently used entries until we are back under budget
+                    for key, size in conn.execute("SELECT key, size FROM analyses ORDER BY accessed_at").fetchall():
+                        if total_size <= self.max_size_bytes:
+                            break
+                        conn.execute("DELETE FROM analyses WHERE key = ?", (key,))
+                        total_size -= size
+                        evicted += 1
+            if expired or evicted:
+                logger.info(f"Analysis cache evicted {expired} expired and {evicted} least recently used entries")
+        except sqlite3.Error as e:
+            logger.error(f"Analysis cache eviction failed: {e}")
+
+    def stats(self):
+        try:
+            with closing(self._connect()) as conn:
+                entries, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM analyses").fetchone()
+        except sqlite3.Error:
+            entries, size = 0, 0
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": entries,
+                "size_mb": size / (1024 * 1024)
+            }
+
+def get_analysis_cache(cache_dir, max_size_mb=200, max_age_days=30):
+    # One cache object per directory so hit/miss counters are shared by all sessions in the process
+    with _caches_lock:
+        key = str(Path(cache_dir).resolve())
+        if key not in _caches:
+            _caches[key] = AnalysisCache(cache_dir, max_size_mb, max_age_days)
+        return _caches[key]
@@ -1,19 +1,219 @@
 import time
-import requests
+import json
+import random
+import threading
 import logging
+from email.utils import parsedate_to_datetime
+from functools import lru_cache, partial
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+from src.api.prompt_builder import compact_resume, estimate_text_tokens
+from src.api.rate_limiter import estimate_tokens, get_rate_governor
+from src.utils.logger import log_payload
+from src.utils.metrics import get_metrics
 
 logger = logging.getLogger(__name__)
 
+MODEL_ID = "amazon.nova-lite-v1:0"
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+DEFAULT_RESUME_TOKEN_BUDGET = 250
+
+ANALYSIS_JSON_SCHEMA = """{"candidate_name": "name", "years_of_experience": number, "education_level": "degree, field", "relevant_skills": "skills, comma-separated", "most_recent_role": "role", "fitment_score": number from 0 to 10, "strengths": "strengths", "gaps": "gaps"}"""
+MULTI_ANALYSIS_JSON_SCHEMA = """{"candidate_name": "name", "years_of_experience": number, "education_level": "degree, field", "most_recent_role": "role", "jobs": [{"title": "job title exactly as given", "relevant_skills": "skills matching this job, comma-separated", "fitment_score": number from 0 to 10, "strengths": "strengths for this job", "gaps": "gaps for this job"}]}"""
+PACKED_ANALYSIS_JSON_SCHEMA = """{"candidates": [{"resume": resume number, "candidate_name": "name", "years_of_experience": number, "education_level": "degree, field", "relevant_skills": "skills, comma-separated", "most_recent_role": "role", "fitment_score": number from 0 to 10, "strengths": "strengths", "gaps": "gaps"}]}"""
+
+# Flipped off the first time the gateway rejects response_format; the prompt still asks for JSON
+_response_format_supported = True
+
+class CircuitOpenError(requests.RequestException):
+    pass
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold=5, reset_timeout=30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self._failures = 0
+        self._opened_at = 0
+        self._lock = threading.Lock()
+
+    def allow_request(self):
+        with self._lock:
+            if self.state == "closed":
+                return True
+            # Half-open: let a single probe through to test the gateway. A probe that never reported back
+            # (its caller raised before recording an outcome) is replaced once another reset_timeout has passed
+            if time.monotonic() - self._opened_at >= self.reset_timeout:
+                self.state = "half_open"
+                self._opened_at = time.monotonic()
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            if self.state != "closed":
+                logger.info("API circuit closed; gateway is responding again.")
+            self.state = "closed"
+            self._failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self.state == "half_open" or (self.state == "closed" and self._failures >= self.failure_threshold):
+                logger.error(f"API circuit opened after {self._failures} consecutive failures; failing fast for {self.reset_timeout}s.")
+                self.state = "open"
+                self._opened_at = time.monotonic()
+
+# Connections are opened on the calling thread, so the connect time of the current request is kept per thread
+_connect_timing = threading.local()
+
+class _TimedConnectionMixin:
+    def connect(self):
+        started = time.perf_counter()
+        super().connect()
+        elapsed = time.perf_counter() - started
+        _connect_timing.seconds = getattr(_connect_timing, "seconds", 0.0) + elapsed
+        get_metrics().observe("api_connect_seconds", elapsed)
+
+class _TimedHTTPConnection(_TimedConnectionMixin, HTTPConnection):
+    pass
+
+class _TimedHTTPSConnection(_TimedConnectionMixin, HTTPSConnection):
+    pass
+
+class _TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
+
+class _TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+class _TimedHTTPAdapter(HTTPAdapter):
+    # Separates TCP/TLS connect time from the time the gateway spends producing a reply
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {"http": _TimedHTTPConnectionPool, "https": _TimedHTTPSConnectionPool}
+
+_http_settings = {
+    "pool_size": 10,
+    "max_retries": 3,
+    "backoff_base": 1.0,
+    "backoff_max": 30.0
+}
+_session = None
+_session_lock = threading.Lock()
+_circuit_breaker = CircuitBreaker()
+
+def configure_http_client(pool_size=10, max_retries=3, backoff_base=1.0, backoff_max=30.0,
+                          circuit_failure_threshold=5, circuit_reset_seconds=30):
+    global _session
+    with _session_lock:
+        if pool_size != _http_settings["pool_size"] and _session is not None:
+            _session.close()
+            _session = None
+        _http_settings.update(pool_size=pool_size, max_retries=max_retries,
+                              backoff_base=backoff_base, backoff_max=backoff_max)
+    _circuit_breaker.failure_threshold = circuit_failure_threshold
+    _circuit_breaker.reset_timeout = circuit_reset_seconds
+
+def get_session():
+    # One keep-alive session per process so connections to the gateway are reused across resumes
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = _TimedHTTPAdapter(pool_connections=1, pool_maxsize=_http_settings["pool_size"])
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _session = session
+        return _session
+
+def _retry_after_seconds(response):
+    retry_after = response.headers.get("Retry-After")
+    if not retry_after:
+        return None
+    try:
+        return max(0.0, float(retry_after))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(retry_after).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+def _backoff_delay(attempt):
+    # Full jitter exponential backoff
+    cap = min(_http_settings["backoff_max"], _http_settings["backoff_base"] * (2 ** attempt))
+    return random.uniform(0, cap)
+
+def post_with_retries(api_url, headers, payload, timeout=30, session_id=None, stream=False):
+    max_retries = _http_settings["max_retries"]
+    governor = get_rate_governor()
+    metrics = get_metrics()
+    estimated_tokens = estimate_tokens(payload) if governor else 0
+    for attempt in range(max_retries + 1):
+        if not _circuit_breaker.allow_request():
+            metrics.increment("api_requests_total", status="circuit_open")
+            raise CircuitOpenError("API circuit is open after repeated gateway failures; skipping request.")
+        if governor:
+            metrics.observe("rate_limit_wait_seconds", governor.acquire(session_id, estimated_tokens))
+        if attempt:
+            metrics.increment("api_retries_total")
+        _connect_timing.seconds = 0.0
+        started = time.monotonic()
+        try:
+            response = get_session().post(api_url, headers=headers, json=payload, timeout=timeout, stream=stream)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            metrics.increment("api_requests_total", status="timeout" if isinstance(e, requests.Timeout) else "connection_error")
+            _circuit_breaker.record_failure()
+            if attempt == max_retries:
+                raise
+            delay = _backoff_delay(attempt)
+            logger.warning(f"API request error (attempt {attempt + 1}/{max_retries + 1}): {e}; retrying in {delay:.1f}s")
+        except requests.RequestException:
+            # Not worth retrying (e.g. a bad URL or TLS setup), but it still counts against the circuit
+            metrics.increment("api_requests_total", status="request_error")
+            _circuit_breaker.record_failure()
+            raise
+        else:
+            # elapsed runs from sending the request to parsing the reply headers, including any new connection
+            metrics.increment("api_requests_total", status=response.status_code)
+            metrics.observe("api_request_seconds", time.monotonic() - started)
+            metrics.observe("api_server_seconds", max(0.0, response.elapsed.total_seconds() - _connect_timing.seconds))
+            if governor:
+                governor.record_response(response.status_code, time.monotonic() - started,
+                                         _retry_after_seconds(response) if response.status_code == 429 else None)
+            if response.status_code >= 500:
+                _circuit_breaker.record_failure()
+            else:
+                _circuit_breaker.record_success()
+            if response.status_code not in RETRYABLE_STATUS_CODES or attempt == max_retries:
+                if stream and not response.ok:
+                    # Reading the short error body releases the connection and keeps it for the caller
+                    response.content
+                response.raise_for_status()
+                return response
+            retry_after = _retry_after_seconds(response)
+            # A streamed error body is never read, so the connection has to be released explicitly
+            response.close()
+            delay = min(retry_after, _http_settings["backoff_max"]) if retry_after is not None else _backoff_delay(attempt)
+            logger.warning(f"API returned {response.status_code} (attempt {attempt + 1}/{max_retries + 1}); retrying in {delay:.1f}s")
+        time.sleep(delay)
+
 def test_api_connectivity(api_url, headers, retries=2, backoff=2):
     payload = {
-        "model": "amazon.nova-lite-v1:0",
+        "model": MODEL_ID,
         "messages": [{"role": "system", "content": "You are a helpful assistant."}, {"role": "user", "content": "Test connectivity"}],
         "max_tokens": 10
     }
     for attempt in range(retries + 1):
         try:
-            response = requests.post(api_url, headers=headers, json=payload, timeout=30)
+            response = get_session().post(api_url, headers=headers, json=payload, timeout=30)
             response.raise_for_status()
+            _circuit_breaker.record_success()
             logger.info("API connectivity test successful.")
             return True
         except requests.RequestException as e:
@@ -22,14 +222,25 @@ def test_api_connectivity(api_url, headers, retries=2, backoff=2):
                 time.sleep(backoff * (attempt + 1))
     return False
 
-def analyze_resume(resume_text, jd_title, jd_requirements, api_url, headers):
-    if not resume_text.strip():
-        logger.warning("Resume text is empty; skipping analysis.")
-        return None
+_SYSTEM_PROMPT = "You are a resume analysis expert. Provide responses in the exact format requested, ensuring education level is extracted accurately."
 
-    logger.debug(f"Resume text sample: {resume_text[:500]}")
-
-    prompt = f"""You are an expert resume analysis agent. Follow these steps to analyze the resume against the job description:
+@lru_cache(maxsize=64)
+def _single_prompt_prefix(jd_title, jd_requirements, structured_output):
+    # Identical for every resume screened against this JD, so it leads the prompt where provider prompt caching can reuse it
+    if structured_output:
+        output_format = f"""Return only a JSON object, with no other text, in this shape:
+{ANALYSIS_JSON_SCHEMA}"""
+    else:
+        output_format = """Return:
+- Candidate Name: [name]
+- Years of Experience: [years]
+- Education Level: [degree, field]
+- Relevant Skills: [skills, comma-separated]
+- Most Recent Role: [role]
+- Fitment Score: [number]/10
+- Strengths: [strengths]
+- Gaps/Weaknesses: [gaps]"""
+    return f"""You are an expert resume analysis agent. Follow these steps to analyze the resume against the job description:
 
 Extract:
    - Name: Look for headers or common name formats of the candidate.
@@ -45,33 +256,248 @@ Analyze:
 Verify:
    - Ensure all fields are filled (use 'Unknown' only if no inference possible).
    - Skills must be comma-separated.
+The resume has been condensed to its key sections (contact, skills, experience, education); long sections end with "...".
+
+{output_format}
 
 Job: {jd_title}
 Requirements: {jd_requirements}
-Resume: {resume_text[:1500]}
+"""
 
-Return:
+@lru_cache(maxsize=64)
+def _multi_prompt_prefix(jds, structured_output):
+    if structured_output:
+        output_format = f"""Return only a JSON object, with no other text, in this shape, with one entry in "jobs" for every job:
+{MULTI_ANALYSIS_JSON_SCHEMA}"""
+    else:
+        jd_blocks = "\n".join(f"""=== JD: {title} ===
+- Relevant Skills: [skills matching this job, comma-separated]
+- Fitment Score: [number]/10
+- Strengths: [strengths for this job]
+- Gaps/Weaknesses: [gaps for this job]""" for title, _ in jds)
+        output_format = f"""Return:
 - Candidate Name: [name]
 - Years of Experience: [years]
 - Education Level: [degree, field]
-- Relevant Skills: [skills, comma-separated]
 - Most Recent Role: [role]
-- Fitment Score: [number]/10
-- Strengths: [strengths]
-- Gaps/Weaknesses: [gaps]
+{jd_blocks}"""
+    jd_sections = "\n".join(f"Job {number}: {title}\nRequirements: {requirements}"
+                            for number, (title, requirements) in enumerate(jds, start=1))
+    return f"""You are an expert resume analysis agent. Analyze the resume once and score it against each of the {len(jds)} job descriptions below:
+
+Extract (once, for the candidate):
+   - Name: Look for headers or common name formats of the candidate.
+   - Years of Experience: Sum durations of roles (estimate if dates are missing).
+   - Education: Find highest degree and field (infer from skills if absent, e.g., Java suggests CS degree).
+   - Recent Role: Latest job title.
+Evaluate (separately for every job):
+   - Skills: Match to that job's requirements.
+   - Score fitment (0-10) based on skill/experience match.
+   - Strengths and Gaps against that job.
+Verify:
+   - Ensure all fields are filled (use 'Unknown' only if no inference possible).
+   - Skills must be comma-separated.
+   - Include one block for every job, using the job title exactly as given.
+The resume has been condensed to its key sections (contact, skills, experience, education); long sections end with "...".
+
+{output_format}
+
+{jd_sections}
+"""
+
+@lru_cache(maxsize=64)
+def _packed_prompt_prefix(jd_title, jd_requirements):
+    # No resume count in here, so packs of any size share the same cacheable prefix
+    return f"""You are an expert resume analysis agent. Analyze each of the resumes below separately against the job description:
+
+Extract (for every resume):
+   - Name: Look for headers or common name formats of the candidate.
+   - Years of Experience: Sum durations of roles (estimate if dates are missing).
+   - Education: Find highest degree and field (infer from skills if absent, e.g., Java suggests CS degree).
+   - Skills: Match to job requirements.
+   - Recent Role: Latest job title.
+Evaluate:
+   - Score fitment (0-10) based on skill/experience match.
+Analyze:
+   - Strengths: Key matching skills/experiences.
+   - Gaps: Missing requirements.
+Verify:
+   - Ensure all fields are filled (use 'Unknown' only if no inference possible).
+   - Skills must be comma-separated.
+   - Include one entry for every resume, with its number as given, and never mix details between resumes.
+Each resume starts with a "=== Resume N ===" line and has been condensed to its key sections; long sections end with "...".
+
+Return only a JSON object, with no other text, in this shape, with one entry in "candidates" for every resume:
+{PACKED_ANALYSIS_JSON_SCHEMA}
+
+Job: {jd_title}
+Requirements: {jd_requirements}
 """
+
+def _resume_section(resume_text, model_kwargs):
+    # Whitespace-normalized, highest-value sections first, within a local token estimate instead of a blind character cut
+    budget = model_kwargs.get("resume_token_budget") or DEFAULT_RESUME_TOKEN_BUDGET
+    return compact_resume(resume_text, budget) or resume_text[:1500]
+
+def _sampling_options(model_kwargs):
+    options = {"temperature": model_kwargs.get("temperature", 0.5), "top_p": model_kwargs.get("top_p", 0.9)}
+    if model_kwargs.get("streaming"):
+        options["stream"] = True
+    return options
+
+def analyze_resume(resume_text, jd_title, jd_requirements, api_url, headers, model_kwargs=None, session_id=None,
+                   on_progress=None, hedge=None):
+    # With streaming enabled, on_progress(text so far) runs as the reply arrives and can return True to stop it early.
+    # hedge is the batch's HedgePolicy, if any; streamed replies are never hedged
+    if not resume_text.strip():
+        logger.warning("Resume text is empty; skipping analysis.")
+        return None
+
+    log_payload(logger, "Resume text sample", resume_text)
+    model_kwargs = model_kwargs or {}
+    build_started = time.perf_counter()
+    structured_output = bool(model_kwargs.get("structured_output"))
+    prompt = _single_prompt_prefix(jd_title, jd_requirements, structured_output) + \
+        f"\nResume: {_resume_section(resume_text, model_kwargs)}\n"
+    payload = {
+        "model": MODEL_ID,
+        "messages": [{"role": "system", "content": _SYSTEM_PROMPT}, {"role": "user", "content": prompt}],
+        "max_tokens": model_kwargs.get("maxTokens", 250),
+        **_sampling_options(model_kwargs)
+    }
+    get_metrics().observe("prompt_build_seconds", time.perf_counter() - build_started, mode="single")
+    get_metrics().increment("prompt_tokens_estimated_total", estimate_text_tokens(prompt))
+    return _chat_completion(payload, api_url, headers, structured_output, session_id, on_progress, hedge)
+
+def analyze_resume_multi(resume_text, jds, api_url, headers, model_kwargs=None, session_id=None, hedge=None):
+    # Scores one resume against several JDs in a single request; jds is a list of (title, requirements)
+    if not resume_text.strip():
+        logger.warning("Resume text is empty; skipping analysis.")
+        return None
+
+    log_payload(logger, "Resume text sample", resume_text)
+    model_kwargs = model_kwargs or {}
+    build_started = time.perf_counter()
+    structured_output = bool(model_kwargs.get("structured_output"))
+    prompt = _multi_prompt_prefix(tuple(map(tuple, jds)), structured_output) + \
+        f"\nResume: {_resume_section(resume_text, model_kwargs)}\n"
+    # Each extra JD block needs room for its own score, strengths and gaps
+    max_tokens = model_kwargs.get("maxTokens", 250) + 150 * (len(jds) - 1)
+    payload = {
+        "model": MODEL_ID,
+        "messages": [{"role": "system", "content": _SYSTEM_PROMPT}, {"role": "user", "content": prompt}],
+        "max_tokens": max_tokens,
+        **_sampling_options(model_kwargs)
+    }
+    get_metrics().observe("prompt_build_seconds", time.perf_counter() - build_started, mode="multi")
+    get_metrics().increment("prompt_tokens_estimated_total", estimate_text_tokens(prompt))
+    return _chat_completion(payload, api_url, headers, structured_output, session_id, hedge=hedge)
+
+def analyze_resume_pack(resume_texts, jd_title, jd_requirements, api_url, headers, model_kwargs=None, session_id=None,
+                        hedge=None):
+    # Several short resumes in one request, so they share the instruction block and the round trip.
+    # The reply is always JSON with one numbered entry per resume; packs are never streamed
+    model_kwargs = dict(model_kwargs or {}, streaming=False)
+    build_started = time.perf_counter()
+    prompt = _packed_prompt_prefix(jd_title, jd_requirements) + "".join(
+        f"\n=== Resume {number} ===\n{_resume_section(resume_text, model_kwargs)}\n"
+        for number, resume_text in enumerate(resume_texts, start=1))
     payload = {
-        "model": "amazon.nova-lite-v1:0",
-        "messages": [{"role": "system", "content": "You are a resume analysis expert. Provide responses in the exact format requested, ensuring education level is extracted accurately."}, {"role": "user", "content": prompt}],
-        "max_tokens": 250,
-        "temperature": 0.5,
-        "top_p": 0.9
+        "model": MODEL_ID,
+        "messages": [{"role": "system", "content": _SYSTEM_PROMPT}, {"role": "user", "content": prompt}],
+        "max_tokens": model_kwargs.get("maxTokens", 250) * len(resume_texts),
+        **_sampling_options(model_kwargs)
     }
+    get_metrics().observe("prompt_build_seconds", time.perf_counter() - build_started, mode="packed")
+    get_metrics().increment("prompt_tokens_estimated_total", estimate_text_tokens(prompt))
+    return _chat_completion(payload, api_url, headers, True, session_id, hedge=hedge)
+
+def _record_usage(payload, usage):
+    governor = get_rate_governor()
+    if governor and usage.get("total_tokens"):
+        governor.record_usage(estimate_tokens(payload), usage["total_tokens"])
+    if usage.get("total_tokens"):
+        get_metrics().increment("api_tokens_total", usage["total_tokens"])
+
+def _read_stream(response, payload, requested, on_progress=None):
+    # Consumes the server-sent events as they arrive. on_progress sees the text so far whenever a chunk may
+    # have completed a field and can return True to close the connection, which ends the generation
+    metrics = get_metrics()
+    started = time.monotonic()
+    parts = []
+    try:
+        for line in response.iter_lines():
+            if not line.startswith(b"data:"):
+                continue
+            data = line[5:].strip()
+            if data == b"[DONE]":
+                break
+            try:
+                chunk = json.loads(data)
+            except ValueError:
+                logger.warning(f"Skipping malformed stream chunk: {data[:200]!r}")
+                continue
+            if chunk.get("usage"):
+                _record_usage(payload, chunk["usage"])
+            choices = chunk.get("choices") or [{}]
+            content = (choices[0].get("delta") or {}).get("content")
+            if not content:
+                continue
+            if not parts:
+                metrics.observe("api_first_token_seconds", time.monotonic() - requested)
+            parts.append(content)
+            if on_progress and any(mark in content for mark in "\n,}") and on_progress("".join(parts)):
+                metrics.increment("api_streams_stopped_total")
+                logger.info(f"Stopped streaming reply early after {len(parts)} chunks")
+                break
+    finally:
+        response.close()
+        metrics.observe("api_stream_seconds", time.monotonic() - started)
+    return "".join(parts).strip() or None
+
+def _response_format_error(response):
+    # The 400/422 error body, lowercased, when it blames structured output; other client errors are real failures
+    if response is None or response.status_code not in (400, 422):
+        return None
+    body = response.text.lower()
+    return body if "response_format" in body or "json" in body else None
+
+def _post_completion(payload, api_url, headers, session_id=None, stream=False):
+    # Returns (response, payload as finally sent)
+    global _response_format_supported
+    try:
+        return post_with_retries(api_url, headers, payload, timeout=30, session_id=session_id, stream=stream), payload
+    except requests.HTTPError as e:
+        body = _response_format_error(e.response) if "response_format" in payload else None
+        if body is None:
+            raise
+        if "response_format" in body:
+            logger.warning("Gateway rejected response_format; relying on prompt instructions for JSON output.")
+            _response_format_supported = False
+        else:
+            logger.warning("Gateway could not produce JSON for this request; retrying it without response_format.")
+        payload = {key: value for key, value in payload.items() if key != "response_format"}
+        return post_with_retries(api_url, headers, payload, timeout=30, session_id=session_id, stream=stream), payload
+
+def _completion_json(payload, api_url, headers, session_id=None):
+    response, payload = _post_completion(payload, api_url, headers, session_id)
+    return response.json(), payload
+
+def _chat_completion(payload, api_url, headers, structured_output=False, session_id=None, on_progress=None, hedge=None):
+    if structured_output and _response_format_supported:
+        payload = dict(payload, response_format={"type": "json_object"})
+    stream = bool(payload.get("stream"))
+    requested = time.monotonic()
     try:
-        response = requests.post(api_url, headers=headers, json=payload, timeout=30)
-        response.raise_for_status()
-        response_json = response.json()
-        logger.debug(f"Raw API response: {response_json}")
+        if stream:
+            response, payload = _post_completion(payload, api_url, headers, session_id, stream=True)
+            return _read_stream(response, payload, requested, on_progress)
+        if hedge:
+            response_json, payload = hedge.run(partial(_completion_json, payload, api_url, headers, session_id))
+        else:
+            response_json, payload = _completion_json(payload, api_url, headers, session_id)
+        log_payload(logger, "Raw API response", response_json)
+        _record_usage(payload, response_json.get("usage") or {})
         if "choices" in response_json and response_json["choices"]:
             return response_json["choices"][0]["message"]["content"].strip()
     except requests.RequestException as e:
@@ -0,0 +1,117 @@
+import contextvars
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from src.utils.metrics import get_metrics
+
+logger = logging.getLogger(__name__)
+
+# How often a waiting request re-checks the hedge delay, which moves as latencies arrive and at the deadline
+_POLL_SECONDS = 1.0
+_LATE_PERCENTILE = 0.5
+
+class HedgePolicy:
+    # Per-batch tail-latency policy. A request still running after the `percentile` latency of this batch's
+    # completed requests gets one duplicate, and whichever reply arrives first wins. Duplicates are capped at
+    # max_extra_fraction of the batch's requests. Once deadline_seconds have passed the batch is late: remaining
+    # requests are hedged from the median latency, up to the larger late_max_extra_fraction of the batch's
+    # requests (percentile=None hedges only then)
+    def __init__(self, percentile=0.95, max_extra_fraction=0.05, late_max_extra_fraction=0.15, min_samples=10,
+                 deadline_seconds=None, min_delay_seconds=0.5, window=200, max_workers=8):
+        self.percentile = percentile
+        self.max_extra_fraction = max_extra_fraction
+        self.late_max_extra_fraction = late_max_extra_fraction
+        self.min_samples = min_samples
+        self.deadline_seconds = deadline_seconds
+        self.min_delay_seconds = min_delay_seconds
+        self.started = time.monotonic()
+        self.requests = 0
+        self.hedged = 0
+        self.won = 0
+        self._latencies = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self._late_logged = False
+        # The losing copy keeps its thread until it finishes, so the pool is sized for both copies of every call
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="hedge")
+
+    def late(self):
+        if not self.deadline_seconds or time.monotonic() - self.started <= self.deadline_seconds:
+            return False
+        if not self._late_logged:
+            self._late_logged = True
+            logger.warning(f"Batch passed its {self.deadline_seconds:g}s deadline; hedging remaining requests "
+                           f"from the median latency")
+        return True
+
+    def observe(self, seconds):
+        with self._lock:
+            self._latencies.append(seconds)
+
+    def delay(self):
+        # Seconds after which a request is hedged, or None while there is no percentile to go by
+        percentile = _LATE_PERCENTILE if self.late() else self.percentile
+        with self._lock:
+            if percentile is None or len(self._latencies) < self.min_samples:
+                return None
+            ordered = sorted(self._latencies)
+        return max(self.min_delay_seconds, ordered[min(len(ordered) - 1, int(percentile * len(ordered)))])
+
+    def _take_budget(self):
+        fraction = self.late_max_extra_fraction if self.late() else self.max_extra_fraction
+        with self._lock:
+            if self.hedged + 1 > fraction * self.requests:
+                return False
+            self.hedged += 1
+            return True
+
+    def _timed(self, call):
+        started = time.monotonic()
+        result = call()
+        self.observe(time.monotonic() - started)
+        return result
+
+    def run(self, call):
+        # Returns the result of call(), or of its duplicate if that succeeds first; exceptions only
+        # propagate when every copy failed
+        with self._lock:
+            self.requests += 1
+        started = time.monotonic()
+        primary = self._executor.submit(contextvars.copy_context().run, self._timed, call)
+        while True:
+            delay = self.delay()
+            elapsed = time.monotonic() - started
+            if delay is not None and elapsed >= delay:
+                break
+            timeout = _POLL_SECONDS if delay is None else min(_POLL_SECONDS, delay - elapsed)
+            if wait([primary], timeout=timeout).done:
+                return primary.result()
+        if not self._take_budget():
+            return primary.result()
+
+        logger.info(f"Hedging a request still running after {elapsed:.1f}s")
+        metrics = get_metrics()
+        metrics.increment("api_hedges_total")
+        backup = self._executor.submit(contextvars.copy_context().run, self._timed, call)
+        pending = {primary, backup}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is not None:
+                    continue
+                if future is backup:
+                    with self._lock:
+                        self.won += 1
+                    metrics.increment("api_hedges_won_total")
+                return future.result()
+        return primary.result()
+
+    def stats(self):
+        with self._lock:
+            return {"requests": self.requests, "hedged": self.hedged, "won": self.won, "samples": len(self._latencies)}
+
+    def close(self):
+        # Losing copies still in flight finish in the background; their replies are discarded
+        self._executor.shutdown(wait=False)
@@ -0,0 +1,141 @@
+import re
+from collections import Counter
+
+_TOKEN_PATTERN = re.compile(r"[A-Za-z]+|\d+|[^\sA-Za-z\d]")
+_BULLET_PATTERN = re.compile(r"^[•▪●➢◦■‣⁃∙·*>\-]+\s*")
+_RULE_PATTERN = re.compile(r"[\W_]{3,}")
+_PAGE_PATTERN = re.compile(r"(page\s*)?\d+\s*(of|/)\s*\d+", re.IGNORECASE)
+_SPACE_PATTERN = re.compile(r"[ \t\u00a0\u2000-\u200b\u3000]+")
+
+SECTION_HEADINGS = {
+    "experience": ["experience", "work experience", "professional experience", "relevant experience", "work history",
+                   "employment", "employment history", "career history", "professional background", "career summary"],
+    "skills": ["skills", "technical skills", "key skills", "core skills", "core competencies", "competencies",
+               "technologies", "technical proficiency", "skill set", "skillset", "expertise", "tools and technologies"],
+    "education": ["education", "academic", "academics", "qualifications", "academic qualifications",
+                  "educational qualifications", "education and training"],
+    "certifications": ["certifications", "certification", "certificates", "licenses", "licenses and certifications"],
+    "summary": ["summary", "profile", "professional summary", "career objective", "objective", "about me", "overview"],
+    "projects": ["projects", "key projects", "project experience", "project details", "academic projects"],
+    "dropped": ["references", "hobbies", "interests", "hobbies and interests", "declaration", "personal details",
+                "personal information", "personal profile", "languages known", "extracurricular activities"]
+}
+_HEADING_KINDS = {heading: kind for kind, headings in SECTION_HEADINGS.items() for heading in headings}
+
+# Share of the token budget each section is guaranteed before leftovers go out in priority order
+SECTION_QUOTAS = {"header": 0.1, "skills": 0.2, "experience": 0.4, "education": 0.1, "certifications": 0.05,
+                  "summary": 0.05, "projects": 0.1}
+SECTION_PRIORITY = ["header", "skills", "experience", "education", "certifications", "summary", "projects"]
+
+def estimate_text_tokens(text):
+    # Close to BPE tokenizers for English resumes: long words and numbers split into several tokens
+    tokens = 0
+    for piece in _TOKEN_PATTERN.findall(text):
+        if piece[0].isalpha():
+            tokens += 1 + (len(piece) - 1) // 6
+        elif piece[0].isdigit():
+            tokens += (len(piece) + 2) // 3
+        else:
+            tokens += 1
+    return tokens
+
+def _at_page_break(lines, index, top, counts):
+    # A repeated line is a running header or footer when it sits next to a page number, or when it is one of
+    # the opening lines and recurs alongside another repeated opening line
+    line = lines[index]
+    for neighbour in lines[max(index - 1, 0):index] + lines[index + 1:index + 2]:
+        if neighbour is None or (line in top and neighbour in top and counts[neighbour] >= 2):
+            return True
+    return False
+
+def normalize_lines(text):
+    # Collapses whitespace and bullets, and drops rules, page numbers and the name/contact lines
+    # that PDFs repeat at the top of every page
+    cleaned = []
+    for line in text.splitlines():
+        line = _SPACE_PATTERN.sub(" ", _BULLET_PATTERN.sub("- ", line.strip())).strip()
+        if not line or line == "-" or _RULE_PATTERN.fullmatch(line):
+            continue
+        # Page numbers are kept as None markers until the repeats around them have been found
+        cleaned.append(None if _PAGE_PATTERN.fullmatch(line) else line)
+    top = [line for line in cleaned if line is not None][:3]
+    counts = Counter(cleaned)
+    lines, seen = [], set()
+    for index, line in enumerate(cleaned):
+        if line is None or (line in seen and _at_page_break(cleaned, index, top, counts)):
+            continue
+        seen.add(line)
+        lines.append(line)
+    return lines
+
+def _heading(line):
+    # Returns (kind, inline text after "Skills:"-style headings) or None for ordinary lines
+    label, _, rest = line.partition(":")
+    if any(char.isdigit() for char in label):
+        return None
+    cleaned = re.sub(r"[^a-z& ]", "", label.lower()).replace("&", "and").strip()
+    if len(cleaned.split()) > 4:
+        return None
+    kind = _HEADING_KINDS.get(cleaned)
+    if kind is None and not rest:
+        kind = next((_HEADING_KINDS[heading] for heading in _HEADING_KINDS if cleaned.endswith(" " + heading)), None)
+    return (kind, rest.strip()) if kind else None
+
+def split_sections(lines):
+    sections = [["header", []]]
+    for line in lines:
+        heading = _heading(line)
+        if heading:
+            kind, inline = heading
+            sections.append([kind, [line.split(":")[0].strip() + ":"] + ([inline] if inline else [])])
+        else:
+            sections[-1][1].append(line)
+    return [(kind, section_lines) for kind, section_lines in sections if section_lines]
+
+def _take_lines(lines, budget):
+    taken = []
+    for line in lines:
+        cost = estimate_text_tokens(line)
+        if cost <= budget:
+            taken.append(line)
+            budget -= cost
+            continue
+        # Cut the last line word by word so a long paragraph still contributes its opening
+        words = []
+        budget -= 1
+        for word in line.split():
+            cost = estimate_text_tokens(word)
+            if cost > budget:
+                break
+            words.append(word)
+            budget -= cost
+        if words:
+            taken.append(" ".join(words) + " ...")
+        break
+    return taken
+
+def compact_resume(text, token_budget):
+    # Keeps the highest-value sections (skills, experience, education) within token_budget, in original order
+    lines = normalize_lines(text)
+    sections = [(kind, section_lines) for kind, section_lines in split_sections(lines) if kind != "dropped"]
+    costs = [sum(estimate_text_tokens(line) for line in section_lines) for _, section_lines in sections]
+    if sum(costs) <= token_budget:
+        return "\n".join(line for _, section_lines in sections for line in section_lines)
+    if len(sections) == 1:
+        return "\n".join(_take_lines(sections[0][1], token_budget))
+
+    # Quotas are per kind, so a resume with two "Experience" headings still fits the budget
+    quota_left = {kind: int(token_budget * share) for kind, share in SECTION_QUOTAS.items()}
+    allowances = []
+    for (kind, _), cost in zip(sections, costs):
+        allowances.append(min(cost, quota_left[kind]))
+        quota_left[kind] -= allowances[-1]
+    leftover = token_budget - sum(allowances)
+    for kind in SECTION_PRIORITY:
+        for position, (section_kind, _) in enumerate(sections):
+            if section_kind == kind and leftover > 0:
+                extra = min(costs[position] - allowances[position], leftover)
+                allowances[position] += extra
+                leftover -= extra
+    return "\n".join(line for (_, section_lines), allowance in zip(sections, allowances)
+                     for line in _take_lines(section_lines, allowance))
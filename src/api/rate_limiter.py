@@ -0,0 +1,197 @@
+import heapq
+import itertools
+import json
+import logging
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+_governor = None
+_governor_settings = None
+_governor_lock = threading.Lock()
+
+def estimate_tokens(payload):
+    # Rough local estimate (~4 characters per token) plus the completion budget
+    prompt_chars = sum(len(str(message.get("content", ""))) for message in payload.get("messages", []))
+    return prompt_chars // 4 + int(payload.get("max_tokens", 0))
+
+class _LocalBucketStore:
+    def __init__(self):
+        self._state = None
+        self._lock = threading.Lock()
+
+    def transact(self, update):
+        with self._lock:
+            self._state, result = update(self._state)
+            return result
+
+class _SharedBucketStore:
+    # Bucket state kept in a small SQLite file so several server processes draw from one budget
+    def __init__(self, state_path):
+        self.state_path = Path(state_path)
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        with closing(sqlite3.connect(self.state_path, timeout=30)) as conn, conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS governor (id INTEGER PRIMARY KEY CHECK (id = 1), state TEXT NOT NULL)")
+
+    def transact(self, update):
+        with closing(sqlite3.connect(self.state_path, timeout=30, isolation_level=None)) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute("SELECT state FROM governor WHERE id = 1").fetchone()
+                state, result = update(json.loads(row[0]) if row else None)
+                conn.execute("INSERT OR REPLACE INTO governor (id, state) VALUES (1, ?)", (json.dumps(state),))
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        return result
+
+class RateGovernor:
+    def __init__(self, requests_per_minute=0, tokens_per_minute=0, burst_seconds=10, latency_target_seconds=None,
+                 min_rate_fraction=0.1, recovery_step=0.02, shared_state_file=None):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.request_capacity = max(1.0, requests_per_minute * burst_seconds / 60)
+        self.token_capacity = max(1.0, tokens_per_minute * burst_seconds / 60)
+        self.latency_target_seconds = latency_target_seconds
+        self.min_rate_fraction = min_rate_fraction
+        self.recovery_step = recovery_step
+        self._store = _SharedBucketStore(shared_state_file) if shared_state_file else _LocalBucketStore()
+        self._cond = threading.Condition()
+        self._waiters = []
+        self._session_tags = {}
+        self._virtual_time = 0.0
+        self._sequence = itertools.count()
+        self._last_multiplier = 1.0
+
+    def _refill(self, state, now):
+        if state is None:
+            state = {"requests": self.request_capacity, "tokens": self.token_capacity,
+                     "updated": now, "multiplier": 1.0, "paused_until": 0.0}
+        elapsed = max(0.0, now - state["updated"])
+        per_second = state["multiplier"] / 60
+        state["requests"] = min(self.request_capacity, state["requests"] + elapsed * self.requests_per_minute * per_second)
+        state["tokens"] = min(self.token_capacity, state["tokens"] + elapsed * self.tokens_per_minute * per_second)
+        state["updated"] = now
+        return state
+
+    def _try_consume(self, tokens):
+        # Returns 0 when the request may go now, otherwise the seconds until the buckets can cover it
+        def consume(state):
+            now = time.time()
+            state = self._refill(state, now)
+            if now < state["paused_until"]:
+                return state, state["paused_until"] - now
+            # A request larger than the whole bucket only waits for a full bucket, then runs into debt
+            tokens_needed = min(tokens, self.token_capacity) if self.tokens_per_minute else 0
+            requests_ok = not self.requests_per_minute or state["requests"] >= 1
+            tokens_ok = state["tokens"] >= tokens_needed
+            if requests_ok and tokens_ok:
+                if self.requests_per_minute:
+                    state["requests"] -= 1
+                if self.tokens_per_minute:
+                    state["tokens"] -= tokens
+                return state, 0.0
+            per_second = state["multiplier"] / 60
+            wait_requests = 0.0 if requests_ok else (1 - state["requests"]) / (self.requests_per_minute * per_second)
+            wait_tokens = 0.0 if tokens_ok else (tokens_needed - state["tokens"]) / (self.tokens_per_minute * per_second)
+            return state, max(wait_requests, wait_tokens, 0.01)
+        return self._store.transact(consume)
+
+    def acquire(self, session_id=None, tokens=0):
+        session_id = session_id or "default"
+        started = time.monotonic()
+        with self._cond:
+            # Start-time fair queuing: a session's next request is tagged one slot after its previous one,
+            # so a session with a deep backlog cannot starve one that just arrived
+            tag = max(self._virtual_time, self._session_tags.get(session_id, 0.0)) + 1
+            self._session_tags[session_id] = tag
+            ticket = (tag, next(self._sequence))
+            heapq.heappush(self._waiters, ticket)
+            try:
+                while True:
+                    wait = None
+                    if self._waiters[0] == ticket:
+                        wait = self._try_consume(tokens)
+                        if wait <= 0:
+                            heapq.heappop(self._waiters)
+                            self._virtual_time = tag
+                            if len(self._session_tags) > 1000:
+                                self._session_tags = {key: value for key, value in self._session_tags.items()
+                                                      if value > self._virtual_time}
+                            return time.monotonic() - started
+                    self._cond.wait(timeout=wait)
+            finally:
+                if ticket in self._waiters:
+                    self._waiters.remove(ticket)
+                    heapq.heapify(self._waiters)
+                self._cond.notify_all()
+
+    def record_response(self, status_code, latency=None, retry_after=None):
+        # AIMD: halve the rate on 429, ease off when the gateway slows down, recover additively otherwise
+        def update(state):
+            now = time.time()
+            state = self._refill(state, now)
+            if status_code == 429:
+                state["multiplier"] = max(self.min_rate_fraction, state["multiplier"] * 0.5)
+                if retry_after:
+                    state["paused_until"] = max(state["paused_until"], now + retry_after)
+            elif status_code < 500:
+                if self.latency_target_seconds and latency and latency > self.latency_target_seconds:
+                    state["multiplier"] = max(self.min_rate_fraction, state["multiplier"] * 0.9)
+                else:
+                    state["multiplier"] = min(1.0, state["multiplier"] + self.recovery_step)
+            return state, state["multiplier"]
+        multiplier = self._store.transact(update)
+        if multiplier < self._last_multiplier and status_code == 429:
+            logger.warning(f"Rate governor backing off to {multiplier:.0%} of the configured budget after a 429.")
+        self._last_multiplier = multiplier
+        with self._cond:
+            self._cond.notify_all()
+
+    def record_usage(self, estimated_tokens, actual_tokens):
+        # Settle the difference between the local estimate and the usage the gateway reported
+        if not self.tokens_per_minute:
+            return
+        def update(state):
+            state = self._refill(state, time.time())
+            state["tokens"] -= actual_tokens - estimated_tokens
+            return state, None
+        self._store.transact(update)
+
+    def stats(self):
+        def read(state):
+            state = self._refill(state, time.time())
+            return state, state["multiplier"]
+        multiplier = self._store.transact(read)
+        with self._cond:
+            waiting = len(self._waiters)
+        return {
+            "rate_fraction": multiplier,
+            "requests_per_minute": self.requests_per_minute * multiplier,
+            "tokens_per_minute": self.tokens_per_minute * multiplier,
+            "waiting": waiting
+        }
+
+def configure_rate_governor(requests_per_minute=0, tokens_per_minute=0, latency_target_seconds=None, shared_state_file=None):
+    # Idempotent so Streamlit reruns keep the same governor (and its state) for the whole process
+    global _governor, _governor_settings
+    settings = (requests_per_minute, tokens_per_minute, latency_target_seconds, shared_state_file)
+    with _governor_lock:
+        if settings == _governor_settings:
+            return _governor
+        _governor_settings = settings
+        if not requests_per_minute and not tokens_per_minute:
+            _governor = None
+        else:
+            _governor = RateGovernor(requests_per_minute, tokens_per_minute,
+                                     latency_target_seconds=latency_target_seconds,
+                                     shared_state_file=shared_state_file or None)
+        return _governor
+
+def get_rate_governor():
+    return _governor
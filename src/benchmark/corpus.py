@@ -0,0 +1,85 @@
+import io
+import random
+from pathlib import Path
+
+from docx import Document
+
+FIRST_NAMES = ["Asha", "Ben", "Carlos", "Divya", "Elena", "Farid", "Grace", "Hiro", "Ines", "Jamal", "Kavya", "Liam",
+               "Maya", "Nikhil", "Olga", "Priya", "Quinn", "Ravi", "Sara", "Tomas"]
+LAST_NAMES = ["Anand", "Brown", "Chen", "Das", "Evans", "Fischer", "Gupta", "Hall", "Iyer", "Jones", "Khan", "Lopez",
+              "Mehta", "Nair", "Okafor", "Patel", "Rao", "Singh", "Tan", "Weber"]
+ROLES = ["Software Engineer", "Senior Java Developer", "QA Automation Engineer", "Systems Engineer", "Data Engineer"]
+SKILLS = ["Java", "Spring Boot", "Microservices", "REST APIs", "SQL", "MongoDB", "Docker", "Kubernetes", "AWS", "Azure",
+          "Selenium", "TestNG", "Jenkins", "CI/CD", "Python", "Kafka", "React", "Angular", "Git", "Agile"]
+FILLER = ("designed implemented maintained improved migrated automated delivered reviewed scaled monitored services "
+          "pipelines modules platform features releases customers teams latency reliability coverage throughput").split()
+
+class BenchmarkUpload(io.BytesIO):
+    # In-memory stand-in for Streamlit's UploadedFile
+    def __init__(self, name, data):
+        super().__init__(data)
+        self.name = name
+        self.size = len(data)
+
+def _resume_paragraphs(rng, index, paragraphs):
+    name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+    lines = [f"{name} {index}", f"{rng.choice(ROLES)} | {rng.randint(1, 15)} years experience",
+             "Skills: " + ", ".join(rng.sample(SKILLS, rng.randint(4, 10))), "Education: Bachelor of Engineering"]
+    for _ in range(paragraphs):
+        lines.append(f"{rng.choice(ROLES)} ({rng.randint(2005, 2024)}): " + " ".join(rng.choice(FILLER) for _ in range(40)))
+    return lines
+
+def make_pdf(lines, lines_per_page=45):
+    # Minimal single-font PDF; enough for pdfplumber to extract text page by page
+    pages = [lines[i:i + lines_per_page] for i in range(0, len(lines), lines_per_page)] or [[]]
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None, "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for page in pages:
+        text = " ".join("(%s) '" % line.replace("\\", "").replace("(", "").replace(")", "")[:110] for line in page)
+        content = f"BT /F1 9 Tf 40 800 Td 12 TL {text} ET"
+        objects.append(f"<< /Length {len(content)} >>\nstream\n{content}\nendstream")
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 842] /Contents {len(objects)} 0 R "
+                       "/Resources << /Font << /F1 3 0 R >> >> >>")
+        kids.append(len(objects))
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(f'{kid} 0 R' for kid in kids)}] /Count {len(kids)} >>"
+    output = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(output))
+        output += f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1", "replace")
+    xref_offset = len(output)
+    output += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    output += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode()
+    output += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref_offset}\n%%EOF\n".encode()
+    return bytes(output)
+
+def make_docx(lines):
+    document = Document()
+    for line in lines:
+        document.add_paragraph(line)
+    output = io.BytesIO()
+    document.save(output)
+    return output.getvalue()
+
+def generate_corpus(count, formats=("txt", "pdf", "docx"), min_paragraphs=3, max_paragraphs=40, seed=0):
+    # Sizes vary from a short CV to a long multi-page one; the same seed always produces the same corpus
+    rng = random.Random(seed)
+    uploads = []
+    for index in range(count):
+        file_format = formats[index % len(formats)]
+        lines = _resume_paragraphs(rng, index, rng.randint(min_paragraphs, max_paragraphs))
+        if file_format == "pdf":
+            data = make_pdf(lines)
+        elif file_format == "docx":
+            data = make_docx(lines)
+        else:
+            data = "\n".join(lines).encode("utf-8")
+        uploads.append(BenchmarkUpload(f"resume_{index:05d}.{file_format}", data))
+    return uploads
+
+def write_corpus(uploads, directory):
+    # Lets the same corpus be fed to the headless CLI
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    for upload in uploads:
+        (directory / upload.name).write_bytes(upload.getvalue())
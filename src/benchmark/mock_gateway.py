@@ -0,0 +1,180 @@
+import json
+import logging
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+_JOB_TITLE_PATTERN = re.compile(r"^Job(?: \d+)?: (.+)$", re.MULTILINE)
+_RESUME_PATTERN = re.compile(r"^Resume: (.*)", re.MULTILINE)
+_PACKED_RESUME_PATTERN = re.compile(r"^=== Resume (\d+) ===\n(.*)", re.MULTILINE)
+_STREAM_PIECE_PATTERN = re.compile(r"\S+\s*|\s+")
+# Share of the latency spent before the first streamed token; the rest is spread over the tokens
+_FIRST_TOKEN_SHARE = 0.3
+
+class MockGateway:
+    # Local OpenAI-compatible stand-in for the LLM gateway with configurable latency and failure injection
+    def __init__(self, latency_ms=800, latency_sigma=0.5, rate_429=0.0, malformed_rate=0.0, retry_after=1, seed=0,
+                 host="127.0.0.1", port=0):
+        self.latency_ms = latency_ms
+        self.latency_sigma = latency_sigma
+        self.rate_429 = rate_429
+        self.malformed_rate = malformed_rate
+        self.retry_after = retry_after
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.counts = {"requests": 0, "ok": 0, "rate_limited": 0, "malformed": 0, "streams_aborted": 0}
+        gateway = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                status, headers, reply = gateway.handle(body)
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                if isinstance(reply, bytes):
+                    self.send_header("Content-Length", str(len(reply)))
+                    self.end_headers()
+                    self.wfile.write(reply)
+                    return
+                # Server-sent events, delimited by closing the connection
+                self.send_header("Connection", "close")
+                self.end_headers()
+                self.close_connection = True
+                try:
+                    for delay, event in reply:
+                        time.sleep(delay)
+                        self.wfile.write(event)
+                        self.wfile.flush()
+                except (BrokenPipeError, ConnectionResetError):
+                    gateway.record("streams_aborted")
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1/chat/completions"
+
+    def _draw(self):
+        # Median latency_ms with a log-normal tail, like a real model endpoint under load
+        with self._lock:
+            self.counts["requests"] += 1
+            latency = self.latency_ms / 1000 * self._random.lognormvariate(0, self.latency_sigma) if self.latency_ms else 0
+            roll = self._random.random()
+        if roll < self.rate_429:
+            return latency, "rate_limited"
+        if roll < self.rate_429 + self.malformed_rate:
+            return latency, "malformed"
+        return latency, "ok"
+
+    def record(self, outcome):
+        with self._lock:
+            self.counts[outcome] += 1
+
+    def handle(self, body):
+        latency, outcome = self._draw()
+        self.record(outcome)
+        if outcome == "rate_limited":
+            # Rate limiting is decided up front by real gateways, so it comes back quickly
+            time.sleep(min(latency, 0.05))
+            reply = json.dumps({"error": {"message": "Rate limit exceeded"}}).encode("utf-8")
+            return 429, {"Content-Type": "application/json", "Retry-After": str(self.retry_after)}, reply
+        try:
+            payload = json.loads(body)
+        except ValueError:
+            return 400, {"Content-Type": "application/json"}, b'{"error": {"message": "Invalid JSON"}}'
+        streaming = bool(payload.get("stream")) and outcome == "ok"
+        time.sleep(latency * _FIRST_TOKEN_SHARE if streaming else latency)
+        if outcome == "malformed":
+            return 200, {"Content-Type": "application/json"}, self._malformed_reply()
+        prompt = "\n".join(str(message.get("content", "")) for message in payload.get("messages", []))
+        content = self._completion(prompt, "response_format" in payload)
+        if streaming:
+            return 200, {"Content-Type": "text/event-stream"}, self._stream_events(payload, content, latency)
+        reply = {
+            "id": "mock", "object": "chat.completion", "model": payload.get("model"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": len(prompt) // 4, "completion_tokens": len(content) // 4,
+                      "total_tokens": (len(prompt) + len(content)) // 4}
+        }
+        return 200, {"Content-Type": "application/json"}, json.dumps(reply).encode("utf-8")
+
+    def _stream_events(self, payload, content, latency):
+        # (delay, event) pairs, one OpenAI-style delta per word
+        pieces = _STREAM_PIECE_PATTERN.findall(content)
+        delay = latency * (1 - _FIRST_TOKEN_SHARE) / max(1, len(pieces))
+        for number, piece in enumerate(pieces):
+            chunk = {"id": "mock", "object": "chat.completion.chunk", "model": payload.get("model"),
+                     "choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": None}]}
+            yield (0 if number == 0 else delay), f"data: {json.dumps(chunk)}\n\n".encode("utf-8")
+        yield 0, b"data: [DONE]\n\n"
+
+    def _malformed_reply(self):
+        with self._lock:
+            kind = self._random.randrange(3)
+        if kind == 0:
+            return b"<html>upstream error</html>"
+        if kind == 1:
+            return json.dumps({"choices": []}).encode("utf-8")
+        return json.dumps({"choices": [{"message": {"content": "I'm sorry, I can't help with that."}}]}).encode("utf-8")
+
+    def _analysis(self, first_line, titles):
+        name = " ".join(first_line.split()[:2]) or "Unknown"
+        seed = sum(map(ord, name))
+        candidate = {"candidate_name": name, "years_of_experience": seed % 15 + 1,
+                     "education_level": "Bachelor's, Computer Science", "most_recent_role": "Software Engineer"}
+        jobs = [{"title": title, "relevant_skills": "Java, SQL", "fitment_score": (seed + number) % 11,
+                 "strengths": "Solid backend experience", "gaps": "Limited cloud exposure"}
+                for number, title in enumerate(titles)]
+        return name, candidate, jobs
+
+    def _completion(self, prompt, json_mode):
+        titles = _JOB_TITLE_PATTERN.findall(prompt) or ["Unknown"]
+        packed = _PACKED_RESUME_PATTERN.findall(prompt)
+        if packed:
+            # Packed prompts always ask for JSON, one numbered candidate per resume
+            candidates = []
+            for number, first_line in packed:
+                _, candidate, jobs = self._analysis(first_line, titles[:1])
+                candidates.append(dict(candidate, resume=int(number), **jobs[0]))
+            return json.dumps({"candidates": candidates})
+        match = _RESUME_PATTERN.search(prompt)
+        name, candidate, jobs = self._analysis(match.group(1) if match else "", titles)
+        if json_mode:
+            return json.dumps(dict(candidate, jobs=jobs) if len(titles) > 1 else dict(candidate, **jobs[0]))
+        lines = [f"- Candidate Name: {name}", f"- Years of Experience: {candidate['years_of_experience']} years",
+                 f"- Education Level: {candidate['education_level']}", f"- Most Recent Role: {candidate['most_recent_role']}"]
+        for job in jobs:
+            if len(titles) > 1:
+                lines.append(f"=== JD: {job['title']} ===")
+            lines += [f"- Relevant Skills: {job['relevant_skills']}", f"- Fitment Score: {job['fitment_score']}/10",
+                      f"- Strengths: {job['strengths']}", f"- Gaps/Weaknesses: {job['gaps']}"]
+        return "\n".join(lines)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        logger.info(f"Mock gateway listening on {self.url}")
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
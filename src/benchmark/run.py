@@ -0,0 +1,190 @@
+import argparse
+import json
+import logging
+import sys
+import time
+from pathlib import Path
+
+from src.utils.logger import setup_process_logging
+from src.utils.metrics import get_metrics
+from src.config.config_loader import load_config, load_logging_config
+from src.models.job_descriptions import JOB_DESCRIPTIONS
+from src.api.client import configure_http_client
+from src.api.rate_limiter import configure_rate_governor
+from src.processing.resume_processor import process_resumes
+from src.benchmark.corpus import generate_corpus, write_corpus
+from src.benchmark.mock_gateway import MockGateway
+
+logger = logging.getLogger(__name__)
+
+def peak_rss_mb():
+    # (this process, largest extraction worker); the resource module is not available on Windows
+    try:
+        import resource
+    except ImportError:
+        return None, None
+    # ru_maxrss is reported in bytes on macOS and in kilobytes elsewhere
+    scale = 1 if sys.platform == "darwin" else 1024
+    main = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale / (1024 * 1024)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * scale / (1024 * 1024)
+    return round(main, 1), round(children, 1)
+
+def _percentiles(snapshot, name, **labels):
+    for histogram in snapshot["histograms"]:
+        if histogram["name"] == name and all(histogram["labels"].get(key) == value for key, value in labels.items()):
+            return {"count": histogram["count"], "p50": histogram["p50"], "p95": histogram["p95"], "p99": histogram["p99"]}
+    return None
+
+def _counter(snapshot, name):
+    return sum(counter["value"] for counter in snapshot["counters"] if counter["name"] == name)
+
+def run_benchmark(args):
+    api_config, processing_config = load_config(args.config)
+    configure_http_client(
+        pool_size=api_config['pool_size'],
+        max_retries=api_config['max_retries'],
+        backoff_base=api_config['backoff_base'],
+        backoff_max=api_config['backoff_max'],
+        circuit_failure_threshold=api_config['circuit_failure_threshold'],
+        circuit_reset_seconds=api_config['circuit_reset_seconds']
+    )
+    if args.rate_limit:
+        configure_rate_governor(api_config['requests_per_minute'], api_config['tokens_per_minute'],
+                                api_config['latency_target_seconds'])
+    else:
+        configure_rate_governor(0, 0)
+    unknown = [key for key in args.jd if key not in JOB_DESCRIPTIONS]
+    if unknown:
+        logger.error(f"Unknown job description(s) {unknown}. Choose from: {', '.join(JOB_DESCRIPTIONS)}")
+        return 2
+
+    formats = tuple(fmt.strip().lower().lstrip('.') for fmt in args.formats.split(','))
+    started = time.perf_counter()
+    corpus = generate_corpus(args.resumes, formats, args.min_paragraphs, args.max_paragraphs, args.seed)
+    logger.info(f"Generated {len(corpus)} synthetic resumes ({sum(upload.size for upload in corpus) / (1024 * 1024):.1f} MB) "
+                f"in {time.perf_counter() - started:.1f}s")
+    if args.corpus_dir:
+        write_corpus(corpus, args.corpus_dir)
+
+    model_kwargs = dict(api_config['model_kwargs'], streaming=args.stream or bool(args.early_stop_score),
+                        early_stop_score=args.early_stop_score)
+    extract_workers = args.extract_workers if args.extract_workers is not None else processing_config['extract_workers']
+    concurrency = args.concurrency or api_config['max_concurrency']
+    metrics = get_metrics()
+    metrics.reset()
+    with MockGateway(args.latency_ms, args.latency_sigma, args.rate_429, args.malformed_rate, seed=args.seed) as gateway:
+        started = time.perf_counter()
+        df = process_resumes(
+            corpus,
+            args.jd if len(args.jd) > 1 else args.jd[0],
+            JOB_DESCRIPTIONS,
+            gateway.url,
+            api_config['headers'],
+            processing_config['max_file_size_mb'],
+            0,
+            max_concurrency=concurrency,
+            model_kwargs=model_kwargs,
+            max_chars=processing_config['max_extract_chars'],
+            extract_workers=extract_workers,
+            extract_queue_size=processing_config['extract_queue_size'],
+            session_id="benchmark",
+            pack_size=args.pack,
+            pack_max_resume_tokens=processing_config['pack_max_resume_tokens'],
+            hedge_percentile=args.hedge_percentile,
+            hedge_max_extra_fraction=api_config['hedge_max_extra_fraction'],
+            hedge_late_max_extra_fraction=api_config['hedge_late_max_extra_fraction'],
+            hedge_min_samples=api_config['hedge_min_samples'],
+            deadline_seconds=args.deadline
+        )
+        wall_seconds = time.perf_counter() - started
+        gateway_counts = dict(gateway.counts)
+
+    snapshot = metrics.snapshot()
+    analyzed = 0 if df is None else len(df)
+    main_rss, worker_rss = peak_rss_mb()
+    report = {
+        "resumes": len(corpus),
+        "analyzed": analyzed,
+        "failed": len(corpus) - analyzed,
+        "wall_seconds": round(wall_seconds, 3),
+        "resumes_per_second": round(len(corpus) / wall_seconds, 3),
+        "latency_seconds": _percentiles(snapshot, "analyze_seconds"),
+        "api_latency_seconds": _percentiles(snapshot, "api_request_seconds"),
+        "first_token_seconds": _percentiles(snapshot, "api_first_token_seconds"),
+        "extract_seconds": {fmt: _percentiles(snapshot, "extract_seconds", format=fmt) for fmt in formats},
+        "peak_rss_mb": {"main": main_rss, "extract_workers": worker_rss},
+        "hedges": {"sent": _counter(snapshot, "api_hedges_total"), "won": _counter(snapshot, "api_hedges_won_total")},
+        "gateway": gateway_counts,
+        "settings": {
+            "formats": list(formats), "concurrency": concurrency, "extract_workers": extract_workers,
+            "latency_ms": args.latency_ms, "latency_sigma": args.latency_sigma, "rate_429": args.rate_429,
+            "malformed_rate": args.malformed_rate, "rate_limit": args.rate_limit, "jd": args.jd, "seed": args.seed,
+            "streaming": model_kwargs["streaming"], "early_stop_score": args.early_stop_score, "pack": args.pack,
+            "hedge_percentile": args.hedge_percentile, "deadline": args.deadline
+        }
+    }
+
+    latency = report["latency_seconds"] or {}
+    logger.info(f"{report['resumes']} resumes in {report['wall_seconds']:.1f}s: {report['resumes_per_second']:.2f} resumes/sec, "
+                f"{analyzed} analyzed, {report['failed']} failed")
+    if latency:
+        logger.info(f"Per-resume latency p50 {latency['p50']:.3f}s, p95 {latency['p95']:.3f}s, p99 {latency['p99']:.3f}s")
+    logger.info(f"Peak RSS: {main_rss} MB (main), {worker_rss} MB (largest extraction worker); gateway {gateway_counts}")
+    print(json.dumps(report, indent=2))
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2), encoding='utf-8')
+    if args.baseline:
+        return compare_to_baseline(report, json.loads(Path(args.baseline).read_text(encoding='utf-8')), args.max_regression)
+    return 0
+
+def compare_to_baseline(report, baseline, max_regression):
+    regressions = []
+    if report["resumes_per_second"] < baseline["resumes_per_second"] * (1 - max_regression):
+        regressions.append(f"throughput {report['resumes_per_second']:.2f} < baseline {baseline['resumes_per_second']:.2f} resumes/sec")
+    current_p95 = (report.get("latency_seconds") or {}).get("p95")
+    baseline_p95 = (baseline.get("latency_seconds") or {}).get("p95")
+    if current_p95 and baseline_p95 and current_p95 > baseline_p95 * (1 + max_regression):
+        regressions.append(f"p95 latency {current_p95:.3f}s > baseline {baseline_p95:.3f}s")
+    for regression in regressions:
+        logger.error(f"Performance regression: {regression} (tolerance {max_regression:.0%})")
+    return 1 if regressions else 0
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m src.benchmark.run",
+                                     description="Offline throughput benchmark against a local mock LLM gateway")
+    parser.add_argument("--resumes", type=int, default=200, help="Number of synthetic resumes")
+    parser.add_argument("--formats", default="txt,pdf,docx", help="Comma-separated formats, used round-robin")
+    parser.add_argument("--min-paragraphs", type=int, default=3, help="Shortest resume, in experience paragraphs")
+    parser.add_argument("--max-paragraphs", type=int, default=40, help="Longest resume, in experience paragraphs")
+    parser.add_argument("--latency-ms", type=float, default=800, help="Median mock gateway latency")
+    parser.add_argument("--latency-sigma", type=float, default=0.5, help="Log-normal spread of the gateway latency")
+    parser.add_argument("--rate-429", type=float, default=0.0, help="Fraction of requests answered with 429")
+    parser.add_argument("--malformed-rate", type=float, default=0.0, help="Fraction of requests answered with a malformed reply")
+    parser.add_argument("--jd", nargs='+', default=[next(iter(JOB_DESCRIPTIONS))], help="Job description key(s)")
+    parser.add_argument("--concurrency", type=int, help="Override [API] max_concurrency")
+    parser.add_argument("--extract-workers", type=int, help="Override [PROCESSING] extract_workers")
+    parser.add_argument("--stream", action="store_true", help="Request streamed (server-sent event) replies")
+    parser.add_argument("--early-stop-score", type=float, default=0,
+                        help="Stream and stop generating once the score is below this (0 = never)")
+    parser.add_argument("--pack", type=int, default=0,
+                        help="Send up to N short resumes per request (0 = one request per resume)")
+    parser.add_argument("--hedge-percentile", type=float,
+                        help="Resend requests slower than this latency percentile (0-1) of the run so far")
+    parser.add_argument("--deadline", type=float, help="Seconds after which remaining requests are hedged from the median")
+    parser.add_argument("--rate-limit", action="store_true", help="Apply the [RATE_LIMIT] governor (off by default)")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the corpus and the gateway")
+    parser.add_argument("--corpus-dir", help="Also write the synthetic corpus to this directory")
+    parser.add_argument("--output", help="Write the JSON report here")
+    parser.add_argument("--baseline", help="Earlier JSON report to compare against; exits 1 on regression")
+    parser.add_argument("--max-regression", type=float, default=0.1, help="Tolerated slowdown versus the baseline (0-1)")
+    parser.add_argument("--config", default="config/config.ini", help="Path to config.ini")
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    logging_config = load_logging_config(args.config)
+    setup_process_logging(logging_config, logging_config['benchmark_log_file'])
+    return run_benchmark(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
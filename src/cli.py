@@ -0,0 +1,449 @@
+import argparse
+import csv
+import hashlib
+import json
+import logging
+import os
+import socket
+import sys
+import threading
+import time
+from contextlib import ExitStack
+from pathlib import Path
+
+import pandas as pd
+
+from src.utils.logger import setup_process_logging
+from src.config.config_loader import load_config, load_logging_config
+from src.models.job_descriptions import JOB_DESCRIPTIONS
+from src.api.cache import get_analysis_cache
+from src.api.rate_limiter import configure_rate_governor
+from src.api.client import configure_http_client
+from src.processing.archive_reader import ResumeArchive
+from src.processing.job_queue import get_job_queue
+from src.processing.resume_processor import RESULT_COLUMNS, iter_resumes, jd_score_column, order_columns
+from src.processing.results_store import get_results_store
+from src.utils.metrics import get_metrics, job_metrics
+
+logger = logging.getLogger(__name__)
+
+OUTPUT_COLUMNS = ["File Path"] + RESULT_COLUMNS
+
+class DiskUpload:
+    # Minimal stand-in for Streamlit's UploadedFile so on-disk resumes can go through iter_resumes
+    def __init__(self, path, rel_path):
+        self.path = path
+        self.name = str(rel_path)
+        self.size = path.stat().st_size
+
+    def read(self):
+        return self.path.read_bytes()
+
+def parse_shard(value):
+    try:
+        index, count = (int(part) for part in value.split('/'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Shard must look like i/n, got '{value}'")
+    if count < 1 or not 0 <= index < count:
+        raise argparse.ArgumentTypeError(f"Shard index must satisfy 0 <= i < n, got '{value}'")
+    return index, count
+
+def in_shard(rel_path, shard):
+    index, count = shard
+    # Hash the relative path so every machine agrees on the split regardless of listing order
+    digest = hashlib.sha1(str(rel_path).replace(os.sep, '/').encode('utf-8')).hexdigest()
+    return int(digest, 16) % count == index
+
+def file_identity(path, rel_path):
+    stat = path.stat()
+    return f"{rel_path}|{stat.st_size}|{stat.st_mtime_ns}"
+
+def load_journal(journal_path, jd_title):
+    done = {}
+    if not journal_path.exists():
+        return done
+    with open(journal_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                # A crash can leave a torn final line; everything before it is still valid
+                logger.warning(f"Skipping corrupt journal line in {journal_path}")
+                continue
+            if entry.get("jd") == jd_title and entry.get("status") == "ok":
+                done[entry["id"]] = entry["row"]
+    return done
+
+def append_journal(journal_file, entry):
+    journal_file.write(json.dumps(entry) + "\n")
+    journal_file.flush()
+    os.fsync(journal_file.fileno())
+
+def write_output(output_path, rows, columns=OUTPUT_COLUMNS):
+    df = pd.DataFrame(rows, columns=columns)
+    if output_path.suffix.lower() == '.parquet':
+        df.to_parquet(output_path, index=False)
+    else:
+        df.to_csv(output_path, index=False)
+
+def collect_files(directory, supported_extensions, recursive, shard):
+    pattern = '**/*' if recursive else '*'
+    files = []
+    for path in sorted(directory.glob(pattern)):
+        if not path.is_file() or path.suffix.lower() not in supported_extensions:
+            continue
+        rel_path = path.relative_to(directory)
+        if shard and not in_shard(rel_path, shard):
+            continue
+        files.append((path, rel_path))
+    return files
+
+def configure_api(api_config):
+    configure_http_client(
+        pool_size=api_config['pool_size'],
+        max_retries=api_config['max_retries'],
+        backoff_base=api_config['backoff_base'],
+        backoff_max=api_config['backoff_max'],
+        circuit_failure_threshold=api_config['circuit_failure_threshold'],
+        circuit_reset_seconds=api_config['circuit_reset_seconds']
+    )
+    configure_rate_governor(
+        requests_per_minute=api_config['requests_per_minute'],
+        tokens_per_minute=api_config['tokens_per_minute'],
+        latency_target_seconds=api_config['latency_target_seconds'],
+        shared_state_file=api_config['rate_limit_state_file']
+    )
+
+def screen(args):
+    api_config, processing_config = load_config(args.config)
+    configure_api(api_config)
+    unknown = [key for key in args.jd if key not in JOB_DESCRIPTIONS]
+    if unknown:
+        logger.error(f"Unknown job description(s) {unknown}. Choose from: {', '.join(JOB_DESCRIPTIONS)}")
+        return 2
+    jd_title = " | ".join(JOB_DESCRIPTIONS[key]["title"] for key in args.jd)
+    output_columns = OUTPUT_COLUMNS + ["Skill Coverage %", "Duplicate Of"]
+    if len(args.jd) > 1:
+        output_columns += [jd_score_column(JOB_DESCRIPTIONS[key]["title"]) for key in args.jd]
+
+    directory = Path(args.dir)
+    if not directory.is_dir():
+        logger.error(f"Resume directory not found: {directory}")
+        return 2
+    output_path = Path(args.output)
+    journal_path = Path(args.journal) if args.journal else output_path.with_name(output_path.name + '.journal.jsonl')
+    supported_extensions = [ext.strip().lower() for ext in processing_config['supported_extensions']]
+
+    files = collect_files(directory, supported_extensions, args.recursive, args.shard)
+    done = load_journal(journal_path, jd_title)
+    identities = [file_identity(path, rel_path) for path, rel_path in files]
+    pending = [(path, rel_path, identity) for (path, rel_path), identity in zip(files, identities) if identity not in done]
+    logger.info(f"{len(files)} resumes in shard, {len(files) - len(pending)} already screened, {len(pending)} to go")
+
+    cache = None
+    if processing_config['cache_enabled'] and not args.no_cache:
+        cache = get_analysis_cache(
+            processing_config['cache_dir'],
+            processing_config['cache_max_size_mb'],
+            processing_config['cache_max_age_days']
+        )
+
+    model_kwargs = dict(api_config['model_kwargs'])
+    if args.stream:
+        model_kwargs["streaming"] = True
+    if args.early_stop_score is not None:
+        model_kwargs.update(streaming=True, early_stop_score=args.early_stop_score)
+
+    csv_output = output_path.suffix.lower() != '.parquet'
+    rows_since_flush = 0
+    failures = 0
+    skipped = 0
+    started = time.time()
+    with open(journal_path, 'a', encoding='utf-8') as journal_file:
+        csv_file = None
+        if csv_output:
+            write_header = not output_path.exists() or output_path.stat().st_size == 0
+            csv_file = open(output_path, 'a', newline='', encoding='utf-8')
+            csv_writer = csv.DictWriter(csv_file, fieldnames=output_columns, extrasaction='ignore')
+            if write_header:
+                csv_writer.writeheader()
+        try:
+            events = iter_resumes(
+                [DiskUpload(path, rel_path) for path, rel_path, _ in pending],
+                args.jd if len(args.jd) > 1 else args.jd[0],
+                JOB_DESCRIPTIONS,
+                api_config['url'],
+                api_config['headers'],
+                processing_config['max_file_size_mb'],
+                api_config['request_delay'],
+                max_concurrency=args.concurrency or api_config['max_concurrency'],
+                model_kwargs=model_kwargs,
+                cache=cache,
+                max_chars=processing_config['max_extract_chars'],
+                extract_workers=processing_config['extract_workers'],
+                extract_queue_size=processing_config['extract_queue_size'],
+                prescreen_min_coverage=args.min_coverage if args.min_coverage is not None else (
+                    processing_config['prescreen_min_coverage'] if processing_config['prescreen_enabled'] else None),
+                prescreen_top_k=args.top_k if args.top_k is not None else (
+                    processing_config['prescreen_top_k'] if processing_config['prescreen_enabled'] else None),
+                session_id=f"cli-{os.getpid()}",
+                dedupe_threshold=None if args.no_dedupe else args.dedupe_threshold or (
+                    processing_config['dedupe_threshold'] if processing_config['dedupe_enabled'] else None),
+                dedupe_shingle_size=processing_config['dedupe_shingle_size'],
+                pack_size=None if args.no_pack else args.pack or (
+                    processing_config['pack_max_resumes'] if processing_config['pack_enabled'] else None),
+                pack_max_resume_tokens=processing_config['pack_max_resume_tokens'],
+                hedge_percentile=None if args.no_hedge else args.hedge_percentile or (
+                    api_config['hedge_percentile'] if api_config['hedge_enabled'] else None),
+                hedge_max_extra_fraction=api_config['hedge_max_extra_fraction'],
+                hedge_late_max_extra_fraction=api_config['hedge_late_max_extra_fraction'],
+                hedge_min_samples=api_config['hedge_min_samples'],
+                deadline_seconds=None if args.no_hedge else args.deadline or api_config['deadline_seconds']
+            )
+            for count, event in enumerate(events, start=1):
+                path, rel_path, identity = pending[event['index']]
+                if event['row']:
+                    row = dict(event['row'], **{"File Path": str(rel_path)})
+                    done[identity] = row
+                    if csv_file:
+                        csv_writer.writerow(row)
+                        csv_file.flush()
+                    append_journal(journal_file, {"id": identity, "jd": jd_title, "status": "ok", "row": row})
+                    rows_since_flush += 1
+                elif event['skipped']:
+                    skipped += 1
+                    append_journal(journal_file, {"id": identity, "jd": jd_title, "status": "skipped", "error": event['error']})
+                else:
+                    failures += 1
+                    append_journal(journal_file, {"id": identity, "jd": jd_title, "status": "failed", "error": event['error']})
+                if not csv_output and rows_since_flush >= args.flush_every:
+                    write_output(output_path, list(done.values()), output_columns)
+                    rows_since_flush = 0
+                if count % 25 == 0 or count == len(pending):
+                    logger.info(f"Screened {count}/{len(pending)} resumes ({failures} failed, {time.time() - started:.0f}s elapsed)")
+        finally:
+            if csv_file:
+                csv_file.close()
+
+    # Rewrite the final output from the journal so rows appended before a crash are never duplicated
+    write_output(output_path, [done[identity] for identity in identities if identity in done], output_columns)
+    logger.info(f"Wrote {len(done)} results to {output_path} ({skipped} skipped by pre-screen, {failures} failed; rerun to retry failures)")
+    if args.metrics_out:
+        metrics_path = Path(args.metrics_out)
+        metrics = get_metrics()
+        metrics_path.write_text(metrics.to_json() if metrics_path.suffix.lower() == '.json' else metrics.to_prometheus(),
+                                encoding='utf-8')
+        logger.info(f"Wrote stage timings to {metrics_path}")
+    return 0 if not failures else 1
+
+def _job_uploads(job_queue, job, processing_config, archives):
+    resume_files = []
+    archive_skipped = []
+    for name, path in job_queue.files(job['id']):
+        if path.suffix == '.zip':
+            archive = archives.enter_context(ResumeArchive(
+                path, processing_config['supported_extensions'], processing_config['max_file_size_mb'], name=name))
+            resume_files += archive.members
+            archive_skipped += archive.skipped
+        else:
+            resume_files.append(DiskUpload(path, name))
+    return resume_files, archive_skipped
+
+def run_job(job, job_queue, results_store, api_config, processing_config, progress_seconds=1.0):
+    # Results go to the results store under run_id = job id as they complete, so the UI can page them mid-run.
+    # The job gets its own metrics registry, since other jobs may be running in the same worker
+    with job_metrics() as metrics:
+        _run_job(job, job_queue, results_store, api_config, processing_config, progress_seconds, metrics)
+
+def _run_job(job, job_queue, results_store, api_config, processing_config, progress_seconds, metrics):
+    job_id = job['id']
+    params = job['params']
+    cache = None
+    if processing_config['cache_enabled'] and params.get('use_cache', True):
+        cache = get_analysis_cache(
+            processing_config['cache_dir'],
+            processing_config['cache_max_size_mb'],
+            processing_config['cache_max_age_days']
+        )
+    model_kwargs = dict(api_config['model_kwargs'], **params.get('model_kwargs', {}))
+    counts = {"processed": 0, "analyzed": 0, "failed": 0, "skipped": 0, "duplicates": 0}
+    progress = {"failed_files": [], "archive_skipped": [], "streaming_rows": {}}
+    pending_rows = []
+    status = "running"
+
+    def flush():
+        results_store.save_results(pending_rows, run_id=job_id, session_id=job['session_id'])
+        pending_rows.clear()
+        return job_queue.update(job_id, progress=dict(progress, streaming_rows=list(progress['streaming_rows'].values())),
+                                metrics=metrics.snapshot(), metrics_prom=metrics.to_prometheus(), **counts)
+
+    with ExitStack() as archives:
+        try:
+            resume_files, progress['archive_skipped'] = _job_uploads(job_queue, job, processing_config, archives)
+            job_queue.update(job_id, total=len(resume_files))
+            logger.info(f"Running job {job_id}: {len(resume_files)} resumes")
+            events = iter_resumes(
+                resume_files,
+                params['selected_jd'],
+                params['job_descriptions'],
+                api_config['url'],
+                api_config['headers'],
+                processing_config['max_file_size_mb'],
+                api_config['request_delay'],
+                max_concurrency=api_config['max_concurrency'],
+                model_kwargs=model_kwargs,
+                cache=cache,
+                max_chars=processing_config['max_extract_chars'],
+                extract_workers=processing_config['extract_workers'],
+                extract_queue_size=processing_config['extract_queue_size'],
+                prescreen_min_coverage=params.get('prescreen_min_coverage'),
+                prescreen_top_k=params.get('prescreen_top_k'),
+                session_id=job['session_id'],
+                dedupe_threshold=params.get('dedupe_threshold'),
+                dedupe_shingle_size=processing_config['dedupe_shingle_size'],
+                partial_rows=model_kwargs['streaming'],
+                pack_size=params.get('pack_size'),
+                pack_max_resume_tokens=processing_config['pack_max_resume_tokens'],
+                hedge_percentile=params.get('hedge_percentile'),
+                hedge_max_extra_fraction=api_config['hedge_max_extra_fraction'],
+                hedge_late_max_extra_fraction=api_config['hedge_late_max_extra_fraction'],
+                hedge_min_samples=api_config['hedge_min_samples'],
+                deadline_seconds=params.get('deadline_seconds')
+            )
+            last_flush = time.time()
+            for event in events:
+                if event.get('partial'):
+                    progress['streaming_rows'][event['index']] = dict(event['row'], **{"File Name": event['file_name']})
+                else:
+                    progress['streaming_rows'].pop(event['index'], None)
+                    counts['processed'] += 1
+                    if event['row']:
+                        counts['analyzed'] += 1
+                        counts['duplicates'] += 1 if event['row'].get('Duplicate Of') else 0
+                        pending_rows.append((order_columns(event['row']), event['resume_hash']))
+                    elif event['skipped']:
+                        counts['skipped'] += 1
+                    else:
+                        counts['failed'] += 1
+                        progress['failed_files'].append(event['file_name'])
+                if time.time() - last_flush >= progress_seconds:
+                    last_flush = time.time()
+                    if flush() == "cancelling":
+                        status = "cancelled"
+                        logger.info(f"Job {job_id} cancelled after {counts['processed']} resumes")
+                        break
+            events.close()
+            progress['streaming_rows'].clear()
+            flush()
+            job_queue.finish(job_id, status if status == "cancelled" else "done")
+        except Exception as e:
+            logger.exception(f"Job {job_id} failed: {e}")
+            job_queue.finish(job_id, "failed", str(e))
+
+def _heartbeat(job_queue, worker_id, running, stop, interval):
+    # Keeps the worker, and the jobs it is running, visibly alive while a slow resume holds up progress updates
+    while not stop.wait(interval):
+        try:
+            job_queue.heartbeat_worker(worker_id)
+            for job_id in list(running):
+                job_queue.update(job_id)
+        except Exception as e:
+            logger.warning(f"Worker heartbeat failed: {e}")
+
+def _worker_id():
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+def work(args):
+    api_config, processing_config = load_config(args.config)
+    configure_api(api_config)
+    job_queue = get_job_queue(processing_config['jobs_db_path'], processing_config['jobs_spool_dir'],
+                              processing_config['jobs_stale_after_seconds'])
+    results_store = get_results_store(processing_config['results_db_path'])
+    worker_id = _worker_id()
+    # Job id -> thread; each job runs on its own thread, so sessions are screened side by side and share
+    # this process's rate governor, which queues their requests fairly
+    running = {}
+    stop = threading.Event()
+    job_queue.heartbeat_worker(worker_id)
+    heartbeat = threading.Thread(target=_heartbeat, daemon=True, args=(
+        job_queue, worker_id, running, stop, max(1, processing_config['jobs_stale_after_seconds'] / 4)))
+    heartbeat.start()
+    logger.info(f"Worker {worker_id} waiting for jobs in {job_queue.db_path} "
+                f"(up to {processing_config['jobs_max_parallel']} at a time)")
+    idle_since = time.time()
+    try:
+        while True:
+            for job_id, thread in list(running.items()):
+                if not thread.is_alive():
+                    del running[job_id]
+            if running:
+                idle_since = time.time()
+            job = job_queue.claim(worker_id) if len(running) < processing_config['jobs_max_parallel'] else None
+            if job is None:
+                if not running and (args.once or (args.idle_exit and time.time() - idle_since > args.idle_exit)):
+                    break
+                time.sleep(processing_config['jobs_poll_seconds'])
+                continue
+            running[job['id']] = threading.Thread(target=run_job, name=f"job-{job['id']}", daemon=True,
+                                                  args=(job, job_queue, results_store, api_config, processing_config))
+            running[job['id']].start()
+    except KeyboardInterrupt:
+        logger.info(f"Worker {worker_id} interrupted")
+    finally:
+        stop.set()
+        job_queue.remove_worker(worker_id)
+    logger.info(f"Worker {worker_id} stopped")
+    return 0
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m src.cli", description="Headless batch resume screening")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    screen_parser = subparsers.add_parser("screen", help="Screen every resume in a directory against one job description")
+    screen_parser.add_argument("--dir", required=True, help="Directory containing resumes")
+    screen_parser.add_argument("--jd", required=True, nargs='+',
+                               help="Job description key(s), e.g. 'DESE Developer'; several keys score each resume against all of them in one request")
+    screen_parser.add_argument("--output", default="resume_analysis.csv", help="Output file (.csv or .parquet)")
+    screen_parser.add_argument("--journal", help="Checkpoint journal path (default: <output>.journal.jsonl)")
+    screen_parser.add_argument("--shard", type=parse_shard, help="Process only shard i of n (zero-based), e.g. 0/4")
+    screen_parser.add_argument("--recursive", action="store_true", help="Include resumes in subdirectories")
+    screen_parser.add_argument("--concurrency", type=int, help="Override [API] max_concurrency")
+    screen_parser.add_argument("--no-cache", action="store_true", help="Bypass the analysis cache")
+    screen_parser.add_argument("--min-coverage", type=float, help="Skip resumes below this JD skill coverage (0-1)")
+    screen_parser.add_argument("--top-k", type=int, help="Send only the K best skill-matched resumes to the API")
+    screen_parser.add_argument("--dedupe-threshold", type=float,
+                               help="Near-duplicate similarity (0-1) above which resumes reuse one analysis")
+    screen_parser.add_argument("--no-dedupe", action="store_true", help="Analyze every resume even if it duplicates another")
+    screen_parser.add_argument("--pack", type=int,
+                               help="Send up to N short resumes per request (overrides [PACKING]; single JD, no streaming)")
+    screen_parser.add_argument("--no-pack", action="store_true", help="Send every resume in its own request")
+    screen_parser.add_argument("--hedge-percentile", type=float,
+                               help="Resend requests slower than this latency percentile (0-1) of the batch so far")
+    screen_parser.add_argument("--deadline", type=float,
+                               help="Seconds after which the remaining requests are hedged from the median latency")
+    screen_parser.add_argument("--no-hedge", action="store_true", help="Never send duplicate requests")
+    screen_parser.add_argument("--stream", action="store_true", help="Stream API replies (overrides [API] streaming)")
+    screen_parser.add_argument("--early-stop-score", type=float,
+                               help="Stream replies and stop generating once the score is known to be below this (0-10)")
+    screen_parser.add_argument("--metrics-out", help="Write stage timings and counters here (.json, otherwise Prometheus text)")
+    screen_parser.add_argument("--flush-every", type=int, default=50, help="Rows between Parquet rewrites")
+    screen_parser.add_argument("--config", default="config/config.ini", help="Path to config.ini")
+    screen_parser.set_defaults(func=screen)
+
+    worker_parser = subparsers.add_parser("worker", help="Run queued UI batches in the background")
+    worker_parser.add_argument("--once", action="store_true", help="Exit when the queue is empty")
+    worker_parser.add_argument("--idle-exit", type=float, default=0, help="Exit after this many idle seconds (0 = never)")
+    worker_parser.add_argument("--config", default="config/config.ini", help="Path to config.ini")
+    worker_parser.set_defaults(func=work)
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    logging_config = load_logging_config(args.config)
+    # Each worker and headless run logs to its own file, so no two processes ever rotate the same one
+    log_file = logging_config['worker_log_file'] if args.command == 'worker' else logging_config['screen_log_file']
+    setup_process_logging(logging_config, log_file)
+    return args.func(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
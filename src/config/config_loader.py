@@ -17,17 +17,89 @@ def load_config(config_path='config/config.ini'):
         'model_kwargs': {
             "maxTokens": int(config['API']['max_tokens']),
             "temperature": float(config['API']['temperature']),
-            "streaming": False,
-            "top_p": float(config['API']['top_p'])
+            "streaming": config['API'].getboolean('streaming', False),
+            "early_stop_score": float(config['API'].get('early_stop_score', 0)),
+            "top_p": float(config['API']['top_p']),
+            "structured_output": config['API'].getboolean('structured_output', False),
+            "resume_token_budget": int(config['API'].get('resume_token_budget', 250))
         },
-        'request_delay': float(config['API']['request_delay']) / 2
+        'request_delay': float(config['API']['request_delay']) / 2,
+        'max_concurrency': int(config['API'].get('max_concurrency', 1)),
+        'pool_size': int(config['API'].get('pool_size', 10)),
+        'max_retries': int(config['API'].get('max_retries', 3)),
+        'backoff_base': float(config['API'].get('backoff_base', 1)),
+        'backoff_max': float(config['API'].get('backoff_max', 30)),
+        'circuit_failure_threshold': int(config['API'].get('circuit_failure_threshold', 5)),
+        'circuit_reset_seconds': float(config['API'].get('circuit_reset_seconds', 30)),
+        'requests_per_minute': config.getfloat('RATE_LIMIT', 'requests_per_minute', fallback=0),
+        'tokens_per_minute': config.getfloat('RATE_LIMIT', 'tokens_per_minute', fallback=0),
+        'latency_target_seconds': config.getfloat('RATE_LIMIT', 'latency_target_seconds', fallback=0) or None,
+        # Workers and headless runs share one budget for the API key; in-memory buckets would each get the full rate
+        'rate_limit_state_file': config.get('RATE_LIMIT', 'shared_state_file', fallback='') or str(
+            Path(config.get('JOBS', 'db_path', fallback='results/jobs.sqlite3')).parent / 'rate_limit.sqlite3'),
+        'hedge_enabled': config.getboolean('HEDGING', 'enabled', fallback=False),
+        'hedge_percentile': config.getfloat('HEDGING', 'percentile', fallback=0.95),
+        'hedge_max_extra_fraction': config.getfloat('HEDGING', 'max_extra_fraction', fallback=0.05),
+        'hedge_late_max_extra_fraction': config.getfloat('HEDGING', 'late_max_extra_fraction', fallback=0.15),
+        'hedge_min_samples': config.getint('HEDGING', 'min_samples', fallback=10),
+        'deadline_seconds': config.getfloat('HEDGING', 'deadline_seconds', fallback=0) or None
     }
     
     # Processing settings
     processing_config = {
         'supported_extensions': config['PROCESSING']['supported_extensions'].split(','),
         'max_file_size_mb': float(config['PROCESSING']['max_file_size_mb']),
-        'output_excel': config['PROCESSING'].get('output_excel', 'resume_analysis.xlsx')
+        'max_extract_chars': int(config['PROCESSING'].get('max_extract_chars', 0)) or None,
+        'extract_workers': int(config['PROCESSING'].get('extract_workers', 0)),
+        'extract_queue_size': int(config['PROCESSING'].get('extract_queue_size', 8)),
+        'output_excel': config['PROCESSING'].get('output_excel', 'resume_analysis.xlsx'),
+        'cache_enabled': config.getboolean('CACHE', 'enabled', fallback=True),
+        'cache_dir': config.get('CACHE', 'cache_dir', fallback='cache'),
+        'cache_max_size_mb': config.getfloat('CACHE', 'max_size_mb', fallback=200),
+        'cache_max_age_days': config.getfloat('CACHE', 'max_age_days', fallback=30),
+        'results_db_path': config.get('RESULTS', 'db_path', fallback='results/results.sqlite3'),
+        'results_page_size': config.getint('RESULTS', 'page_size', fallback=50),
+        'log_file': config.get('LOGGING', 'log_file', fallback='logs/resume_processor.log'),
+        'worker_log_file': config.get('LOGGING', 'worker_log_file', fallback='logs/worker.log'),
+        'jobs_db_path': config.get('JOBS', 'db_path', fallback='results/jobs.sqlite3'),
+        'jobs_spool_dir': config.get('JOBS', 'spool_dir', fallback='results/spool'),
+        'jobs_poll_seconds': config.getfloat('JOBS', 'poll_seconds', fallback=2),
+        'jobs_stale_after_seconds': config.getfloat('JOBS', 'stale_after_seconds', fallback=120),
+        'jobs_autostart_worker': config.getboolean('JOBS', 'autostart_worker', fallback=True),
+        'jobs_max_parallel': config.getint('JOBS', 'max_parallel_jobs', fallback=4),
+        'dedupe_enabled': config.getboolean('DEDUPLICATION', 'enabled', fallback=False),
+        'dedupe_threshold': config.getfloat('DEDUPLICATION', 'similarity_threshold', fallback=0.8),
+        'dedupe_shingle_size': config.getint('DEDUPLICATION', 'shingle_size', fallback=3),
+        'pack_enabled': config.getboolean('PACKING', 'enabled', fallback=False),
+        'pack_max_resumes': config.getint('PACKING', 'max_resumes', fallback=4),
+        'pack_max_resume_tokens': config.getint('PACKING', 'max_resume_tokens', fallback=300),
+        'prescreen_enabled': config.getboolean('PRESCREEN', 'enabled', fallback=False),
+        'prescreen_min_coverage': config.getfloat('PRESCREEN', 'min_coverage', fallback=0.0),
+        'prescreen_top_k': config.getint('PRESCREEN', 'top_k', fallback=0)
     }
     
-    return api_config, processing_config
\ No newline at end of file
+    return api_config, processing_config
+
+def load_logging_config(config_path='config/config.ini'):
+    config = ConfigParser()
+    config.read(config_path)
+    module_levels = {}
+    for entry in config.get('LOGGING', 'module_levels', fallback='').split(','):
+        name, _, level = entry.partition('=')
+        if name.strip() and level.strip():
+            module_levels[name.strip()] = level.strip().upper()
+    return {
+        'log_file': config.get('LOGGING', 'log_file', fallback='logs/resume_processor.log'),
+        'worker_log_file': config.get('LOGGING', 'worker_log_file', fallback='logs/worker.log'),
+        'screen_log_file': config.get('LOGGING', 'screen_log_file', fallback='logs/screen.log'),
+        'benchmark_log_file': config.get('LOGGING', 'benchmark_log_file', fallback='logs/benchmark.log'),
+        'keep_process_logs': config.getint('LOGGING', 'keep_process_logs', fallback=10),
+        'log_level': config.get('LOGGING', 'log_level', fallback='INFO').upper(),
+        'console_level': config.get('LOGGING', 'console_level', fallback='INFO').upper(),
+        'module_levels': module_levels,
+        'max_size_mb': config.getfloat('LOGGING', 'max_size_mb', fallback=10),
+        'backup_count': config.getint('LOGGING', 'backup_count', fallback=5),
+        'max_message_chars': config.getint('LOGGING', 'max_message_chars', fallback=2000),
+        'payload_sample_rate': config.getfloat('LOGGING', 'payload_sample_rate', fallback=0.05),
+        'max_payload_chars': config.getint('LOGGING', 'max_payload_chars', fallback=300)
+    }
\ No newline at end of file
@@ -3,19 +3,32 @@ from pathlib import Path
 sys.path.append(str(Path(__file__).parent.parent))  # Adds C:\stealth\Resume_Screener to sys.path
 
 from src.utils.logger import setup_logging
-from src.config.config_loader import load_config
+from src.config.config_loader import load_config, load_logging_config
 from src.models.job_descriptions import JOB_DESCRIPTIONS
 from src.ui.app import run_ui
-from src.api.client import test_api_connectivity, analyze_resume
+from src.api.rate_limiter import configure_rate_governor
+from src.api.client import configure_http_client, test_api_connectivity, analyze_resume
 from src.processing.file_reader import read_resume_file
-from src.processing.resume_processor import process_resumes
 
 if __name__ == "__main__":
-    setup_logging()
+    setup_logging(load_logging_config())
     api_config, processing_config = load_config()
+    configure_http_client(
+        pool_size=api_config['pool_size'],
+        max_retries=api_config['max_retries'],
+        backoff_base=api_config['backoff_base'],
+        backoff_max=api_config['backoff_max'],
+        circuit_failure_threshold=api_config['circuit_failure_threshold'],
+        circuit_reset_seconds=api_config['circuit_reset_seconds']
+    )
+    configure_rate_governor(
+        requests_per_minute=api_config['requests_per_minute'],
+        tokens_per_minute=api_config['tokens_per_minute'],
+        latency_target_seconds=api_config['latency_target_seconds'],
+        shared_state_file=api_config['rate_limit_state_file']
+    )
     run_ui(
         JOB_DESCRIPTIONS,
-        process_resumes,
         test_api_connectivity,
         api_config,
         processing_config
@@ -0,0 +1,103 @@
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import zipfile
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+SPILL_CHUNK_SIZE = 1024 * 1024
+
+def _member_problem(info, supported_extensions, max_file_size_mb):
+    # Decided from the central directory alone, before any member is decompressed
+    name = info.filename
+    base_name = Path(name).name
+    if info.is_dir():
+        return None, False
+    if name.startswith('__MACOSX/') or base_name.startswith('._'):
+        return None, False
+    if Path(base_name).suffix.lower() not in supported_extensions:
+        return f"{name}: unsupported format", True
+    if info.flag_bits & 0x1:
+        return f"{name}: encrypted", True
+    size_mb = info.file_size / (1024 * 1024)
+    if size_mb > max_file_size_mb:
+        return f"{name}: exceeds max size ({size_mb:.2f}MB > {max_file_size_mb}MB)", True
+    return None, True
+
+def _scan_infos(infos, supported_extensions, max_file_size_mb):
+    supported_extensions = [ext.strip().lower() for ext in supported_extensions]
+    members = []
+    skipped = []
+    for info in infos:
+        problem, relevant = _member_problem(info, supported_extensions, max_file_size_mb)
+        if problem:
+            skipped.append(problem)
+        elif relevant:
+            members.append(info)
+    return members, skipped
+
+def scan_archive(source, supported_extensions, max_file_size_mb):
+    # Returns (ZipInfo entries worth extracting, human-readable reasons for the ones skipped)
+    with zipfile.ZipFile(source) as archive:
+        return _scan_infos(archive.infolist(), supported_extensions, max_file_size_mb)
+
+class ArchiveMember:
+    # Looks like an uploaded file to iter_resumes; bytes are only decompressed when the extractor asks for them
+    def __init__(self, archive, info):
+        self._archive = archive
+        self._info = info
+        self.name = info.filename
+        self.size = info.file_size
+
+    def read(self):
+        return self._archive.read_member(self._info)
+
+class ResumeArchive:
+    # A ZIP upload spilled to a temporary file so members can be read one at a time. A ZIP already on disk
+    # (e.g. spooled by the job queue) is passed as a path and read in place
+    def __init__(self, uploaded_file, supported_extensions, max_file_size_mb, name=None):
+        self.max_file_size_mb = max_file_size_mb
+        self._owns_spill = not isinstance(uploaded_file, (str, os.PathLike))
+        if self._owns_spill:
+            self.name = Path(name or uploaded_file.name).name
+            handle, self.spill_path = tempfile.mkstemp(suffix='.zip', prefix='resumes_')
+            with os.fdopen(handle, 'wb') as spill:
+                uploaded_file.seek(0)
+                shutil.copyfileobj(uploaded_file, spill, SPILL_CHUNK_SIZE)
+        else:
+            self.name = Path(name or uploaded_file).name
+            self.spill_path = os.fspath(uploaded_file)
+        self._lock = threading.Lock()
+        try:
+            self._zip = zipfile.ZipFile(self.spill_path)
+            infos, self.skipped = _scan_infos(self._zip.infolist(), supported_extensions, max_file_size_mb)
+        except Exception:
+            self.close()
+            raise
+        self.members = [ArchiveMember(self, info) for info in infos]
+        logger.info(f"Archive {self.name}: {len(self.members)} resumes, {len(self.skipped)} members skipped")
+
+    def read_member(self, info):
+        # Stop at the size limit even if the central directory under-reports the uncompressed size
+        limit = int(self.max_file_size_mb * 1024 * 1024)
+        with self._lock, self._zip.open(info) as member:
+            data = member.read(limit + 1)
+        if len(data) > limit:
+            raise ValueError(f"{info.filename} decompresses beyond the {self.max_file_size_mb}MB limit")
+        return data
+
+    def close(self):
+        if getattr(self, '_zip', None) is not None:
+            self._zip.close()
+            self._zip = None
+        if self._owns_spill and os.path.exists(self.spill_path):
+            os.remove(self.spill_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,43 @@
+import csv
+import io
+import logging
+import time
+
+import xlsxwriter
+
+from src.utils.metrics import get_metrics
+
+logger = logging.getLogger(__name__)
+
+def export_columns(rows, exclude=()):
+    # Union of keys in first-seen order; multi-JD runs add per-JD score columns to some rows only
+    columns = {}
+    for row in rows:
+        for key in row:
+            if key not in exclude:
+                columns.setdefault(key, None)
+    return list(columns)
+
+def write_csv(rows, columns):
+    with get_metrics().timer("export_seconds", format="csv"):
+        output = io.StringIO()
+        writer = csv.DictWriter(output, fieldnames=columns, extrasaction='ignore')
+        writer.writeheader()
+        writer.writerows(rows)
+        return output.getvalue().encode('utf-8')
+
+def write_excel(rows, columns, sheet_name='Resume Analysis'):
+    # constant_memory flushes each row to a temp file as soon as the next one starts,
+    # so rows must be written strictly top to bottom
+    started = time.perf_counter()
+    output = io.BytesIO()
+    workbook = xlsxwriter.Workbook(output, {'constant_memory': True, 'strings_to_urls': False})
+    worksheet = workbook.add_worksheet(sheet_name)
+    worksheet.write_row(0, 0, columns)
+    row_count = 0
+    for row_count, row in enumerate(rows, start=1):
+        worksheet.write_row(row_count, 0, [row.get(column) for column in columns])
+    workbook.close()
+    get_metrics().observe("export_seconds", time.perf_counter() - started, format="xlsx")
+    logger.info(f"Built Excel export with {row_count} rows ({output.tell() / 1024:.0f} KB)")
+    return output.getvalue()
@@ -1,42 +1,85 @@
 from pathlib import Path
+import codecs
+import io
 import logging
+import os
 import pdfplumber
 from docx import Document
 
+from src.utils.logger import log_payload
+
 logger = logging.getLogger(__name__)
 
-def read_resume_file(file_path, max_file_size_mb):
-    file_path = Path(file_path)
-    suffix = file_path.suffix.lower()
-    file_size_mb = file_path.stat().st_size / (1024 * 1024)
+def _join_within_budget(chunks, max_chars):
+    # Pull chunks lazily and stop as soon as the character budget is covered
+    collected = []
+    total = 0
+    for chunk in chunks:
+        if not chunk:
+            continue
+        collected.append(chunk)
+        total += len(chunk) + 1
+        if max_chars and total >= max_chars:
+            break
+    text = "\n".join(collected)
+    return text[:max_chars] if max_chars else text
+
+def _open_source(source, file_name):
+    # Returns (binary stream or path, suffix, size in bytes, label) without copying in-memory data
+    if isinstance(source, (str, os.PathLike)):
+        path = Path(source)
+        return path, path.suffix.lower(), path.stat().st_size, str(path)
+    label = file_name or getattr(source, 'name', None) or '<memory>'
+    suffix = Path(label).suffix.lower()
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        stream = io.BytesIO(source)
+        return stream, suffix, memoryview(source).nbytes, label
+    position = source.tell()
+    size = source.seek(0, io.SEEK_END) - position
+    source.seek(position)
+    return source, suffix, size, label
+
+def _read_text(source, max_chars):
+    if isinstance(source, Path):
+        with open(source, 'r', encoding='utf-8') as file:
+            return file.read(max_chars) if max_chars else file.read()
+    # UTF-8 needs at most 4 bytes per character; the incremental decoder copes with a cut multi-byte sequence
+    raw = source.read(max_chars * 4) if max_chars else source.read()
+    text = codecs.getincrementaldecoder('utf-8')().decode(raw, final=not max_chars)
+    return text[:max_chars] if max_chars else text
+
+def read_resume_file(source, max_file_size_mb, max_chars=None, file_name=None):
+    # source may be a path, raw bytes/memoryview or a binary file-like object (file_name supplies the extension)
+    source, suffix, file_size, label = _open_source(source, file_name)
+    file_size_mb = file_size / (1024 * 1024)
     if file_size_mb > max_file_size_mb:
-        logger.warning(f"File {file_path} exceeds max size ({file_size_mb:.2f}MB > {max_file_size_mb}MB).")
+        logger.warning(f"File {label} exceeds max size ({file_size_mb:.2f}MB > {max_file_size_mb}MB).")
         return None
 
     if suffix == '.txt':
         try:
-            with open(file_path, 'r', encoding='utf-8') as file:
-                return file.read() if file.read().strip() else None
+            text = _read_text(source, max_chars)
+            return text if text.strip() else None
         except Exception as e:
-            logger.error(f"Error reading TXT {file_path}: {e}")
+            logger.error(f"Error reading TXT {label}: {e}")
             return None
     elif suffix == '.pdf':
         try:
-            with pdfplumber.open(file_path) as pdf:
-                text = "\n".join([page.extract_text() or "" for page in pdf.pages])
-                logger.debug(f"Extracted PDF text sample: {text[:500]}")
+            with pdfplumber.open(source) as pdf:
+                text = _join_within_budget((page.extract_text() for page in pdf.pages), max_chars)
+                log_payload(logger, "Extracted PDF text sample", text)
                 return text if text.strip() else None
         except Exception as e:
-            logger.error(f"Error reading PDF {file_path}: {e}")
+            logger.error(f"Error reading PDF {label}: {e}")
             return None
     elif suffix == '.docx':
         try:
-            doc = Document(file_path)
-            text = "\n".join([para.text for para in doc.paragraphs if para.text.strip()])
-            logger.debug(f"Extracted DOCX text sample: {text[:500]}")
+            doc = Document(source)
+            text = _join_within_budget((para.text for para in doc.paragraphs if para.text.strip()), max_chars)
+            log_payload(logger, "Extracted DOCX text sample", text)
             return text if text.strip() else None
         except Exception as e:
-            logger.error(f"Error reading DOCX {file_path}: {e}")
+            logger.error(f"Error reading DOCX {label}: {e}")
             return None
-    logger.warning(f"Unsupported file format: {file_path}")
+    logger.warning(f"Unsupported file format: {label}")
     return None
\ No newline at end of file
@@ -0,0 +1,256 @@
+import json
+import logging
+import os
+import shutil
+import socket
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from contextlib import closing
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+SPOOL_CHUNK_SIZE = 1024 * 1024
+ACTIVE_STATES = ("queued", "running", "cancelling")
+FINAL_STATES = ("done", "failed", "cancelled")
+# A job whose worker stopped heartbeating is requeued this many times before it is marked failed
+MAX_ATTEMPTS = 3
+
+_queues = {}
+_queues_lock = threading.Lock()
+
+def _job(row):
+    if row is None:
+        return None
+    job = dict(row)
+    job["params"] = json.loads(job["params"])
+    job["progress"] = json.loads(job["progress"]) if job["progress"] else {}
+    job["metrics"] = json.loads(job["metrics"]) if job["metrics"] else None
+    return job
+
+class JobQueue:
+    # Batches submitted by the UI, persisted in SQLite and drained by `python -m src.cli worker` processes
+    def __init__(self, db_path, spool_dir, stale_after_seconds=120):
+        self.db_path = Path(db_path)
+        self.spool_dir = Path(spool_dir)
+        self.stale_after_seconds = stale_after_seconds
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.spool_dir.mkdir(parents=True, exist_ok=True)
+        with closing(self._connect()) as conn, conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "id TEXT PRIMARY KEY, session_id TEXT, status TEXT NOT NULL, params TEXT NOT NULL, "
+                "created_at REAL NOT NULL, started_at REAL, finished_at REAL, heartbeat_at REAL, worker_id TEXT, "
+                "attempts INTEGER NOT NULL DEFAULT 0, total INTEGER NOT NULL DEFAULT 0, "
+                "processed INTEGER NOT NULL DEFAULT 0, analyzed INTEGER NOT NULL DEFAULT 0, "
+                "failed INTEGER NOT NULL DEFAULT 0, skipped INTEGER NOT NULL DEFAULT 0, "
+                "duplicates INTEGER NOT NULL DEFAULT 0, progress TEXT, metrics TEXT, metrics_prom TEXT, error TEXT)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS job_files ("
+                "job_id TEXT NOT NULL, position INTEGER NOT NULL, name TEXT NOT NULL, path TEXT NOT NULL, "
+                "PRIMARY KEY (job_id, position))"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS workers ("
+                "id TEXT PRIMARY KEY, pid INTEGER, host TEXT, started_at REAL NOT NULL, heartbeat_at REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS worker_starts (id INTEGER PRIMARY KEY CHECK (id = 1), started_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, created_at)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_session ON jobs (session_id, created_at)")
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def submit(self, uploads, params, session_id=None):
+        # Uploads are copied into the spool so the job no longer depends on the browser session that sent them
+        job_id = uuid.uuid4().hex
+        job_dir = self.spool_dir / job_id
+        job_dir.mkdir(parents=True)
+        files = []
+        try:
+            for position, upload in enumerate(uploads):
+                name = Path(upload.name).name
+                path = job_dir / f"{position:05d}{Path(name).suffix.lower()}"
+                upload.seek(0)
+                with open(path, 'wb') as spooled:
+                    shutil.copyfileobj(upload, spooled, SPOOL_CHUNK_SIZE)
+                files.append((job_id, position, name, str(path)))
+            with closing(self._connect()) as conn, conn:
+                conn.execute(
+                    "INSERT INTO jobs (id, session_id, status, params, created_at, total) VALUES (?, ?, 'queued', ?, ?, ?)",
+                    (job_id, session_id, json.dumps(params), time.time(), len(files))
+                )
+                conn.executemany("INSERT INTO job_files (job_id, position, name, path) VALUES (?, ?, ?, ?)", files)
+        except Exception:
+            shutil.rmtree(job_dir, ignore_errors=True)
+            raise
+        logger.info(f"Queued job {job_id} with {len(files)} uploads")
+        return job_id
+
+    def claim(self, worker_id):
+        # Atomically takes the next queued job; jobs of workers that stopped heartbeating go back in the queue first
+        now = time.time()
+        conn = self._connect()
+        conn.isolation_level = None
+        with closing(conn):
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                stale = conn.execute(
+                    "SELECT id, status, attempts FROM jobs WHERE status IN ('running', 'cancelling') AND heartbeat_at < ?",
+                    (now - self.stale_after_seconds,)
+                ).fetchall()
+                for job_id, status, attempts in stale:
+                    if status == "cancelling":
+                        conn.execute("UPDATE jobs SET status = 'cancelled', finished_at = ? WHERE id = ?", (now, job_id))
+                    elif attempts >= MAX_ATTEMPTS:
+                        conn.execute("UPDATE jobs SET status = 'failed', finished_at = ?, error = ? WHERE id = ?",
+                                     (now, f"Worker stopped responding {attempts} times", job_id))
+                    else:
+                        logger.warning(f"Requeueing job {job_id}: its worker stopped responding")
+                        conn.execute("UPDATE jobs SET status = 'queued', worker_id = NULL WHERE id = ?", (job_id,))
+                # Sessions with nothing running go first, so one recruiter's backlog cannot hold up another's batch
+                row = conn.execute(
+                    "SELECT id FROM jobs WHERE status = 'queued' ORDER BY EXISTS (SELECT 1 FROM jobs AS other "
+                    "WHERE other.session_id = jobs.session_id AND other.status IN ('running', 'cancelling')), created_at "
+                    "LIMIT 1"
+                ).fetchone()
+                if row:
+                    conn.execute(
+                        "UPDATE jobs SET status = 'running', worker_id = ?, started_at = ?, heartbeat_at = ?, "
+                        "attempts = attempts + 1 WHERE id = ?",
+                        (worker_id, now, now, row["id"])
+                    )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        for job_id, _, _ in stale:
+            if self.get(job_id)["status"] in FINAL_STATES:
+                self._remove_spool(job_id)
+        return self.get(row["id"]) if row else None
+
+    def files(self, job_id):
+        with closing(self._connect()) as conn:
+            return [(row["name"], Path(row["path"])) for row in
+                    conn.execute("SELECT name, path FROM job_files WHERE job_id = ? ORDER BY position", (job_id,))]
+
+    def update(self, job_id, progress=None, metrics=None, metrics_prom=None, **counts):
+        # Records progress and doubles as the job heartbeat; returns the current status so workers notice cancellation
+        assignments = ["heartbeat_at = ?"]
+        params = [time.time()]
+        for column in ("total", "processed", "analyzed", "failed", "skipped", "duplicates"):
+            if column in counts:
+                assignments.append(f"{column} = ?")
+                params.append(counts[column])
+        if progress is not None:
+            assignments.append("progress = ?")
+            params.append(json.dumps(progress))
+        if metrics is not None:
+            assignments += ["metrics = ?", "metrics_prom = ?"]
+            params += [json.dumps(metrics), metrics_prom]
+        with closing(self._connect()) as conn, conn:
+            conn.execute(f"UPDATE jobs SET {', '.join(assignments)} WHERE id = ?", params + [job_id])
+            row = conn.execute("SELECT status FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return row["status"] if row else None
+
+    def finish(self, job_id, status, error=None):
+        with closing(self._connect()) as conn, conn:
+            conn.execute("UPDATE jobs SET status = ?, finished_at = ?, error = ? WHERE id = ?",
+                         (status, time.time(), error, job_id))
+        self._remove_spool(job_id)
+        logger.info(f"Job {job_id} {status}{f': {error}' if error else ''}")
+
+    def cancel(self, job_id):
+        # Queued jobs are cancelled at once; running ones are stopped by their worker at the next progress update
+        with closing(self._connect()) as conn, conn:
+            conn.execute("UPDATE jobs SET status = 'cancelled', finished_at = ? WHERE id = ? AND status = 'queued'",
+                         (time.time(), job_id))
+            conn.execute("UPDATE jobs SET status = 'cancelling' WHERE id = ? AND status = 'running'", (job_id,))
+            status = conn.execute("SELECT status FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if status and status["status"] == "cancelled":
+            self._remove_spool(job_id)
+
+    def _remove_spool(self, job_id):
+        shutil.rmtree(self.spool_dir / job_id, ignore_errors=True)
+
+    def get(self, job_id):
+        with closing(self._connect()) as conn:
+            return _job(conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone())
+
+    def jobs(self, session_id=None, limit=10):
+        sql = "SELECT * FROM jobs"
+        params = []
+        if session_id:
+            sql += " WHERE session_id = ?"
+            params.append(session_id)
+        with closing(self._connect()) as conn:
+            return [_job(row) for row in conn.execute(sql + " ORDER BY created_at DESC LIMIT ?", params + [limit])]
+
+    def heartbeat_worker(self, worker_id):
+        now = time.time()
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "INSERT INTO workers (id, pid, host, started_at, heartbeat_at) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(id) DO UPDATE SET heartbeat_at = excluded.heartbeat_at",
+                (worker_id, os.getpid(), socket.gethostname(), now, now)
+            )
+
+    def remove_worker(self, worker_id):
+        with closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM workers WHERE id = ?", (worker_id,))
+
+    def active_workers(self):
+        with closing(self._connect()) as conn:
+            return conn.execute("SELECT COUNT(*) FROM workers WHERE heartbeat_at >= ?",
+                                (time.time() - self.stale_after_seconds,)).fetchone()[0]
+
+    def reserve_worker_start(self):
+        # True for a single caller while no worker is heartbeating; the reservation holds for stale_after_seconds,
+        # which gives the started worker time to register before anyone else may start another
+        now = time.time()
+        conn = self._connect()
+        conn.isolation_level = None
+        with closing(conn):
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                active = conn.execute("SELECT COUNT(*) FROM workers WHERE heartbeat_at >= ?",
+                                      (now - self.stale_after_seconds,)).fetchone()[0]
+                last = conn.execute("SELECT started_at FROM worker_starts WHERE id = 1").fetchone()
+                reserved = not active and (last is None or last[0] < now - self.stale_after_seconds)
+                if reserved:
+                    conn.execute("INSERT OR REPLACE INTO worker_starts (id, started_at) VALUES (1, ?)", (now,))
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        return reserved
+
+def start_worker(config_path=None, idle_exit_seconds=600):
+    # Detached so the worker outlives Streamlit reruns; it exits by itself after idle_exit_seconds without jobs
+    command = [sys.executable, "-m", "src.cli", "worker", "--idle-exit", str(idle_exit_seconds)]
+    if config_path:
+        command += ["--config", str(config_path)]
+    project_root = str(Path(__file__).resolve().parents[2])
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [project_root, os.environ.get("PYTHONPATH")])))
+    process = subprocess.Popen(command, cwd=os.getcwd(), env=env, stdin=subprocess.DEVNULL,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True,
+                               creationflags=getattr(subprocess, "CREATE_NO_WINDOW", 0))
+    logger.info(f"Started background worker (pid {process.pid})")
+    return process.pid
+
+def get_job_queue(db_path, spool_dir, stale_after_seconds=120):
+    with _queues_lock:
+        key = str(Path(db_path).resolve())
+        if key not in _queues:
+            _queues[key] = JobQueue(db_path, spool_dir, stale_after_seconds)
+        return _queues[key]
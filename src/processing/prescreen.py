@@ -0,0 +1,142 @@
+import re
+import logging
+from functools import lru_cache
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Requirement items that describe degrees or experience rather than skills
+_NON_SKILL_PATTERN = re.compile(r"\b(years?|exp|bachelor'?s?|bs|ms|bs/ms|degree)\b", re.IGNORECASE)
+_VERSION_PATTERN = re.compile(r"\s*\d+(\.\d+)*\+?$")
+
+# Canonical alias -> extra spellings that should count as the same skill
+SKILL_SYNONYMS = {
+    "js": ["javascript", "ecmascript"],
+    "typescript": ["ts"],
+    "core java": ["java"],
+    "jdk": ["java"],
+    "j2ee": ["java ee", "jakarta ee", "jee"],
+    "restful apis": ["rest api", "rest apis", "restful", "rest services", "restful services"],
+    "rest apis": ["rest api", "restful apis", "restful"],
+    "ci/cd": ["cicd", "continuous integration", "continuous delivery", "continuous deployment"],
+    "aws": ["amazon web services"],
+    "azure": ["microsoft azure"],
+    "gitlab": ["git lab"],
+    "mongodb": ["mongo"],
+    "nosql": ["no sql"],
+    "mysql": ["my sql"],
+    "selenium webdriver": ["selenium", "webdriver"],
+    "no magic cameo": ["nomagic", "no magic", "cameo"],
+    "no magic software": ["nomagic", "no magic", "cameo"],
+    "nomagic": ["no magic"],
+    "mbse": ["model based systems engineering", "model-based systems engineering"],
+    "stlc": ["software testing life cycle"],
+    "sdlc": ["software development life cycle"],
+    "graph db": ["graph database", "neo4j", "aws neptune"],
+    "design patterns": ["design pattern"],
+    "microservices": ["microservice", "micro services"],
+    "end-to-end testing": ["e2e testing", "end to end testing"],
+    "api testing": ["api test", "api tests"],
+}
+
+def _split_alternatives(text):
+    # "Functional/Regression Testing" -> ["Functional Testing", "Regression Testing"]
+    parts = [part.strip() for part in text.split('/') if part.strip()]
+    if len(parts) > 1:
+        tail_words = parts[-1].split()
+        if len(tail_words) > 1 and all(len(part.split()) == 1 for part in parts[:-1]):
+            suffix = " ".join(tail_words[1:])
+            parts = [f"{part} {suffix}" for part in parts[:-1]] + [parts[-1]]
+    return parts
+
+def parse_jd_skills(requirements):
+    skills = []
+    # Split on commas that are not inside parentheses
+    for item in re.split(r",\s*(?![^()]*\))", requirements):
+        item = item.strip()
+        if not item or _NON_SKILL_PATTERN.search(item):
+            continue
+        match = re.match(r"^(.*?)\s*\((.*)\)\s*$", item)
+        main, extra = (match.group(1), match.group(2)) if match else (item, "")
+        aliases = [main] if main.lower() == "ci/cd" else _split_alternatives(main)
+        aliases += [alias for part in extra.split(',') for alias in _split_alternatives(part)]
+        normalized = []
+        for alias in aliases:
+            alias = _VERSION_PATTERN.sub("", alias).strip().lower()
+            if alias and alias not in normalized:
+                normalized.append(alias)
+        for alias in list(normalized):
+            normalized += [syn for syn in SKILL_SYNONYMS.get(alias, []) if syn not in normalized]
+        if normalized:
+            skills.append((item, normalized))
+    return skills
+
+def _alias_pattern(alias):
+    # Words may be joined by spaces, hyphens or nothing at all ("Spring Boot" == "SpringBoot" == "spring-boot")
+    words = [re.escape(word) for word in re.split(r"[\s\-_]+", alias) if word]
+    return r"[\s\-_]*".join(words)
+
+class SkillMatcher:
+    def __init__(self, requirements):
+        self.skills = parse_jd_skills(requirements)
+        self.labels = [label for label, _ in self.skills]
+        self._alias_to_skills = {}
+        for skill_index, (_, aliases) in enumerate(self.skills):
+            for alias in aliases:
+                key = re.sub(r"[\s\-_]+", "", alias)
+                self._alias_to_skills.setdefault(key, set()).add(skill_index)
+        # One alternation for every alias, longest first so "Spring Boot" wins over "Spring"
+        aliases = sorted({alias for _, skill_aliases in self.skills for alias in skill_aliases}, key=len, reverse=True)
+        self.pattern = re.compile(
+            r"(?<![\w+#])(" + "|".join(_alias_pattern(alias) for alias in aliases) + r")(?![\w+#])",
+            re.IGNORECASE
+        ) if aliases else None
+
+    def match(self, text):
+        found = set()
+        if not self.pattern or not text:
+            return found
+        for match in self.pattern.finditer(text):
+            found |= self._alias_to_skills.get(re.sub(r"[\s\-_]+", "", match.group(1).lower()), set())
+        return found
+
+@lru_cache(maxsize=32)
+def get_skill_matcher(requirements):
+    return SkillMatcher(requirements)
+
+def skill_matrix(resume_texts, matcher):
+    matrix = np.zeros((len(resume_texts), len(matcher.labels)), dtype=np.uint8)
+    for row, text in enumerate(resume_texts):
+        matched = list(matcher.match(text))
+        if matched:
+            matrix[row, matched] = 1
+    return matrix
+
+def coverage_scores(matrix):
+    if matrix.shape[1] == 0:
+        return np.ones(matrix.shape[0])
+    return matrix.mean(axis=1)
+
+def resume_coverage(resume_text, requirements):
+    # Coverage of a single resume, for batches screened as they stream in
+    return float(coverage_scores(skill_matrix([resume_text], get_skill_matcher(requirements)))[0])
+
+def select_for_analysis(scores, min_coverage=None, top_k=None):
+    selected = np.ones(len(scores), dtype=bool)
+    if min_coverage:
+        selected &= scores >= min_coverage
+    if top_k and top_k < selected.sum():
+        # Keep the K best-covered resumes among those that passed the threshold
+        ranked = np.argsort(-np.where(selected, scores, -1), kind="stable")
+        selected = np.zeros(len(scores), dtype=bool)
+        selected[ranked[:top_k]] = True
+    return selected
+
+def prescreen(resume_texts, requirements, min_coverage=None, top_k=None):
+    matcher = get_skill_matcher(requirements)
+    scores = coverage_scores(skill_matrix(resume_texts, matcher))
+    selected = select_for_analysis(scores, min_coverage, top_k)
+    logger.info(f"Skill pre-screen kept {int(selected.sum())}/{len(resume_texts)} resumes "
+                f"({len(matcher.labels)} JD skills, min coverage {min_coverage}, top-k {top_k})")
+    return scores, selected
@@ -0,0 +1,168 @@
+import json
+import logging
+import math
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from pathlib import Path
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+# UI sort option -> ORDER BY clause; NULL scores and experience always sort last
+SORT_ORDERS = {
+    "Fitment Score": "score IS NULL, score DESC, id",
+    "Years of Experience": "experience IS NULL, experience DESC, id",
+    "Candidate Name": "candidate_name COLLATE NOCASE, id",
+    "File Name": "file_name COLLATE NOCASE, id",
+    "Most Recent": "analyzed_at DESC, id",
+}
+
+# One row per uploaded file and JD; identical copies of a resume share resume_hash but keep their own rows
+_RESULTS_TABLE_SQL = (
+    "CREATE TABLE {if_not_exists}results ("
+    "id INTEGER PRIMARY KEY, resume_hash TEXT NOT NULL, jd TEXT NOT NULL, file_name TEXT NOT NULL DEFAULT '', "
+    "candidate_name TEXT, score REAL, experience REAL, run_id TEXT, session_id TEXT, "
+    "analyzed_at REAL NOT NULL, row TEXT NOT NULL, UNIQUE (resume_hash, jd, file_name))"
+)
+
+def _number(value):
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    return None if math.isnan(value) else value
+
+def _json_value(value):
+    # NaN is not valid JSON and pandas hands back NaN for missing numbers
+    return None if isinstance(value, float) and math.isnan(value) else value
+
+class ResultsStore:
+    def __init__(self, db_path):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        with closing(self._connect()) as conn, conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._migrate_unique_key(conn)
+            conn.execute(_RESULTS_TABLE_SQL.format(if_not_exists="IF NOT EXISTS "))
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_results_jd_score ON results (jd, score)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_results_jd_experience ON results (jd, experience)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_results_score ON results (score)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_results_experience ON results (experience)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_results_run ON results (run_id)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_results_analyzed ON results (analyzed_at)")
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def _migrate_unique_key(self, conn):
+        # Stores created before rows were keyed per uploaded file let an identical copy of a resume replace
+        # the row of the file it duplicates; rebuild them with the per-file key
+        table = conn.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'results'").fetchone()
+        if table is None or "UNIQUE (resume_hash, jd)" not in table[0]:
+            return
+        logger.info(f"Migrating {self.db_path} to one stored row per uploaded file")
+        conn.execute("ALTER TABLE results RENAME TO results_old")
+        conn.execute(_RESULTS_TABLE_SQL.format(if_not_exists=""))
+        conn.execute(
+            "INSERT INTO results (id, resume_hash, jd, file_name, candidate_name, score, experience, run_id, session_id, "
+            "analyzed_at, row) SELECT id, resume_hash, jd, COALESCE(file_name, ''), candidate_name, score, experience, "
+            "run_id, session_id, analyzed_at, row FROM results_old"
+        )
+        conn.execute("DROP TABLE results_old")
+
+    def save_results(self, results, run_id=None, session_id=None):
+        # results: iterable of (row dict, resume hash); re-screening a file against the same JD replaces its old row,
+        # while identical copies under other file names (near-duplicate fan-out) get rows of their own
+        now = time.time()
+        records = []
+        for row, resume_hash in results:
+            if not resume_hash:
+                continue
+            records.append((
+                resume_hash, row.get("JD Analyzed Against", ""), row.get("File Name") or "", row.get("Candidate Name"),
+                _number(row.get("Score_Numeric")), _number(row.get("Experience_Years")), run_id, session_id, now,
+                json.dumps({key: _json_value(value) for key, value in row.items()})
+            ))
+        try:
+            with closing(self._connect()) as conn, conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO results (resume_hash, jd, file_name, candidate_name, score, experience, "
+                    "run_id, session_id, analyzed_at, row) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    records
+                )
+        except sqlite3.Error as e:
+            logger.error(f"Results store write failed: {e}")
+            return 0
+        logger.info(f"Saved {len(records)} results to {self.db_path} (run {run_id})")
+        return len(records)
+
+    def _where(self, run_id=None, jd=None, min_score=None, min_experience=None, search=None):
+        clauses = []
+        params = []
+        if run_id:
+            clauses.append("run_id = ?")
+            params.append(run_id)
+        if jd:
+            clauses.append("jd = ?")
+            params.append(jd)
+        if min_score is not None:
+            clauses.append("score >= ?")
+            params.append(min_score)
+        if min_experience is not None:
+            clauses.append("experience >= ?")
+            params.append(min_experience)
+        if search:
+            clauses.append("(candidate_name LIKE ? ESCAPE '\\' OR file_name LIKE ? ESCAPE '\\')")
+            pattern = "%" + search.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+            params += [pattern, pattern]
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def count(self, **filters):
+        where, params = self._where(**filters)
+        with closing(self._connect()) as conn:
+            return conn.execute(f"SELECT COUNT(*) FROM results{where}", params).fetchone()[0]
+
+    def bounds(self, **filters):
+        # Ranges for the filter sliders, computed by the indexes rather than by loading rows
+        where, params = self._where(**filters)
+        with closing(self._connect()) as conn:
+            min_score, max_score, min_exp, max_exp = conn.execute(
+                f"SELECT MIN(score), MAX(score), MIN(experience), MAX(experience) FROM results{where}", params
+            ).fetchone()
+        return {"score": (min_score, max_score), "experience": (min_exp, max_exp)}
+
+    def job_descriptions(self):
+        with closing(self._connect()) as conn:
+            return [row[0] for row in conn.execute("SELECT DISTINCT jd FROM results ORDER BY jd")]
+
+    def version(self):
+        # Changes whenever rows are added or replaced; used to key memoized exports
+        with closing(self._connect()) as conn:
+            return conn.execute("SELECT COUNT(*), MAX(analyzed_at) FROM results").fetchone()
+
+    def iter_rows(self, sort="Fitment Score", limit=None, offset=0, **filters):
+        # Streams parsed rows straight from the cursor so large result sets are never held in memory at once
+        where, params = self._where(**filters)
+        sql = f"SELECT row FROM results{where} ORDER BY {SORT_ORDERS.get(sort, SORT_ORDERS['Fitment Score'])}"
+        if limit:
+            sql += " LIMIT ? OFFSET ?"
+            params = params + [limit, offset]
+        with closing(self._connect()) as conn:
+            for (row,) in conn.execute(sql, params):
+                yield json.loads(row)
+
+    def query(self, sort="Fitment Score", limit=None, offset=0, **filters):
+        return pd.DataFrame(list(self.iter_rows(sort, limit, offset, **filters)))
+
+def get_results_store(db_path):
+    with _stores_lock:
+        key = str(Path(db_path).resolve())
+        if key not in _stores:
+            _stores[key] = ResultsStore(db_path)
+        return _stores[key]
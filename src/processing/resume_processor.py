@@ -1,16 +1,92 @@
+import re
+import json
 import time
 import logging
 import pandas as pd
 from pathlib import Path
-import os
+import queue
+import threading
+import contextvars
+from collections import deque
+from concurrent.futures import CancelledError, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
 
-from src.api.client import analyze_resume
+from src.api.cache import make_cache_key, resume_text_hash
+from src.api.client import MODEL_ID, analyze_resume, analyze_resume_multi, analyze_resume_pack
+from src.api.hedging import HedgePolicy
+from src.api.prompt_builder import estimate_text_tokens
+from src.api.rate_limiter import get_rate_governor
 from src.processing.file_reader import read_resume_file
+from src.processing.prescreen import prescreen, resume_coverage
+from src.processing.near_duplicates import MinHashIndex
+from src.utils.logger import child_logging_initializer
+from src.utils.metrics import get_metrics
 
 logger = logging.getLogger(__name__)
 
-def parse_analysis_to_dict(analysis_text, jd_title):
-    default_result = {
+_EXTRACTION_DONE = object()
+# How often a blocked pipeline stage checks whether its batch was stopped
+_STOP_POLL_SECONDS = 0.2
+
+RESULT_COLUMNS = ["File Name", "Candidate Name", "Years of Experience", "JD Analyzed Against", 
+                  "Fitment Score", "Relevant Skills Matching JD", "Education Level", 
+                  "Most Recent Role", "Strengths", "Gaps/Weaknesses"]
+
+# Column order of results shown in the UI and its exports
+DISPLAY_COLUMNS = ["Candidate Name", "Years of Experience", "JD Analyzed Against", "Most Recent Role", "Fitment Score",
+                   "Relevant Skills Matching JD", "Strengths", "Gaps/Weaknesses", "Education Level", "File Name"]
+
+# Numeric columns derived once at parse time so the UI can filter and sort without regex work
+NUMERIC_COLUMNS = ["Score_Numeric", "Experience_Years"]
+
+_JD_BLOCK_PATTERN = re.compile(r"^[\s\-*#]*=+\s*JD:\s*(.+?)\s*=+[\s*#]*$", re.MULTILINE | re.IGNORECASE)
+_FIELD_PATTERN = re.compile(
+    r"^[\s\-*•#]*(Candidate Name|Years of Experience|Education Level|Relevant Skills[^:\n]*|Most Recent Role|"
+    r"Fitment Score|Strengths|Gaps/Weaknesses)[\s*]*:[\s*]*(.*?)[\s*]*$",
+    re.MULTILINE | re.IGNORECASE
+)
+# Values that are already complete in a JSON reply that is still streaming, or was cut short by an early stop
+_PARTIAL_JSON_PATTERN = re.compile(
+    r'"(candidate_name|years_of_experience|education_level|relevant_skills|most_recent_role|fitment_score|strengths|gaps)"'
+    r'\s*:\s*("(?:[^"\\]|\\.)*"|-?\d+(?:\.\d+)?(?=\s*[,}])|\[[^\]]*\])'
+)
+_JSON_START_PATTERN = re.compile(r"^\s*(?:```(?:json)?\s*)?\{")
+_SCORE_PATTERN = re.compile(r"(\d+(?:\.\d+)?)\s*(?:/\s*(\d+(?:\.\d+)?))?")
+_NUMBER_PATTERN = re.compile(r"(\d+(?:\.\d+)?)")
+
+_LABEL_FIELDS = {
+    "candidate name": "Candidate Name",
+    "years of experience": "Years of Experience",
+    "education level": "Education Level",
+    "relevant skills": "Relevant Skills Matching JD",
+    "most recent role": "Most Recent Role",
+    "fitment score": "Fitment Score",
+    "strengths": "Strengths",
+    "gaps/weaknesses": "Gaps/Weaknesses"
+}
+_JSON_FIELDS = {
+    "candidate_name": "Candidate Name",
+    "years_of_experience": "Years of Experience",
+    "education_level": "Education Level",
+    "relevant_skills": "Relevant Skills Matching JD",
+    "most_recent_role": "Most Recent Role",
+    "fitment_score": "Fitment Score",
+    "strengths": "Strengths",
+    "gaps": "Gaps/Weaknesses"
+}
+_NOT_SPECIFIED_FIELDS = ("Education Level", "Strengths", "Gaps/Weaknesses")
+
+def order_columns(row, columns=DISPLAY_COLUMNS):
+    # Listed columns first, then any extras (skill coverage, per-JD scores) in their original order
+    ordered = {column: row[column] for column in columns if column in row}
+    ordered.update(row)
+    return ordered
+
+def jd_score_column(jd_title):
+    return f"{jd_title} Fitment Score"
+
+def _default_result(jd_title):
+    return {
         "Candidate Name": "Unknown",
         "Years of Experience": "Unknown",
         "JD Analyzed Against": jd_title,
@@ -21,63 +97,673 @@ def parse_analysis_to_dict(analysis_text, jd_title):
         "Strengths": "Not specified",
         "Gaps/Weaknesses": "Not specified"
     }
-    if not analysis_text:
-        return default_result
 
-    result = default_result.copy()
-    lines = [line.strip() for line in analysis_text.split('\n') if line.strip() and ':' in line]
-    for line in lines:
+def score_to_float(value):
+    # "8/10", "4/5", "8.5" and 8 all map onto the 0-10 scale
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    match = _SCORE_PATTERN.search(str(value))
+    if not match:
+        return None
+    score = float(match.group(1))
+    if match.group(2) and float(match.group(2)) > 0:
+        score = score / float(match.group(2)) * 10
+    return score
+
+def years_to_float(value):
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    match = _NUMBER_PATTERN.search(str(value))
+    return float(match.group(1)) if match else None
+
+def _load_json_reply(analysis_text):
+    # Tolerates code fences or chatter around the object
+    start, end = analysis_text.find("{"), analysis_text.rfind("}")
+    if start == -1 or end <= start:
+        return None
+    try:
+        data = json.loads(analysis_text[start:end + 1])
+    except ValueError:
+        return None
+    return data if isinstance(data, dict) else None
+
+def _apply_json_fields(result, data):
+    for key, field in _JSON_FIELDS.items():
+        value = data.get(key)
+        if value is None:
+            continue
+        if isinstance(value, list):
+            value = ", ".join(str(item) for item in value)
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            value = f"{value:g}/10" if field == "Fitment Score" else f"{value:g}"
+        result[field] = str(value).strip()
+
+def _partial_json_fields(analysis_text):
+    data = {}
+    for key, value in _PARTIAL_JSON_PATTERN.findall(analysis_text):
         try:
-            key, value = [part.strip() for part in line.split(':', 1)]
-            if "Candidate Name" in key:
-                result["Candidate Name"] = value
-            elif "Years of Experience" in key:
-                result["Years of Experience"] = value
-            elif "Education Level" in key:
-                result["Education Level"] = value if value.lower() != "n/a" and value else "Not specified"
-            elif "Relevant Skills" in key:
-                result["Relevant Skills Matching JD"] = value
-            elif "Most Recent Role" in key:
-                result["Most Recent Role"] = value
-            elif "Fitment Score" in key:
-                result["Fitment Score"] = value
-            elif "Strengths" in key:
-                result["Strengths"] = value if value.lower() != "n/a" and value else "Not specified"
-            elif "Gaps/Weaknesses" in key:
-                result["Gaps/Weaknesses"] = value if value.lower() != "n/a" and value else "Not specified"
+            data[key] = json.loads(value)
         except ValueError:
-            logger.debug(f"Skipping malformed line: {line}")
+            continue
+    return data
+
+def _apply_text_fields(result, analysis_text):
+    for match in _FIELD_PATTERN.finditer(analysis_text):
+        label = match.group(1).lower()
+        field = _LABEL_FIELDS["relevant skills"] if label.startswith("relevant skills") else _LABEL_FIELDS[label]
+        result[field] = match.group(2).strip()
+
+def parse_partial_fields(analysis_text):
+    # Only fields whose value is complete: closed JSON strings and numbers, or free-text lines ending in a newline
+    fields = {}
+    if _JSON_START_PATTERN.match(analysis_text):
+        _apply_json_fields(fields, _partial_json_fields(analysis_text))
+    else:
+        _apply_text_fields(fields, analysis_text[:analysis_text.rfind("\n") + 1])
+    return fields
+
+def _finalize_result(result):
+    for field in _NOT_SPECIFIED_FIELDS:
+        value = str(result[field]).strip()
+        result[field] = value if value and value.lower() != "n/a" else "Not specified"
+    result["Score_Numeric"] = score_to_float(result["Fitment Score"])
+    result["Experience_Years"] = years_to_float(result["Years of Experience"])
     return result
 
-def process_resumes(uploaded_files, selected_jd, job_descriptions, api_url, headers, max_file_size_mb, request_delay):
-    results = []
-    jd_title = job_descriptions[selected_jd]["title"]
-    jd_requirements = job_descriptions[selected_jd]["requirements"]
-
-    for uploaded_file in uploaded_files:
-        file_bytes = uploaded_file.read()
-        file_path = Path(uploaded_file.name)
-        with open(file_path, "wb") as f:
-            f.write(file_bytes)
-        logger.info(f"Processing {file_path.name} against {jd_title}...")
-        resume_text = read_resume_file(file_path, max_file_size_mb)
-        if resume_text:
-            analysis = analyze_resume(resume_text, jd_title, jd_requirements, api_url, headers)
-            if analysis:
-                parsed_data = parse_analysis_to_dict(analysis, jd_title)
-                parsed_data["File Name"] = file_path.name
-                results.append(parsed_data)
-                logger.info(f"Successfully analyzed {file_path.name} for {jd_title}")
+def parse_analysis_to_dict(analysis_text, jd_title):
+    result = _default_result(jd_title)
+    if not analysis_text:
+        return _finalize_result(result)
+
+    data = _load_json_reply(analysis_text)
+    if data is None and _JSON_START_PATTERN.match(analysis_text):
+        data = _partial_json_fields(analysis_text)
+    if data is not None:
+        _apply_json_fields(result, data)
+    else:
+        # Fallback for free-text replies: one compiled pass over the whole reply
+        _apply_text_fields(result, analysis_text)
+    return _finalize_result(result)
+
+def _title_matches(title, jd_title):
+    key = jd_title.lower()
+    return bool(title) and (key in title or title in key)
+
+def _find_jd_block(blocks, jd_title):
+    key = jd_title.lower()
+    if key in blocks:
+        return blocks[key]
+    return next((body for title, body in blocks.items() if _title_matches(title, jd_title)), None)
+
+def parse_multi_analysis_to_dict(analysis_text, jd_titles):
+    # The row describes the best-fitting JD and carries one numeric score column per JD
+    data = _load_json_reply(analysis_text or "")
+    jd_rows = []
+    if data is not None and isinstance(data.get("jobs"), list):
+        jobs = [job for job in data["jobs"] if isinstance(job, dict)]
+        titles = [str(job.get("title", "")).strip().lower() for job in jobs]
+        blocks = {}
+        for title, job in zip(titles, jobs):
+            blocks.setdefault(title, job)
+        # Only entries whose title names none of the JDs (repeats included) are matched by position
+        named = [any(_title_matches(title, jd_title) for jd_title in jd_titles) for title in titles]
+        for position, jd_title in enumerate(jd_titles):
+            job = _find_jd_block(blocks, jd_title)
+            if job is None:
+                job = jobs[position] if position < len(jobs) and not named[position] else {}
+            result = _default_result(jd_title)
+            _apply_json_fields(result, dict(data, **job))
+            jd_rows.append(_finalize_result(result))
+    else:
+        # Free-text reply: candidate fields in the header, then one "=== JD: <title> ===" block per job
+        parts = _JD_BLOCK_PATTERN.split(analysis_text or "")
+        header = parts[0]
+        blocks = {}
+        for title, body in zip(parts[1::2], parts[2::2]):
+            # A JD the model repeated keeps its first block, as packed replies keep a resume's first entry
+            blocks.setdefault(title.strip().lower(), body)
+        for jd_title in jd_titles:
+            jd_rows.append(parse_analysis_to_dict(header + "\n" + (_find_jd_block(blocks, jd_title) or ""), jd_title))
+
+    result = dict(max(jd_rows, key=lambda row: -1 if row["Score_Numeric"] is None else row["Score_Numeric"]))
+    for row in jd_rows:
+        result[jd_score_column(row["JD Analyzed Against"])] = row["Score_Numeric"]
+    return result
+
+def split_packed_reply(analysis_text, count):
+    # One JSON object per resume of a packed reply, matched on its "resume" number (or its position without one);
+    # None where the entry is missing or unscored, so that resume can be retried on its own
+    data = _load_json_reply(analysis_text or "")
+    candidates = data.get("candidates") if data else None
+    split = [None] * count
+    if not isinstance(candidates, list):
+        return split
+    for position, candidate in enumerate(candidates):
+        if not isinstance(candidate, dict) or score_to_float(candidate.get("fitment_score")) is None:
+            continue
+        try:
+            slot = int(candidate.get("resume", position + 1)) - 1
+        except (TypeError, ValueError):
+            slot = position
+        if 0 <= slot < count and split[slot] is None:
+            split[slot] = candidate
+    return split
+
+def _extract_upload(file_name, file_data, max_file_size_mb, max_chars=None):
+    # Module-level so it can be pickled into extraction worker processes; parses straight from memory.
+    # Timed here and returned with the text because metrics recorded inside a worker process would be lost
+    started = time.perf_counter()
+    resume_text = read_resume_file(file_data, max_file_size_mb, max_chars, file_name=file_name)
+    return resume_text, time.perf_counter() - started
+
+def _record_extraction(file_name, extraction):
+    if extraction is None:
+        return None
+    resume_text, elapsed = extraction
+    extension = Path(file_name).suffix.lower().lstrip('.') or 'unknown'
+    get_metrics().observe("extract_seconds", elapsed, format=extension)
+    if not resume_text:
+        get_metrics().increment("extract_failures_total", format=extension)
+    return resume_text
+
+def _upload_data(uploaded_file, in_process):
+    # Streamlit uploads are seekable in-memory streams: in-process parsing reads them directly,
+    # while worker processes need picklable bytes
+    if in_process and hasattr(uploaded_file, "seek"):
+        uploaded_file.seek(0)
+        return uploaded_file
+    if hasattr(uploaded_file, "getvalue"):
+        return uploaded_file.getvalue()
+    return uploaded_file.read()
+
+def _extraction_result(file_name, extract):
+    try:
+        return extract()
+    except Exception as e:
+        logger.error(f"Error extracting text from {file_name}: {e}")
+        return None
+
+def _put(target, item, stop):
+    # Blocking put that gives up once the batch is stopped, so a cancelled batch never leaves a stage
+    # waiting on a full queue
+    while not stop.is_set():
+        try:
+            target.put(item, timeout=_STOP_POLL_SECONDS)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+def _drain(source, stop):
+    # Items up to _EXTRACTION_DONE, or until the batch is stopped
+    while not stop.is_set():
+        try:
+            item = source.get(timeout=_STOP_POLL_SECONDS)
+        except queue.Empty:
+            continue
+        if item is _EXTRACTION_DONE:
+            return
+        yield item
+
+def _run_stage(stage, completed, *args):
+    # Thread target for a pipeline stage: a failure is handed to the consumer, which would otherwise wait
+    # forever for events the stage will never produce
+    try:
+        stage(*args)
+    except Exception as e:
+        logger.error(f"{stage.__name__} failed: {e}")
+        completed.put({"stage_error": e})
+
+def _extract_stage(uploaded_files, extracted, extract_workers, max_file_size_mb, max_chars, stop):
+    # Producer: parses documents (in worker processes when extract_workers > 0) and feeds the bounded queue
+    initializer, initargs = child_logging_initializer()
+    pool = ProcessPoolExecutor(max_workers=extract_workers, initializer=initializer, initargs=initargs) \
+        if extract_workers > 0 else None
+    pending = deque()
+    try:
+        for index, uploaded_file in enumerate(uploaded_files):
+            if stop.is_set():
+                break
+            file_name = Path(uploaded_file.name).name
+            with get_metrics().timer("upload_read_seconds"):
+                file_data = _extraction_result(file_name, lambda: _upload_data(uploaded_file, in_process=pool is None))
+            if file_data is None:
+                _put(extracted, (index, file_name, None), stop)
+                continue
+            if pool is None:
+                resume_text = _record_extraction(file_name, _extraction_result(
+                    file_name, lambda: _extract_upload(file_name, file_data, max_file_size_mb, max_chars)))
+                _put(extracted, (index, file_name, resume_text), stop)
+                continue
+            pending.append((index, file_name, pool.submit(_extract_upload, file_name, file_data, max_file_size_mb, max_chars)))
+            # Keep each worker busy with one more document queued behind it
+            while len(pending) >= extract_workers * 2 and not stop.is_set():
+                index, file_name, future = pending.popleft()
+                _put(extracted, (index, file_name, _record_extraction(file_name, _extraction_result(file_name, future.result))),
+                     stop)
+        while pending and not stop.is_set():
+            index, file_name, future = pending.popleft()
+            _put(extracted, (index, file_name, _record_extraction(file_name, _extraction_result(file_name, future.result))),
+                 stop)
+    finally:
+        if pool is not None:
+            # A stopped batch drops documents still waiting for a worker process; ones being parsed finish first
+            pool.shutdown(cancel_futures=stop.is_set())
+        _put(extracted, _EXTRACTION_DONE, stop)
+
+def _stream_progress(on_partial, early_stop_score):
+    # Reports newly completed fields of a streaming reply and stops the generation once the score
+    # is known to be below early_stop_score
+    reported = {}
+
+    def on_progress(analysis_text):
+        fields = parse_partial_fields(analysis_text)
+        if on_partial and len(fields) > len(reported):
+            reported.update(fields)
+            on_partial(fields)
+        score = score_to_float(fields["Fitment Score"]) if "Fitment Score" in fields else None
+        return bool(early_stop_score) and score is not None and score < early_stop_score
+    return on_progress
+
+def _mark_stopped_early(row, early_stop_score):
+    if row["Score_Numeric"] is None or row["Score_Numeric"] >= early_stop_score:
+        return
+    for field in ("Strengths", "Gaps/Weaknesses"):
+        if row[field] == "Not specified":
+            row[field] = f"Not analyzed (score below {early_stop_score:g})"
+
+def _scored_reply(analysis, jds, early_stop_score=0):
+    # The parsed row, or None when there is no reply or it carries no fitment score
+    if not analysis:
+        return None
+    with get_metrics().timer("parse_seconds"):
+        if len(jds) > 1:
+            parsed_data = parse_multi_analysis_to_dict(analysis, [title for title, _ in jds])
+        else:
+            parsed_data = parse_analysis_to_dict(analysis, jds[0][0])
+            if early_stop_score:
+                _mark_stopped_early(parsed_data, early_stop_score)
+    return parsed_data if parsed_data["Score_Numeric"] is not None else None
+
+def _analyze_extracted(file_name, resume_text, jds, api_url, headers, request_delay, model_kwargs=None, cache=None,
+                       session_id=None, on_partial=None, hedge=None):
+    # jds is a list of (title, requirements); more than one switches to a single multi-JD request.
+    # Streaming single-JD replies report partial rows through on_partial(fields) and may stop early
+    multi_jd = len(jds) > 1
+    jd_title = " | ".join(title for title, _ in jds)
+    jd_requirements = "\n".join(requirements for _, requirements in jds)
+    logger.info(f"Processing {file_name} against {jd_title}...")
+    streaming = bool(model_kwargs and model_kwargs.get("streaming")) and not multi_jd
+    early_stop_score = (model_kwargs.get("early_stop_score") or 0) if streaming else 0
+    metrics = get_metrics()
+    started = time.perf_counter()
+    cache_key = make_cache_key(resume_text, jd_title, jd_requirements, MODEL_ID, model_kwargs) if cache else None
+    parsed_data = _scored_reply(cache.get(cache_key), jds, early_stop_score) if cache else None
+    if cache:
+        metrics.increment("cache_lookups_total", result="hit" if parsed_data else "miss")
+    if parsed_data:
+        logger.info(f"Cache hit for {file_name} against {jd_title}")
+    else:
+        if multi_jd:
+            analysis = analyze_resume_multi(resume_text, jds, api_url, headers, model_kwargs, session_id, hedge)
+        else:
+            on_progress = _stream_progress(on_partial, early_stop_score) if streaming else None
+            analysis = analyze_resume(resume_text, jd_title, jd_requirements, api_url, headers, model_kwargs, session_id,
+                                      on_progress, hedge)
+        # The shared rate governor paces requests itself; the fixed delay is only a fallback
+        if get_rate_governor() is None:
+            time.sleep(request_delay)
+        parsed_data = _scored_reply(analysis, jds, early_stop_score)
+        # Refusals and malformed replies are not cached, so a transient bad reply is retried on the next run
+        if parsed_data and cache:
+            cache.set(cache_key, analysis)
+    if not parsed_data:
+        logger.warning(f"Failed to analyze {file_name} for {jd_title}")
+        return None
+    metrics.observe("analyze_seconds", time.perf_counter() - started)
+    parsed_data["File Name"] = file_name
+    logger.info(f"Successfully analyzed {file_name} for {jd_title}")
+    return parsed_data
+
+def _analyze_pack(members, jds, api_url, headers, request_delay, model_kwargs=None, cache=None, session_id=None,
+                  hedge=None):
+    # members is a list of (file_name, resume_text) for one JD; returns one row or None per member, in order.
+    # Resumes the packed reply does not cover (all of them when it is malformed) fall back to single requests
+    jd_title, jd_requirements = jds[0]
+    metrics = get_metrics()
+    started = time.perf_counter()
+    cache_keys = [make_cache_key(resume_text, jd_title, jd_requirements, MODEL_ID, model_kwargs) if cache else None
+                  for _, resume_text in members]
+    rows = [_scored_reply(cache.get(key), jds) if cache else None for key in cache_keys]
+    if cache:
+        for row in rows:
+            metrics.increment("cache_lookups_total", result="hit" if row else "miss")
+    pending = [position for position, row in enumerate(rows) if not row]
+    if len(pending) > 1:
+        logger.info(f"Processing {len(pending)} packed resumes against {jd_title}...")
+        reply = analyze_resume_pack([members[position][1] for position in pending], jd_title, jd_requirements,
+                                    api_url, headers, model_kwargs, session_id, hedge)
+        if get_rate_governor() is None:
+            time.sleep(request_delay)
+        candidates = split_packed_reply(reply, len(pending))
+        for position, candidate in zip(pending, candidates):
+            metrics.increment("packed_resumes_total", outcome="split" if candidate else "fallback")
+            if candidate:
+                # Cached under the single-resume key, where parse_analysis_to_dict reads it like any JSON reply
+                analysis = json.dumps(candidate)
+                rows[position] = _scored_reply(analysis, jds)
+                if cache:
+                    cache.set(cache_keys[position], analysis)
+        logger.info(f"Packed reply covered {sum(1 for candidate in candidates if candidate)} of {len(pending)} resumes")
+
+    for position, (file_name, resume_text) in enumerate(members):
+        if not rows[position]:
+            rows[position] = _analyze_extracted(file_name, resume_text, jds, api_url, headers, request_delay,
+                                                model_kwargs, cache, session_id, hedge=hedge)
+            continue
+        rows[position]["File Name"] = file_name
+        metrics.observe("analyze_seconds", time.perf_counter() - started)
+    return rows
+
+def _prescreen_skip(completed, index, file_name, coverage):
+    completed.put({"index": index, "file_name": file_name, "row": None, "skipped": True,
+                   "error": f"Skipped by skill pre-screen ({coverage}% coverage)", "resume_hash": None})
+
+def _prescreen_stream(items, completed, jd_requirements, min_coverage):
+    # A coverage threshold judges each resume on its own, so resumes go on to analysis as they are extracted
+    kept = screened = 0
+    for index, file_name, resume_text in items:
+        if not resume_text:
+            yield index, file_name, None, {}
+            continue
+        screened += 1
+        score = resume_coverage(resume_text, jd_requirements)
+        coverage = round(score * 100, 1)
+        if score >= min_coverage:
+            kept += 1
+            yield index, file_name, resume_text, {"Skill Coverage %": coverage}
+        else:
+            _prescreen_skip(completed, index, file_name, coverage)
+    logger.info(f"Skill pre-screen kept {kept}/{screened} resumes (min coverage {min_coverage})")
+
+def _prescreen_items(items, completed, jd_requirements, min_coverage=None, top_k=None):
+    # Top-K needs the whole batch, so pre-screening waits for extraction to finish and scores everything at once
+    if not top_k:
+        yield from _prescreen_stream(items, completed, jd_requirements, min_coverage)
+        return
+    items = list(items)
+    with_text = [item for item in items if item[2]]
+    scores, selected = prescreen([resume_text for _, _, resume_text in with_text], jd_requirements, min_coverage, top_k)
+    kept = [(index, file_name, None, {}) for index, file_name, resume_text in items if not resume_text]
+    for (index, file_name, resume_text), score, keep in zip(with_text, scores, selected):
+        coverage = round(float(score) * 100, 1)
+        if keep:
+            kept.append((index, file_name, resume_text, {"Skill Coverage %": coverage}))
+        else:
+            _prescreen_skip(completed, index, file_name, coverage)
+    yield from sorted(kept, key=lambda item: item[0])
+
+class _DuplicateFanOut:
+    # Only the first resume of each near-duplicate group is analyzed; its result is copied to the others
+    def __init__(self, index, completed):
+        self.index = index
+        self.completed = completed
+        self._lock = threading.Lock()
+        self._names = {}
+        self._waiting = {}
+        self._results = {}
+
+    def claim(self, index, file_name, resume_text, extra_fields, resume_hash):
+        # True when the resume duplicates one already dispatched, so it must not be analyzed itself
+        signature = self.index.signature(resume_text)
+        with self._lock:
+            match = self.index.query(signature)
+            if match is None:
+                self.index.add(index, signature)
+                self._names[index] = file_name
+                self._waiting[index] = []
+                return False
+            representative, similarity = match
+            duplicate = (index, file_name, extra_fields, resume_hash)
+            logger.info(f"{file_name} is a near-duplicate of {self._names[representative]} ({similarity:.0%} similar)")
+            if representative not in self._results:
+                self._waiting[representative].append(duplicate)
+                return True
+            result = self._results[representative]
+        self._emit(representative, result, duplicate)
+        return True
+
+    def finish(self, representative, row, error):
+        with self._lock:
+            if representative not in self._waiting:
+                return
+            self._results[representative] = (row, error)
+            waiting = self._waiting.pop(representative)
+        for duplicate in waiting:
+            self._emit(representative, (row, error), duplicate)
+
+    def _emit(self, representative, result, duplicate):
+        row, error = result
+        index, file_name, extra_fields, resume_hash = duplicate
+        if row:
+            row = dict(row, **extra_fields)
+            row.update({"File Name": file_name, "Duplicate Of": self._names[representative]})
+        else:
+            error = f"Near-duplicate of {self._names[representative]}, which failed: {error}"
+        self.completed.put({"index": index, "file_name": file_name, "row": row, "skipped": False, "error": error,
+                            "resume_hash": resume_hash})
+
+def _partial_event(completed, index, file_name, fields):
+    completed.put({"index": index, "file_name": file_name, "row": fields, "skipped": False, "error": None,
+                   "resume_hash": None, "partial": True})
+
+def _submit(executor, in_flight, stop, fn, *args, **kwargs):
+    # Takes a concurrency slot and schedules fn; None once the batch is stopped
+    while not in_flight.acquire(timeout=_STOP_POLL_SECONDS):
+        if stop.is_set():
+            return None
+    try:
+        return executor.submit(contextvars.copy_context().run, fn, *args, **kwargs)
+    except RuntimeError:
+        # The executor is shut down when the consumer stops the batch
+        in_flight.release()
+        if stop.is_set():
+            return None
+        raise
+
+def _dispatch_stage(extracted, executor, in_flight, completed, stop, analyze, prescreen_options=None, duplicates=None,
+                    partial_rows=False, pack_options=None):
+    # Consumer: hands extracted text to the API thread pool, at most max_concurrency calls at a time
+    pack = []
+    if prescreen_options:
+        items = _prescreen_items(_drain(extracted, stop), completed, **prescreen_options)
+    else:
+        items = ((index, file_name, resume_text, {}) for index, file_name, resume_text in _drain(extracted, stop))
+    for index, file_name, resume_text, extra_fields in items:
+        if not resume_text:
+            completed.put({"index": index, "file_name": file_name, "row": None, "skipped": False,
+                           "error": "No text could be extracted", "resume_hash": None})
+            continue
+        resume_hash = resume_text_hash(resume_text)
+        if duplicates and duplicates.claim(index, file_name, resume_text, extra_fields, resume_hash):
+            continue
+        if pack_options and estimate_text_tokens(resume_text) <= pack_options["max_resume_tokens"]:
+            # Short resumes wait for a full pack; the last, partial one goes out once extraction is done
+            pack.append((index, file_name, resume_text, extra_fields, resume_hash))
+            if len(pack) >= pack_options["size"]:
+                if not _submit_pack(pack, executor, in_flight, completed, stop, pack_options["analyze"], duplicates):
+                    return
+                pack = []
+            continue
+        if partial_rows:
+            future = _submit(executor, in_flight, stop, analyze, file_name, resume_text,
+                             on_partial=partial(_partial_event, completed, index, file_name))
+        else:
+            future = _submit(executor, in_flight, stop, analyze, file_name, resume_text)
+        if future is None:
+            return
+        future.add_done_callback(
+            lambda future, index=index, file_name=file_name, extra_fields=extra_fields, resume_hash=resume_hash:
+                _complete(future, index, file_name, in_flight, completed, extra_fields, resume_hash, duplicates))
+    if pack:
+        _submit_pack(pack, executor, in_flight, completed, stop, pack_options["analyze"], duplicates)
+
+def _submit_pack(pack, executor, in_flight, completed, stop, analyze_pack, duplicates=None):
+    # A pack takes one concurrency slot, like a single request
+    future = _submit(executor, in_flight, stop, analyze_pack,
+                     [(file_name, resume_text) for _, file_name, resume_text, _, _ in pack])
+    if future is None:
+        return False
+    future.add_done_callback(lambda future: _complete_pack(future, pack, in_flight, completed, duplicates))
+    return True
+
+def _complete_pack(future, pack, in_flight, completed, duplicates=None):
+    in_flight.release()
+    try:
+        rows = future.result()
+        errors = [None if row else "Analysis failed" for row in rows]
+    except CancelledError:
+        rows, errors = [None] * len(pack), ["Cancelled"] * len(pack)
+    except Exception as e:
+        logger.error(f"Error processing packed resumes {', '.join(item[1] for item in pack)}: {e}")
+        rows, errors = [None] * len(pack), [str(e)] * len(pack)
+    for (index, file_name, _, extra_fields, resume_hash), row, error in zip(pack, rows, errors):
+        _put_result(index, file_name, row, error, completed, extra_fields, resume_hash, duplicates)
+
+def _complete(future, index, file_name, in_flight, completed, extra_fields=None, resume_hash=None, duplicates=None):
+    in_flight.release()
+    try:
+        row = future.result()
+        error = None if row else "Analysis failed"
+    except CancelledError:
+        row, error = None, "Cancelled"
+    except Exception as e:
+        logger.error(f"Error processing {file_name}: {e}")
+        row, error = None, str(e)
+    _put_result(index, file_name, row, error, completed, extra_fields, resume_hash, duplicates)
+
+def _put_result(index, file_name, row, error, completed, extra_fields=None, resume_hash=None, duplicates=None):
+    if row and extra_fields:
+        row.update(extra_fields)
+    completed.put({"index": index, "file_name": file_name, "row": row, "skipped": False, "error": error,
+                   "resume_hash": resume_hash})
+    if duplicates:
+        duplicates.finish(index, row, error)
+
+def iter_resumes(uploaded_files, selected_jd, job_descriptions, api_url, headers, max_file_size_mb, request_delay,
+                 max_concurrency=1, model_kwargs=None, cache=None, max_chars=None, extract_workers=0, extract_queue_size=8,
+                 prescreen_min_coverage=None, prescreen_top_k=None, session_id=None, dedupe_threshold=None,
+                 dedupe_shingle_size=3, partial_rows=False, pack_size=None, pack_max_resume_tokens=300,
+                 hedge_percentile=None, hedge_max_extra_fraction=0.05, hedge_late_max_extra_fraction=0.15,
+                 hedge_min_samples=10, deadline_seconds=None):
+    # Yields one event per uploaded file, in completion order:
+    # {"index": upload position, "file_name": ..., "row": parsed dict or None, "skipped": bool, "error": message or None,
+    #  "resume_hash": hash of the extracted text or None}
+    # selected_jd may be a single JD key or a list of keys to score every resume against in one request
+    # With dedupe_threshold set, near-duplicates (estimated Jaccard similarity >= threshold) reuse one analysis
+    # With partial_rows and streaming enabled in model_kwargs, extra events with "partial": True carry the fields
+    # parsed so far for a resume that is still being analyzed; they are not counted as completions
+    # With pack_size > 1, resumes of at most pack_max_resume_tokens share requests of up to pack_size resumes
+    # (single JD, non-streaming only)
+    # With hedge_percentile set, a request slower than that percentile of the batch's latencies so far is sent again
+    # and the first reply wins, for at most hedge_max_extra_fraction extra requests; past deadline_seconds the
+    # remaining requests are hedged from the median latency, for at most hedge_late_max_extra_fraction
+    selected_jds = [selected_jd] if isinstance(selected_jd, str) else list(selected_jd)
+    jds = [(job_descriptions[key]["title"], job_descriptions[key]["requirements"]) for key in selected_jds]
+    uploaded_files = list(uploaded_files)
+    max_concurrency = max(1, max_concurrency)
+
+    # Extraction runs ahead of the API stage, bounded by the queue size
+    extracted = queue.Queue(maxsize=max(1, extract_queue_size))
+    completed = queue.Queue()
+    stop = threading.Event()
+    # Both stages, and the API calls they submit, run in copies of this context so they report to the caller's metrics
+    producer = threading.Thread(
+        target=contextvars.copy_context().run, name="resume-extract",
+        args=(_run_stage, _extract_stage, completed, uploaded_files, extracted, extract_workers, max_file_size_mb, max_chars, stop),
+        daemon=True
+    )
+    executor = ThreadPoolExecutor(max_workers=max_concurrency)
+    prescreen_options = None
+    if prescreen_min_coverage or prescreen_top_k:
+        prescreen_options = {"jd_requirements": ", ".join(requirements for _, requirements in jds),
+                             "min_coverage": prescreen_min_coverage, "top_k": prescreen_top_k}
+    duplicates = None
+    if dedupe_threshold:
+        duplicates = _DuplicateFanOut(MinHashIndex(dedupe_threshold, shingle_size=dedupe_shingle_size), completed)
+    hedge = None
+    if hedge_percentile or deadline_seconds:
+        hedge = HedgePolicy(hedge_percentile, hedge_max_extra_fraction, hedge_late_max_extra_fraction, hedge_min_samples,
+                            deadline_seconds, max_workers=max_concurrency * 3)
+    pack_options = None
+    if pack_size and pack_size > 1 and len(jds) == 1 and not (model_kwargs and model_kwargs.get("streaming")):
+        pack_options = {"size": pack_size, "max_resume_tokens": pack_max_resume_tokens,
+                        "analyze": partial(_analyze_pack, jds=jds, api_url=api_url, headers=headers,
+                                           request_delay=request_delay, model_kwargs=model_kwargs, cache=cache,
+                                           session_id=session_id, hedge=hedge)}
+    dispatcher = threading.Thread(
+        target=contextvars.copy_context().run, name="resume-dispatch",
+        args=(_run_stage, _dispatch_stage, completed, extracted, executor, threading.BoundedSemaphore(max_concurrency), completed, stop,
+              partial(_analyze_extracted, jds=jds, api_url=api_url, headers=headers, request_delay=request_delay,
+                      model_kwargs=model_kwargs, cache=cache, session_id=session_id, hedge=hedge),
+              prescreen_options, duplicates, partial_rows, pack_options),
+        daemon=True
+    )
+    producer.start()
+    dispatcher.start()
+    metrics = get_metrics()
+    try:
+        remaining = len(uploaded_files)
+        while remaining:
+            event = completed.get()
+            if "stage_error" in event:
+                raise event["stage_error"]
+            if event.get("partial"):
+                yield event
+                continue
+            remaining -= 1
+            if event["row"]:
+                outcome = "duplicate" if event["row"].get("Duplicate Of") else "analyzed"
             else:
-                logger.warning(f"Failed to analyze {file_path.name} for {jd_title}")
-        time.sleep(request_delay)
-        os.remove(file_path)  # Clean up temporary file
+                outcome = "skipped" if event["skipped"] else "failed"
+            metrics.increment("resumes_total", outcome=outcome)
+            yield event
+        producer.join()
+        dispatcher.join()
+    finally:
+        # Also runs when the consumer closes the generator early (a cancelled job): both stages stop, queued API calls
+        # are dropped and the threads are joined, so a long-lived worker never accumulates them. Calls already
+        # in flight finish in the background
+        stop.set()
+        executor.shutdown(wait=False, cancel_futures=True)
+        producer.join()
+        dispatcher.join()
+        if hedge:
+            logger.info(f"Hedging: {hedge.stats()}")
+            hedge.close()
+
+def process_resumes(uploaded_files, selected_jd, job_descriptions, api_url, headers, max_file_size_mb, request_delay,
+                    max_concurrency=1, model_kwargs=None, cache=None, max_chars=None, extract_workers=0, extract_queue_size=8,
+                    prescreen_min_coverage=None, prescreen_top_k=None, session_id=None, dedupe_threshold=None,
+                    dedupe_shingle_size=3, pack_size=None, pack_max_resume_tokens=300, hedge_percentile=None,
+                    hedge_max_extra_fraction=0.05, hedge_late_max_extra_fraction=0.15, hedge_min_samples=10,
+                    deadline_seconds=None):
+    uploaded_files = list(uploaded_files)
+    # Slots preserve upload order regardless of completion order
+    slots = [None] * len(uploaded_files)
+    for event in iter_resumes(uploaded_files, selected_jd, job_descriptions, api_url, headers, max_file_size_mb,
+                              request_delay, max_concurrency, model_kwargs, cache, max_chars,
+                              extract_workers, extract_queue_size, prescreen_min_coverage, prescreen_top_k, session_id,
+                              dedupe_threshold, dedupe_shingle_size, pack_size=pack_size,
+                              pack_max_resume_tokens=pack_max_resume_tokens, hedge_percentile=hedge_percentile,
+                              hedge_max_extra_fraction=hedge_max_extra_fraction,
+                              hedge_late_max_extra_fraction=hedge_late_max_extra_fraction, hedge_min_samples=hedge_min_samples,
+                              deadline_seconds=deadline_seconds):
+        slots[event["index"]] = event["row"]
+    results = [row for row in slots if row]
 
     if results:
         df = pd.DataFrame(results)
-        fieldnames = ["File Name", "Candidate Name", "Years of Experience", "JD Analyzed Against", 
-                      "Fitment Score", "Relevant Skills Matching JD", "Education Level", 
-                      "Most Recent Role", "Strengths", "Gaps/Weaknesses"]
-        df = df[fieldnames]
+        df = df[RESULT_COLUMNS + [col for col in df.columns if col not in RESULT_COLUMNS]]
         return df
     return None
\ No newline at end of file
@@ -1,26 +1,130 @@
 import streamlit as st
-from io import BytesIO
 import pandas as pd
 from pathlib import Path
 import time
 import threading
 import queue
+import math
+import json
+import uuid
 
-def run_ui(job_descriptions, process_resumes, test_api_connectivity, api_config, processing_config):
+from src.api.cache import get_analysis_cache
+from src.processing.archive_reader import scan_archive
+from src.processing.job_queue import ACTIVE_STATES, get_job_queue, start_worker
+from src.processing.resume_processor import NUMERIC_COLUMNS
+from src.processing.results_store import SORT_ORDERS, get_results_store
+from src.processing.export import export_columns, write_csv, write_excel
+from src.utils.logger import latest_process_log, tail_log
+from src.utils.metrics import get_metrics
+
+def _metrics_frame(snapshot):
+    # One row per timed stage (and label set), slowest stages first
+    rows = []
+    for histogram in snapshot['histograms']:
+        labels = ", ".join(f"{key}={value}" for key, value in histogram['labels'].items())
+        rows.append({
+            "Stage": histogram['name'].replace('_seconds', '') + (f" ({labels})" if labels else ""),
+            "Count": histogram['count'],
+            "Mean (s)": round(histogram['mean'], 3),
+            "p50 (s)": round(histogram['p50'], 3),
+            "p95 (s)": round(histogram['p95'], 3),
+            "p99 (s)": round(histogram['p99'], 3)
+        })
+    return pd.DataFrame(rows).sort_values("p95 (s)", ascending=False) if rows else pd.DataFrame()
+
+def _counters(snapshot):
+    # {name: {label value: total}}; each counter carries at most one label
+    counters = {}
+    for counter in snapshot['counters']:
+        label = next(iter(counter['labels'].values()), None)
+        by_label = counters.setdefault(counter['name'], {})
+        by_label[label] = by_label.get(label, 0) + counter['value']
+    return counters
+
+def _metrics_summary(snapshot):
+    counters = _counters(snapshot)
+    api_latency = [histogram for histogram in snapshot['histograms'] if histogram['name'] == 'api_request_seconds']
+    cache = counters.get('cache_lookups_total', {})
+    lookups = sum(cache.values())
+    parts = [f"Cache hit rate: {cache.get('hit', 0) / lookups:.0%} of {lookups} lookups" if lookups else "Cache: no lookups"]
+    if api_latency:
+        parts.append(f"API latency p50 {api_latency[0]['p50']:.1f}s / p95 {api_latency[0]['p95']:.1f}s")
+    requests_by_status = counters.get('api_requests_total', {})
+    if requests_by_status:
+        parts.append("API responses: " + ", ".join(f"{status}: {count}" for status, count in sorted(requests_by_status.items())))
+    retries = sum(counters.get('api_retries_total', {}).values())
+    if retries:
+        parts.append(f"Retries: {retries}")
+    packed = counters.get('packed_resumes_total', {})
+    if packed:
+        parts.append(f"Packed: {packed.get('split', 0)} resumes, {packed.get('fallback', 0)} retried alone")
+    hedges = sum(counters.get('api_hedges_total', {}).values())
+    if hedges:
+        parts.append(f"Hedged: {hedges} ({sum(counters.get('api_hedges_won_total', {}).values())} won)")
+    stopped = sum(counters.get('api_streams_stopped_total', {}).values())
+    if stopped:
+        parts.append(f"Stopped early: {stopped}")
+    outcomes = counters.get('resumes_total', {})
+    if outcomes:
+        parts.append("Resumes: " + ", ".join(f"{outcome}: {count}" for outcome, count in sorted(outcomes.items())))
+    return " | ".join(parts)
+
+def _stage_mean(snapshot, name):
+    stats = [histogram for histogram in snapshot['histograms'] if histogram['name'] == name and histogram['count']]
+    return sum(stat['sum'] for stat in stats) / sum(stat['count'] for stat in stats) if stats else None
+
+def _ensure_worker(job_queue, processing_config):
+    # Starts a local worker when none is heartbeating; the reservation lives in jobs.sqlite3, so concurrent
+    # sessions and browser tabs start at most one between them
+    if processing_config['jobs_autostart_worker'] and job_queue.reserve_worker_start():
+        start_worker()
+
+def _job_summary(job):
+    progress = job['progress']
+    if job['status'] == 'failed':
+        st.error(f"❌ Error during processing: {job['error']}")
+    elif job['status'] == 'cancelled':
+        st.warning(f"Analysis cancelled after {job['processed']} of {job['total']} resumes.")
+    elif job['analyzed']:
+        st.success(f"✅ Analysis completed for {job['analyzed']} resumes!")
+    else:
+        st.error("❌ No results generated. Check logs for errors.")
+    if job['duplicates']:
+        st.info(f"{job['duplicates']} near-duplicate resumes reused the analysis of another copy (see 'Duplicate Of').")
+    if job['skipped']:
+        st.info(f"{job['skipped']} resumes were skipped by the skill pre-screen and not sent for AI analysis.")
+    failed_files = progress.get('failed_files', [])
+    if failed_files:
+        st.warning(f"⚠️ {len(failed_files)} resumes could not be analyzed: {', '.join(failed_files[:10])}{' ...' if len(failed_files) > 10 else ''}")
+
+def run_ui(job_descriptions, test_api_connectivity, api_config, processing_config):
     st.set_page_config(page_title="Resume Analysis Tool", layout="wide")
     
+    job_queue = get_job_queue(processing_config['jobs_db_path'], processing_config['jobs_spool_dir'],
+                              processing_config['jobs_stale_after_seconds'])
+    
     # Initialize session state for persistent data
     if 'api_status_last_check' not in st.session_state:
         st.session_state.api_status_last_check = 0
         st.session_state.api_status = None
     
-    if 'results_df' not in st.session_state:
-        st.session_state.results_df = None
+    # Results live in the indexed results store; the session only remembers which run it produced
+    if 'run_id' not in st.session_state:
+        st.session_state.run_id = None
+        st.session_state.exports = {}
     
-    if 'processing_status' not in st.session_state:
-        st.session_state.processing_status = None
-        st.session_state.files_to_process = 0
-        st.session_state.files_processed = 0
+    results_store = get_results_store(processing_config['results_db_path'])
+    
+    # Identifies this browser session to the shared rate governor so concurrent users get a fair share
+    if 'session_id' not in st.session_state:
+        st.session_state.session_id = uuid.uuid4().hex
+    
+    # A reload starts a new session; the job id kept in the URL reconnects it to its batch
+    if 'job_id' not in st.session_state:
+        job_id = st.query_params.get("job")
+        st.session_state.job_id = job_id if job_id and job_queue.get(job_id) else None
+        if st.session_state.job_id:
+            st.session_state.run_id = job_id
     
     st.title("Resume Analysis Tool")
     st.write("Upload resumes and analyze them against a selected job description.")
@@ -35,19 +139,42 @@ def run_ui(job_descriptions, process_resumes, test_api_connectivity, api_config,
             return list(job_descriptions.keys())
         
         jd_options = get_jd_options()
-        selected_jd = st.selectbox("Select Job Description", jd_options, index=0)
+        multi_jd = st.checkbox("Score against several job descriptions in one pass",
+                               help="Each resume is read and sent once, and scored against every selected job description")
+        if multi_jd:
+            selected_jd = st.multiselect("Select Job Descriptions", jd_options, default=jd_options[:2])
+            jd_label = f"{len(selected_jd)} job descriptions"
+        else:
+            selected_jd = st.selectbox("Select Job Description", jd_options, index=0)
+            jd_label = f"'{selected_jd}' job description"
         
         # File Upload with better UX
         uploaded_files = st.file_uploader(
             "Upload Resumes", 
             accept_multiple_files=True, 
-            type=processing_config['supported_extensions'],
-            help=f"Supported formats: {', '.join(processing_config['supported_extensions'])}. Max size: {processing_config['max_file_size_mb']}MB"
+            type=processing_config['supported_extensions'] + ['.zip'],
+            help=f"Supported formats: {', '.join(processing_config['supported_extensions'])}, or a .zip of them. Max size: {processing_config['max_file_size_mb']}MB per resume"
         )
         
-        if uploaded_files:
-            file_info = [f"{file.name} ({file.size / (1024*1024):.2f} MB)" for file in uploaded_files]
-            st.write(f"📂 Uploaded {len(uploaded_files)} files:")
+        # ZIP uploads are expanded member by member during analysis instead of all at once
+        zip_uploads = [f for f in uploaded_files if f.name.lower().endswith('.zip')] if uploaded_files else []
+        resume_uploads = [f for f in uploaded_files if not f.name.lower().endswith('.zip')] if uploaded_files else []
+        for zip_upload in zip_uploads:
+            try:
+                members, skipped_members = scan_archive(zip_upload, processing_config['supported_extensions'],
+                                                        processing_config['max_file_size_mb'])
+            except Exception as e:
+                st.error(f"❌ {zip_upload.name} is not a readable ZIP archive: {e}")
+                continue
+            st.write(f"🗜️ {zip_upload.name}: {len(members)} resumes")
+            if skipped_members:
+                with st.expander(f"{len(skipped_members)} archive members will be skipped"):
+                    for reason in skipped_members:
+                        st.write(f"- {reason}")
+        
+        if resume_uploads:
+            file_info = [f"{file.name} ({file.size / (1024*1024):.2f} MB)" for file in resume_uploads]
+            st.write(f"📂 Uploaded {len(resume_uploads)} files:")
             
             # Show file list in a compact way
             if len(file_info) > 10:
@@ -60,9 +187,64 @@ def run_ui(job_descriptions, process_resumes, test_api_connectivity, api_config,
                     st.write(f"- {info}")
             
             # Check file sizes before processing
-            oversized_files = [f.name for f in uploaded_files if f.size > processing_config['max_file_size_mb'] * 1024 * 1024]
+            oversized_files = [f.name for f in resume_uploads if f.size > processing_config['max_file_size_mb'] * 1024 * 1024]
             if oversized_files:
                 st.warning(f"⚠️ The following files exceed the maximum size limit ({processing_config['max_file_size_mb']}MB): {', '.join(oversized_files)}")
+        
+        # Local skill pre-screen - resumes covering too few JD skills are never sent to the API
+        prescreen_min_coverage = prescreen_top_k = None
+        if st.checkbox("Pre-screen by JD skill coverage", value=processing_config['prescreen_enabled'],
+                       help="Score resumes locally against the JD skill list and only send the best matches for AI analysis"):
+            pcol1, pcol2 = st.columns(2)
+            with pcol1:
+                prescreen_min_coverage = st.slider(
+                    "Minimum skill coverage (%)", 0, 100, int(processing_config['prescreen_min_coverage'] * 100)) / 100
+            with pcol2:
+                prescreen_top_k = st.number_input(
+                    "Analyze only the top K resumes (0 = all)", min_value=0, value=processing_config['prescreen_top_k'], step=1)
+        
+        # Near-duplicate grouping - copies of the same resume (PDF + DOCX, small edits) are analyzed once
+        dedupe_threshold = None
+        if st.checkbox("Analyze near-duplicate resumes only once", value=processing_config['dedupe_enabled'],
+                       help="Resumes whose text is at least this similar reuse the analysis of the first copy; "
+                            "the 'Duplicate Of' column shows the grouping"):
+            dedupe_threshold = st.slider(
+                "Duplicate similarity (%)", 50, 100, int(processing_config['dedupe_threshold'] * 100)) / 100
+        
+        # Packing - short resumes share one request and its instruction block
+        pack_size = None
+        if st.checkbox("Pack short resumes into shared requests", value=processing_config['pack_enabled'],
+                       help=f"Resumes of up to {processing_config['pack_max_resume_tokens']} tokens are analyzed "
+                            "several at a time; not used with streaming or several job descriptions"):
+            pack_size = st.slider("Resumes per request", 2, 10, max(2, processing_config['pack_max_resumes']))
+        
+        # Hedging - a request slower than most of the batch is sent again and the first reply wins
+        hedge_percentile = deadline_seconds = None
+        if st.checkbox("Hedge slow requests", value=api_config['hedge_enabled'],
+                       help=f"Costs at most {api_config['hedge_max_extra_fraction']:.0%} extra requests "
+                            f"({api_config['hedge_late_max_extra_fraction']:.0%} once past the deadline); "
+                            "streamed replies are never hedged"):
+            hcol1, hcol2 = st.columns(2)
+            with hcol1:
+                hedge_percentile = st.slider(
+                    "Resend after this latency percentile", 50, 99, int(api_config['hedge_percentile'] * 100)) / 100
+            with hcol2:
+                deadline_seconds = st.number_input(
+                    "Batch deadline in seconds (0 = none)", min_value=0, value=int(api_config['deadline_seconds'] or 0),
+                    step=30, help="Past the deadline, remaining requests are hedged from the median latency") or None
+        
+        # Streaming - names and scores appear while the model is still writing; low scorers can be cut short
+        model_kwargs = dict(api_config['model_kwargs'], early_stop_score=0)
+        if st.checkbox("Stream responses", value=api_config['model_kwargs']['streaming'],
+                       help="Show candidate names and scores as soon as the model writes them"):
+            model_kwargs['streaming'] = True
+            if not multi_jd:
+                model_kwargs['early_stop_score'] = st.number_input(
+                    "Stop generating once the score is below (0 = never)", min_value=0.0, max_value=10.0,
+                    value=float(api_config['model_kwargs']['early_stop_score']), step=0.5,
+                    help="Saves time and output tokens on weak matches; their strengths and gaps are not analyzed")
+        else:
+            model_kwargs['streaming'] = False
     
     with col2:
         # API Connection status - only test periodically to improve performance
@@ -82,12 +264,43 @@ def run_ui(job_descriptions, process_resumes, test_api_connectivity, api_config,
                 with st.spinner("Checking API connection..."):
                     st.session_state.api_status = test_api_connectivity(api_config['url'], api_config['headers'])
                     st.session_state.api_status_last_check = current_time
-                st.experimental_rerun()
+                st.rerun()
+        
+        latest_job = job_queue.get(st.session_state.job_id) if st.session_state.job_id else None
+        job_metrics = latest_job['metrics'] if latest_job else None
+        
+        # Analysis cache - repeat analyses are served from disk instead of the API
+        analysis_cache = None
+        if processing_config['cache_enabled']:
+            analysis_cache = get_analysis_cache(
+                processing_config['cache_dir'],
+                processing_config['cache_max_size_mb'],
+                processing_config['cache_max_age_days']
+            )
+            use_cache = st.checkbox("Use analysis cache", value=True, help="Uncheck to force fresh API calls for every resume")
+            # Entries and size come from the shared cache file; hits and API pacing happen in the worker process,
+            # so they are read from the metrics it reports for the latest job
+            cache_stats = analysis_cache.stats()
+            lookups = _counters(job_metrics).get('cache_lookups_total', {}) if job_metrics else {}
+            st.caption(
+                f"Cache: {cache_stats['entries']} entries ({cache_stats['size_mb']:.1f} MB)"
+                + (f", last job {lookups.get('hit', 0)} hits / {lookups.get('miss', 0)} misses" if lookups else "")
+            )
+            if not use_cache:
+                analysis_cache = None
+        
+        if api_config['requests_per_minute']:
+            waits = [histogram for histogram in job_metrics['histograms']
+                     if histogram['name'] == 'rate_limit_wait_seconds' and histogram['count']] if job_metrics else []
+            st.caption(
+                f"Shared API budget: {api_config['requests_per_minute']:.0f} req/min"
+                + (f", last job waited p95 {waits[0]['p95']:.1f}s for a slot" if waits else "")
+            )
     
     # Process Button
     analyze_button = st.button(
         "Analyze Resumes", 
-        disabled=(not uploaded_files or not api_status),
+        disabled=(not uploaded_files or not api_status or not selected_jd),
         use_container_width=True,
         type="primary"
     )
@@ -95,125 +308,125 @@ def run_ui(job_descriptions, process_resumes, test_api_connectivity, api_config,
     # Processing status section
     status_container = st.container()
     
-    # Handle analysis process
+    # Batches run in a background worker process; the page only queues them and polls their progress by job id,
+    # so widget interactions, reloads and disconnects no longer interrupt the analysis
     if analyze_button and uploaded_files:
-        # Reset state
-        st.session_state.processing_status = "running"
-        st.session_state.files_to_process = len(uploaded_files)
-        st.session_state.files_processed = 0
-        
-        # Create a placeholder for manual progress tracking
-        progress_bar = st.progress(0)
-        status_message = st.empty()
-        status_message.text(f"Starting analysis of {len(uploaded_files)} resumes...")
-        
-        # Process in the main thread since we can't modify the process_resumes function
+        selected_keys = [selected_jd] if isinstance(selected_jd, str) else list(selected_jd)
+        params = {
+            "selected_jd": selected_jd,
+            "job_descriptions": {key: job_descriptions[key] for key in selected_keys},
+            "jd_label": jd_label,
+            "model_kwargs": {"streaming": model_kwargs['streaming'], "early_stop_score": model_kwargs['early_stop_score']},
+            "prescreen_min_coverage": prescreen_min_coverage or None,
+            "prescreen_top_k": prescreen_top_k or None,
+            "dedupe_threshold": dedupe_threshold,
+            "pack_size": pack_size,
+            "hedge_percentile": hedge_percentile,
+            "deadline_seconds": deadline_seconds,
+            "use_cache": analysis_cache is not None
+        }
         try:
-            # Display estimated time
-            est_time = len(uploaded_files) * (api_config['request_delay'] + 3)  # rough estimate
-            status_message.text(f"Analyzing {len(uploaded_files)} resumes against '{selected_jd}' job description... (Est. time: ~{est_time} seconds)")
-            
-            # Process resumes (original function)
-            df = process_resumes(
-                uploaded_files, 
-                selected_jd,
-                job_descriptions,
-                api_config['url'],
-                api_config['headers'],
-                processing_config['max_file_size_mb'],
-                api_config['request_delay']
-            )
-            
-            if df is not None and not df.empty:
-                # Reorder columns according to the requested order
-                ordered_columns = [
-                    "Candidate Name", "Years of Experience", "JD Analyzed Against", 
-                    "Most Recent Role", "Fitment Score", "Relevant Skills Matching JD",
-                    "Strengths", "Gaps/Weaknesses", "Education Level", "File Name"
-                ]
-                
-                # Make sure all columns exist (defensive programming)
-                available_columns = set(df.columns)
-                ordered_columns = [col for col in ordered_columns if col in available_columns]
-                
-                # Add any columns that might be in the dataframe but not in our ordered list at the end
-                missing_columns = [col for col in df.columns if col not in ordered_columns]
-                final_columns = ordered_columns + missing_columns
-                
-                # Reorder the DataFrame
-                df = df[final_columns]
-                
-                st.session_state.results_df = df
-                st.session_state.processing_status = "complete"
-                progress_bar.progress(100)
-                status_message.success(f"✅ Analysis completed for {len(df)} resumes!")
-            else:
-                st.session_state.processing_status = "failed"
-                progress_bar.empty()
-                status_message.error("❌ No results generated. Check logs for errors.")
+            job_id = job_queue.submit(uploaded_files, params, st.session_state.session_id)
         except Exception as e:
-            st.session_state.processing_status = "failed"
-            progress_bar.empty()
-            status_message.error(f"❌ Error during processing: {str(e)}")
-            st.error(f"Error details: {str(e)}")
+            st.error(f"❌ Could not queue the analysis: {str(e)}")
+        else:
+            st.session_state.job_id = st.session_state.run_id = job_id
+            st.session_state.exports = {}
+            st.query_params["job"] = job_id
+            _ensure_worker(job_queue, processing_config)
+    
+    job = job_queue.get(st.session_state.job_id) if st.session_state.job_id else None
+    if job and job['status'] in ACTIVE_STATES:
+        # Only this fragment reruns while polling; a full rerun happens once the job finishes
+        @st.fragment(run_every=processing_config['jobs_poll_seconds'])
+        def job_progress():
+            job = job_queue.get(st.session_state.job_id)
+            if job['status'] not in ACTIVE_STATES:
+                st.rerun()
+            jd_label = job['params'].get('jd_label', 'the selected job description')
+            if job['status'] == 'queued':
+                st.info(f"⏳ Analysis of {job['total']} uploads against {jd_label} is queued and will start when a worker is free.")
+                if not job_queue.active_workers():
+                    st.warning("No background worker is running. Start one with `python -m src.cli worker`.")
+                    _ensure_worker(job_queue, processing_config)
+            else:
+                total = max(job['total'], job['processed'])
+                st.progress(int(job['processed'] * 100 / total) if total else 0)
+                per_resume = _stage_mean(job['metrics'], 'analyze_seconds') if job['metrics'] else None
+                remaining = f", ~{(total - job['processed']) * per_resume / max(1, api_config['max_concurrency']):.0f}s left" \
+                    if per_resume else ""
+                state = "Cancelling" if job['status'] == 'cancelling' else "Analyzed"
+                st.text(f"{state} {job['processed']}/{total} resumes against {jd_label} "
+                        f"({job['failed']} failed, {job['skipped']} skipped by pre-screen{remaining})...")
+                streaming_rows = job['progress'].get('streaming_rows')
+                if streaming_rows:
+                    st.dataframe(pd.DataFrame(streaming_rows), use_container_width=True)
+                recent_df = results_store.query(sort="Most Recent", limit=10, run_id=job['id'])
+                if not recent_df.empty:
+                    st.dataframe(recent_df.drop(columns=NUMERIC_COLUMNS, errors='ignore'), use_container_width=True)
+                if job['metrics']:
+                    st.caption(_metrics_summary(job['metrics']))
+            if job['status'] != 'cancelling' and st.button("Cancel analysis", key="cancel_job"):
+                job_queue.cancel(job['id'])
+                st.rerun()
+        
+        with status_container:
+            job_progress()
+    elif job:
+        with status_container:
+            _job_summary(job)
     
-    # Show results if available
-    if st.session_state.results_df is not None:
+    # Show results if available - filters, sorting and paging run as indexed queries against the results store
+    if st.session_state.run_id or results_store.count():
         st.subheader("Analysis Results")
         
-        df = st.session_state.results_df
+        scope_options = (["This run"] if st.session_state.run_id else []) + ["All history"]
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            scope = st.radio("Show", scope_options, horizontal=True)
+        filters = {"run_id": st.session_state.run_id if scope == "This run" else None}
+        with col2:
+            if scope == "All history":
+                jd_filter = st.selectbox("Job description", ["All"] + results_store.job_descriptions())
+                filters["jd"] = None if jd_filter == "All" else jd_filter
+        with col3:
+            filters["search"] = st.text_input("Search candidate or file name").strip() or None
         
-        # Add filtering options
+        total_count = results_store.count(**filters)
+        bounds = results_store.bounds(**filters)
         col1, col2 = st.columns(2)
         with col1:
-            # Convert fitment score to numeric if possible for filtering
-            if 'Fitment Score' in df.columns:
-                # Extract numeric values when possible
-                try:
-                    df['Score_Numeric'] = df['Fitment Score'].str.extract(r'(\d+)').astype(float)
-                    min_score = int(df['Score_Numeric'].min() if not df['Score_Numeric'].isna().all() else 0)
-                    max_score = int(df['Score_Numeric'].max() if not df['Score_Numeric'].isna().all() else 100)
+            min_score, max_score = bounds['score']
+            if min_score is not None:
+                min_score, max_score = int(min_score), int(math.ceil(max_score))
+                if max_score > min_score:
                     filter_score = st.slider("Filter by Fitment Score", min_score, max_score, min_score)
-                    filtered_df = df[df['Score_Numeric'] >= filter_score]
-                except:
-                    filtered_df = df
-            else:
-                filtered_df = df
+                    if filter_score > min_score:
+                        filters["min_score"] = filter_score
         
         with col2:
-            if 'Years of Experience' in df.columns:
-                # Try to extract years of experience as numeric
-                try:
-                    df['Experience_Years'] = df['Years of Experience'].str.extract(r'(\d+)').astype(float)
-                    min_exp = int(df['Experience_Years'].min() if not df['Experience_Years'].isna().all() else 0)
-                    max_exp = int(df['Experience_Years'].max() if not df['Experience_Years'].isna().all() else 20)
+            min_exp, max_exp = bounds['experience']
+            if min_exp is not None:
+                min_exp, max_exp = int(min_exp), int(math.ceil(max_exp))
+                if max_exp > min_exp:
                     filter_exp = st.slider("Filter by Years of Experience", min_exp, max_exp, min_exp)
-                    filtered_df = filtered_df[filtered_df['Experience_Years'] >= filter_exp]
-                except:
-                    pass
+                    if filter_exp > min_exp:
+                        filters["min_experience"] = filter_exp
         
         # Sort options
-        sort_col = st.selectbox(
-            "Sort results by",
-            options=['Fitment Score', 'Years of Experience', 'Candidate Name', 'File Name'],
-            index=0
-        )
+        col1, col2 = st.columns([3, 1])
+        with col1:
+            sort_col = st.selectbox("Sort results by", options=list(SORT_ORDERS), index=0)
         
-        # Try to sort based on numeric values when possible
-        try:
-            if sort_col == 'Fitment Score' and 'Score_Numeric' in filtered_df.columns:
-                filtered_df = filtered_df.sort_values('Score_Numeric', ascending=False)
-            elif sort_col == 'Years of Experience' and 'Experience_Years' in filtered_df.columns:
-                filtered_df = filtered_df.sort_values('Experience_Years', ascending=False)
-            else:
-                filtered_df = filtered_df.sort_values(sort_col)
-        except:
-            pass
-            
-        # Display filtered dataframe (hide intermediate columns)
-        display_df = filtered_df.drop(columns=['Score_Numeric', 'Experience_Years'] 
-                                  if 'Score_Numeric' in filtered_df.columns and 'Experience_Years' in filtered_df.columns 
-                                  else [])
+        matching_count = results_store.count(**filters)
+        page_size = processing_config['results_page_size']
+        page_count = max(1, math.ceil(matching_count / page_size))
+        with col2:
+            page = st.number_input(f"Page (of {page_count})", min_value=1, max_value=page_count, value=1, step=1)
+        
+        # Only the visible page is loaded into memory
+        page_df = results_store.query(sort=sort_col, limit=page_size, offset=(page - 1) * page_size, **filters)
+        display_df = page_df.drop(columns=NUMERIC_COLUMNS, errors='ignore')
         
         # Use st.dataframe with fixed height for better performance
         st.dataframe(
@@ -222,66 +435,86 @@ def run_ui(job_descriptions, process_resumes, test_api_connectivity, api_config,
             height=400
         )
         
-        st.write(f"Showing {len(filtered_df)} of {len(df)} resumes")
+        first_row = (page - 1) * page_size + 1 if matching_count else 0
+        st.write(f"Showing {first_row}-{first_row + len(page_df) - 1 if matching_count else 0} of {matching_count} "
+                 f"matching resumes ({total_count} in {scope.lower()})")
         
-        # Download options
-        col1, col2 = st.columns(2)
-        with col1:
-            # Create Excel buffer
-            output_excel = BytesIO()
-            with pd.ExcelWriter(output_excel, engine='xlsxwriter') as writer:
-                display_df.to_excel(writer, sheet_name='Resume Analysis', index=False)
-            output_excel.seek(0)
-            
-            st.download_button(
-                label="📊 Download as Excel",
-                data=output_excel,
-                file_name=processing_config['output_excel'],
-                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                use_container_width=True
-            )
+        # Candidate x JD score matrix for multi-JD runs
+        jd_score_columns = [col for col in display_df.columns if col.endswith(' Fitment Score') and col != 'Fitment Score']
+        if jd_score_columns:
+            st.subheader("Fitment Score by Job Description")
+            score_matrix = display_df[jd_score_columns].copy()
+            score_matrix.columns = [col[:-len(' Fitment Score')] for col in jd_score_columns]
+            score_matrix.index = display_df['Candidate Name'] + ' (' + display_df['File Name'] + ')'
+            st.dataframe(score_matrix, use_container_width=True)
         
-        with col2:
-            # Create CSV buffer (more lightweight)
-            output_csv = BytesIO()
-            display_df.to_csv(output_csv, index=False)
-            output_csv.seek(0)
-            
-            st.download_button(
-                label="📄 Download as CSV",
-                data=output_csv,
-                file_name=processing_config['output_excel'].replace('.xlsx', '.csv'),
-                mime="text/csv",
-                use_container_width=True
-            )
+        # Exports cover every matching result, are built only when requested and are memoized per filtered result set
+        @st.cache_data(max_entries=8, show_spinner=False)
+        def build_export(db_path, store_version, export_format, sort, filter_items):
+            # store_version is part of the cache key so newly saved results invalidate old exports
+            store = get_results_store(db_path)
+            filters = dict(filter_items)
+            columns = export_columns(store.iter_rows(sort, **filters), exclude=NUMERIC_COLUMNS)
+            rows = store.iter_rows(sort, **filters)
+            return write_excel(rows, columns) if export_format == 'xlsx' else write_csv(rows, columns)
+        
+        export_key = (results_store.version(), sort_col, tuple(sorted(filters.items())))
+        export_formats = [
+            ('xlsx', "Excel", "📊 Download as Excel", processing_config['output_excel'],
+             "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+            ('csv', "CSV", "📄 Download as CSV", processing_config['output_excel'].replace('.xlsx', '.csv'), "text/csv")
+        ]
+        for column, (export_format, format_name, label, file_name, mime) in zip(st.columns(2), export_formats):
+            with column:
+                prepared = st.session_state.exports.get(export_format)
+                if (not prepared or prepared[0] != export_key) and st.button(
+                        f"Prepare {format_name} export ({matching_count} rows)", key=f"prepare_{export_format}",
+                        use_container_width=True):
+                    with st.spinner(f"Building {format_name} export..."):
+                        data = build_export(processing_config['results_db_path'], export_key[0], export_format,
+                                            sort_col, export_key[2])
+                    # Only the latest export per format is kept in the session
+                    prepared = st.session_state.exports[export_format] = (export_key, data)
+                if prepared and prepared[0] == export_key:
+                    st.download_button(
+                        label=label,
+                        data=prepared[1],
+                        file_name=file_name,
+                        mime=mime,
+                        use_container_width=True
+                    )
 
-    # Display Logs efficiently (just last 20 lines to avoid memory issues)
-    with st.expander("View Recent Logs"):
-        log_file = Path('logs') / 'resume_processor.log'
-        if log_file.exists():
-            try:
-                # More efficient log reading - grab just the last N lines
-                with open(log_file, 'r') as f:
-                    # Get approximate file size to avoid loading huge logs
-                    f.seek(0, 2)  # Go to end of file
-                    file_size = f.tell()
-                    
-                    # If file is too big, just read the last portion
-                    if file_size > 50000:  # ~50KB limit
-                        f.seek(max(file_size - 50000, 0))
-                        # Discard first incomplete line
-                        f.readline()
-                        log_content = f.read()
-                    else:
-                        f.seek(0)
-                        log_content = f.read()
-                
-                # Limit to last 20 lines for display
-                last_lines = log_content.split('\n')[-20:]
-                st.code('\n'.join(last_lines), language="text")
-            except Exception as e:
-                st.error(f"Error reading logs: {e}")
+    # Where batch time goes: per-stage timings and counters from the worker that ran this session's batch
+    with st.expander("Performance Metrics"):
+        if job and job['metrics']:
+            snapshot, metrics_json, metrics_prom = job['metrics'], json.dumps(job['metrics'], indent=2), job['metrics_prom']
         else:
+            snapshot, metrics_json, metrics_prom = get_metrics().snapshot(), get_metrics().to_json(), get_metrics().to_prometheus()
+        if snapshot['histograms'] or snapshot['counters']:
+            st.caption(_metrics_summary(snapshot))
+            st.dataframe(_metrics_frame(snapshot), use_container_width=True, hide_index=True)
+            mcol1, mcol2 = st.columns(2)
+            with mcol1:
+                st.download_button("Download metrics (JSON)", data=metrics_json, file_name="metrics.json",
+                                   mime="application/json", use_container_width=True)
+            with mcol2:
+                st.download_button("Download metrics (Prometheus)", data=metrics_prom,
+                                   file_name="metrics.prom", mime="text/plain", use_container_width=True)
+        else:
+            st.info("No metrics recorded yet.")
+    
+    # Display the last 20 log lines, continuing into rotated backups when the live file was just rolled over
+    with st.expander("View Recent Logs"):
+        log_sources = {"Web app": processing_config['log_file'], "Background worker": latest_process_log(processing_config['worker_log_file'])}
+        log_source = st.radio("Log", list(log_sources), horizontal=True, label_visibility="collapsed")
+        try:
+            last_lines = tail_log(log_sources[log_source], lines=20)
+        except Exception as e:
+            last_lines = None
+            st.error(f"Error reading logs: {e}")
+        if last_lines:
+            st.code('\n'.join(last_lines), language="text")
+        elif last_lines is not None:
             st.info("No logs available yet.")
     
     # Footer
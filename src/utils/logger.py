@@ -1,15 +1,153 @@
+import atexit
 import logging
+import multiprocessing
+import os
+import random
+import socket
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from pathlib import Path
 
-def setup_logging():
-    LOG_DIR = Path('logs')
-    LOG_DIR.mkdir(exist_ok=True)
-
-    logging.basicConfig(
-        level=logging.DEBUG,
-        format='%(asctime)s - %(levelname)s - %(message)s',
-        handlers=[
-            logging.FileHandler(LOG_DIR / 'resume_processor.log'),
-            logging.StreamHandler()
-        ]
-    )
\ No newline at end of file
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+DEFAULT_LOGGING = {
+    'log_file': 'logs/resume_processor.log',
+    'worker_log_file': 'logs/worker.log',
+    'screen_log_file': 'logs/screen.log',
+    'benchmark_log_file': 'logs/benchmark.log',
+    'keep_process_logs': 10,
+    'log_level': 'INFO',
+    'console_level': 'INFO',
+    'module_levels': {'urllib3': 'WARNING', 'pdfminer': 'WARNING', 'pdfplumber': 'WARNING'},
+    'max_size_mb': 10,
+    'backup_count': 5,
+    'max_message_chars': 2000,
+    'payload_sample_rate': 0.05,
+    'max_payload_chars': 300
+}
+
+_listener = None
+_log_queue = None
+_levels = (None, {})
+_payload_settings = {'sample_rate': DEFAULT_LOGGING['payload_sample_rate'], 'max_chars': DEFAULT_LOGGING['max_payload_chars']}
+
+class _TruncatingFormatter(logging.Formatter):
+    def __init__(self, fmt, max_message_chars):
+        super().__init__(fmt)
+        self.max_message_chars = max_message_chars
+
+    def format(self, record):
+        message = super().format(record)
+        if self.max_message_chars and len(message) > self.max_message_chars:
+            message = f"{message[:self.max_message_chars]}... [{len(message) - self.max_message_chars} more chars]"
+        return message
+
+def _apply_levels(level, module_levels):
+    logging.getLogger().setLevel(level)
+    for name, module_level in module_levels.items():
+        logging.getLogger(name).setLevel(module_level)
+
+def setup_logging(logging_config=None, log_file=None):
+    # Callers only put records on a queue; formatting and file I/O happen on the listener thread.
+    # Repeat calls (Streamlit reruns the script on every interaction) keep the first configuration
+    global _listener, _log_queue, _levels
+    if _listener is not None:
+        return
+    config = dict(DEFAULT_LOGGING, **(logging_config or {}))
+    log_path = Path(log_file or config['log_file'])
+    log_path.parent.mkdir(parents=True, exist_ok=True)
+
+    formatter = _TruncatingFormatter(LOG_FORMAT, config['max_message_chars'])
+    file_handler = RotatingFileHandler(log_path, maxBytes=int(config['max_size_mb'] * 1024 * 1024),
+                                       backupCount=config['backup_count'], encoding='utf-8')
+    console_handler = logging.StreamHandler()
+    console_handler.setLevel(config['console_level'])
+    for handler in (file_handler, console_handler):
+        handler.setFormatter(formatter)
+
+    # A process-safe queue so extraction worker processes log through the same listener and rotating file
+    _log_queue = multiprocessing.Queue(-1)
+    _listener = QueueListener(_log_queue, file_handler, console_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
+
+    root = logging.getLogger()
+    root.handlers[:] = [QueueHandler(_log_queue)]
+    _levels = (config['log_level'], config['module_levels'])
+    _apply_levels(*_levels)
+    _payload_settings.update(sample_rate=config['payload_sample_rate'], max_chars=config['max_payload_chars'])
+
+def child_logging_initializer():
+    # (initializer, initargs) for process pools, or (None, ()) when logging was never set up
+    if _log_queue is None:
+        return None, ()
+    return _configure_child_logging, (_log_queue, *_levels, dict(_payload_settings))
+
+def _configure_child_logging(log_queue, level, module_levels, payload_settings):
+    logging.getLogger().handlers[:] = [QueueHandler(log_queue)]
+    _apply_levels(level, module_levels)
+    _payload_settings.update(payload_settings)
+
+def log_payload(logger, label, payload):
+    # Resume samples and raw API replies are only built when DEBUG is on, then sampled and truncated
+    if not logger.isEnabledFor(logging.DEBUG) or random.random() >= _payload_settings['sample_rate']:
+        return
+    text = str(payload)
+    limit = _payload_settings['max_chars']
+    logger.debug(f"{label}: {text[:limit]}{'...' if len(text) > limit else ''}")
+
+def process_log_file(log_file, process_id):
+    # One file per process: RotatingFileHandler cannot safely share a file between processes
+    path = Path(log_file)
+    return path.with_name(f"{path.stem}-{process_id}{path.suffix}")
+
+def _process_logs(log_file):
+    path = Path(log_file)
+    logs = []
+    for log in path.parent.glob(f"{path.stem}-*{path.suffix}"):
+        try:
+            logs.append((log.stat().st_mtime, log))
+        except OSError:
+            continue
+    return [log for _, log in sorted(logs, reverse=True)]
+
+def latest_process_log(log_file):
+    # The most recently written per-process log, or the configured name when no process has logged yet
+    return next(iter(_process_logs(log_file)), Path(log_file))
+
+def prune_process_logs(log_file, keep):
+    # Every run gets a new pid and so a new file; only the newest `keep` logs and their backups are kept
+    path = Path(log_file)
+    kept = {log.name for log in _process_logs(log_file)[:keep]}
+    for log in path.parent.glob(f"{path.stem}-*{path.suffix}*"):
+        live_name = log.name if log.suffix == path.suffix else log.name[:-len(log.suffix)]
+        if live_name not in kept:
+            try:
+                log.unlink()
+            except OSError:
+                pass
+
+def setup_process_logging(logging_config, log_file):
+    # For command-line processes that may run alongside the web app and each other
+    prune_process_logs(log_file, logging_config.get('keep_process_logs', DEFAULT_LOGGING['keep_process_logs']))
+    setup_logging(logging_config, process_log_file(log_file, f"{socket.gethostname()}-{os.getpid()}"))
+
+def tail_log(log_file, lines=20, max_bytes=50000):
+    # Last lines across the live file and its rotated backups (.1 is the most recent backup)
+    log_path = Path(log_file)
+    paths = [log_path] + sorted(log_path.parent.glob(log_path.name + '.[0-9]*'),
+                                key=lambda path: int(path.suffix[1:]) if path.suffix[1:].isdigit() else 0)
+    collected = []
+    for path in paths:
+        if len(collected) >= lines or not path.exists():
+            break
+        with open(path, 'rb') as f:
+            f.seek(0, 2)
+            size = f.tell()
+            f.seek(max(size - max_bytes, 0))
+            chunk = f.read().decode('utf-8', errors='replace')
+        file_lines = chunk.splitlines()
+        if size > max_bytes and file_lines:
+            # The first line was cut mid-way by the seek
+            file_lines = file_lines[1:]
+        collected = file_lines + collected
+    return collected[-lines:]
@@ -0,0 +1,30 @@
+from src.api.cache import AnalysisCache, make_cache_key
+from src.benchmark.corpus import generate_corpus
+from src.benchmark.mock_gateway import MockGateway
+from src.models.job_descriptions import JOB_DESCRIPTIONS
+from src.processing.resume_processor import iter_resumes
+
+JD_KEY = next(iter(JOB_DESCRIPTIONS))
+
+def _screen(gateway, cache):
+    return list(iter_resumes(generate_corpus(3, ("txt",), 1, 1), JD_KEY, JOB_DESCRIPTIONS, gateway.url, {}, 10, 0,
+                             cache=cache))
+
+def test_unscored_replies_are_neither_cached_nor_counted_as_analyzed(tmp_path):
+    cache = AnalysisCache(tmp_path)
+    with MockGateway(latency_ms=0, malformed_rate=1.0) as gateway:
+        events = _screen(gateway, cache)
+    assert [event["row"] for event in events] == [None, None, None]
+    assert cache.stats()["entries"] == 0
+
+    with MockGateway(latency_ms=0) as gateway:
+        events = _screen(gateway, cache)
+        assert gateway.counts["requests"] == 3
+    assert all(event["row"]["Score_Numeric"] is not None for event in events)
+    assert cache.stats()["entries"] == 3
+
+def test_streaming_shares_cache_entries_unless_early_stop_is_set():
+    key = lambda **model_kwargs: make_cache_key("resume", "JD", "Python", "model", dict(temperature=0.5, **model_kwargs))
+    assert key(streaming=False, early_stop_score=0) == key(streaming=True, early_stop_score=0)
+    assert key(streaming=False, early_stop_score=6) == key(streaming=True, early_stop_score=0)
+    assert key(streaming=True, early_stop_score=6) != key(streaming=False, early_stop_score=6)
@@ -0,0 +1,17 @@
+import tempfile
+import zipfile
+
+from src.processing.archive_reader import ResumeArchive
+
+def test_spooled_zip_is_read_in_place(tmp_path, monkeypatch):
+    path = tmp_path / "upload.zip"
+    with zipfile.ZipFile(path, 'w') as archive:
+        archive.writestr("alice.txt", "Python developer")
+    monkeypatch.setattr(tempfile, "mkstemp", lambda **kwargs: _fail("spooled ZIP was copied"))
+    with ResumeArchive(path, ['.txt'], 10, name="resumes.zip") as archive:
+        assert archive.name == "resumes.zip"
+        assert [member.read() for member in archive.members] == [b"Python developer"]
+    assert path.exists()
+
+def _fail(message):
+    raise AssertionError(message)
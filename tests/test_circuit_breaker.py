@@ -0,0 +1,26 @@
+import pytest
+import requests
+
+from src.api import client
+from src.api.client import CircuitBreaker, post_with_retries
+
+def test_non_retryable_request_error_reopens_a_half_open_circuit(monkeypatch):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    breaker.record_failure()
+    monkeypatch.setattr(client, "_circuit_breaker", breaker)
+    monkeypatch.setattr(client, "get_rate_governor", lambda: None)
+    with pytest.raises(requests.exceptions.InvalidURL):
+        post_with_retries("http://[invalid", {}, {"messages": []})
+    assert breaker.state == "open"
+
+def test_a_probe_that_never_reports_back_is_replaced(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr(client.time, "monotonic", lambda: now[0])
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+    breaker.record_failure()
+    now[0] = 30
+    assert breaker.allow_request()
+    now[0] = 45
+    assert not breaker.allow_request()
+    now[0] = 60
+    assert breaker.allow_request()
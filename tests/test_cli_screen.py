@@ -0,0 +1,64 @@
+import os
+
+import pandas as pd
+import pytest
+
+from src.benchmark.corpus import generate_corpus, write_corpus
+from src.benchmark.mock_gateway import MockGateway
+from src.cli import build_parser
+from src.models.job_descriptions import JOB_DESCRIPTIONS
+
+JD_KEY = next(iter(JOB_DESCRIPTIONS))
+
+@pytest.fixture
+def gateway():
+    with MockGateway(latency_ms=0) as gateway:
+        yield gateway
+
+@pytest.fixture
+def resume_dir(tmp_path):
+    write_corpus(generate_corpus(8, ("txt",), 1, 2), tmp_path / "resumes")
+    return tmp_path / "resumes"
+
+def _screen(tmp_path, gateway, resume_dir, output="results.csv", *extra):
+    config_path = tmp_path / "config.ini"
+    config_path.write_text(
+        f"[API]\nurl = {gateway.url}\nkey = k\nmax_tokens = 250\ntemperature = 0.5\ntop_p = 0.9\nrequest_delay = 0\n"
+        f"[PROCESSING]\nsupported_extensions = .txt\nmax_file_size_mb = 10\n[CACHE]\nenabled = false\n"
+        f"[JOBS]\ndb_path = {tmp_path / 'jobs.sqlite3'}\n"
+    )
+    args = build_parser().parse_args(["screen", "--dir", str(resume_dir), "--jd", JD_KEY, "--output",
+                                      str(tmp_path / output), "--config", str(config_path), *extra])
+    requests_before = gateway.counts["requests"]
+    assert args.func(args) == 0
+    return gateway.counts["requests"] - requests_before, pd.read_csv(tmp_path / output)
+
+def test_rerun_resumes_from_the_journal(tmp_path, gateway, resume_dir):
+    requests, results = _screen(tmp_path, gateway, resume_dir)
+    assert requests == 8 and len(results) == 8
+    requests, results = _screen(tmp_path, gateway, resume_dir)
+    assert requests == 0 and len(results) == 8
+
+def test_torn_last_journal_line_is_skipped_and_its_resume_screened_again(tmp_path, gateway, resume_dir):
+    _screen(tmp_path, gateway, resume_dir)
+    journal = tmp_path / "results.csv.journal.jsonl"
+    text = journal.read_text(encoding="utf-8")
+    journal.write_text(text[:text.rstrip("\n").rfind("\n") + 1] + text.rstrip("\n").rsplit("\n", 1)[1][:40],
+                       encoding="utf-8")
+    requests, results = _screen(tmp_path, gateway, resume_dir)
+    assert requests == 1 and len(results) == 8
+
+def test_changed_files_are_screened_again(tmp_path, gateway, resume_dir):
+    _screen(tmp_path, gateway, resume_dir)
+    changed = sorted(resume_dir.iterdir())[0]
+    stat = changed.stat()
+    os.utime(changed, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    requests, results = _screen(tmp_path, gateway, resume_dir)
+    assert requests == 1 and len(results) == 8
+
+def test_shards_split_the_directory_without_overlap(tmp_path, gateway, resume_dir):
+    shards = [set(_screen(tmp_path, gateway, resume_dir, f"shard{index}.csv", "--shard", f"{index}/2")[1]["File Path"])
+              for index in range(2)]
+    assert shards[0] and shards[1]
+    assert not shards[0] & shards[1]
+    assert shards[0] | shards[1] == {path.name for path in resume_dir.iterdir()}
@@ -0,0 +1,27 @@
+import time
+
+import pytest
+
+from src.api.hedging import HedgePolicy
+
+def _run_batch(policy, requests=20):
+    # Warm up the latency window with enough fast calls that the slow ones, and their duplicates, never move
+    # the median, so every slow call outlives the hedge delay
+    try:
+        for _ in range(60):
+            policy.run(lambda: "fast")
+        for _ in range(requests):
+            policy.run(lambda: time.sleep(0.1) or "slow")
+        return policy.stats()["hedged"]
+    finally:
+        policy.close()
+
+@pytest.mark.parametrize("deadline_seconds", [None, 0.001])
+def test_a_late_batch_hedges_more_but_stays_within_its_own_cap(deadline_seconds):
+    policy = HedgePolicy(percentile=0.5, max_extra_fraction=0.05, late_max_extra_fraction=0.2, min_samples=5,
+                         min_delay_seconds=0.01, deadline_seconds=deadline_seconds)
+    hedged = _run_batch(policy)
+    if deadline_seconds is None:
+        assert hedged <= 0.05 * policy.requests
+    else:
+        assert 0.05 * policy.requests < hedged <= 0.2 * policy.requests
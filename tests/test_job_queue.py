@@ -0,0 +1,23 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from src.config.config_loader import load_config
+from src.processing.job_queue import JobQueue
+
+def test_only_one_session_may_autostart_a_worker(tmp_path):
+    queues = [JobQueue(tmp_path / "jobs.sqlite3", tmp_path / "spool") for _ in range(8)]
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        reserved = list(executor.map(JobQueue.reserve_worker_start, queues))
+    assert reserved.count(True) == 1
+
+def test_no_autostart_while_a_worker_is_heartbeating(tmp_path):
+    job_queue = JobQueue(tmp_path / "jobs.sqlite3", tmp_path / "spool", stale_after_seconds=0.01)
+    job_queue.heartbeat_worker("worker")
+    assert not JobQueue(tmp_path / "jobs.sqlite3", tmp_path / "spool").reserve_worker_start()
+
+def test_workers_share_a_rate_limit_state_file_by_default(tmp_path):
+    config_path = tmp_path / "config.ini"
+    config_path.write_text("[API]\nurl = http://localhost\nkey = k\nmax_tokens = 250\ntemperature = 0.5\ntop_p = 0.9\n"
+                           "request_delay = 0\n[JOBS]\ndb_path = data/jobs.sqlite3\n"
+                           "[PROCESSING]\nsupported_extensions = .txt\nmax_file_size_mb = 10\n")
+    api_config, _ = load_config(config_path)
+    assert api_config['rate_limit_state_file'].replace("\\", "/") == "data/rate_limit.sqlite3"
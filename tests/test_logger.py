@@ -0,0 +1,28 @@
+import os
+
+from src.utils.logger import latest_process_log, process_log_file, prune_process_logs
+
+def _write(path, age):
+    path.write_text("log line\n")
+    os.utime(path, (path.stat().st_mtime - age,) * 2)
+
+def test_each_process_gets_its_own_log_and_the_ui_tails_the_newest(tmp_path):
+    configured = tmp_path / "worker.log"
+    assert latest_process_log(configured) == configured
+    first, second = process_log_file(configured, "host-1"), process_log_file(configured, "host-2")
+    assert first != second
+    _write(first, 20)
+    _write(second, 10)
+    second.with_name(second.name + ".1").write_text("rotated\n")
+    assert latest_process_log(configured) == second
+
+def test_logs_of_old_processes_are_pruned_with_their_backups(tmp_path):
+    configured = tmp_path / "worker.log"
+    logs = [process_log_file(configured, f"host-{pid}") for pid in range(4)]
+    for age, log in enumerate(logs):
+        _write(log, age * 10)
+        log.with_name(log.name + ".1").write_text("rotated\n")
+    (tmp_path / "resume_processor.log").write_text("web app\n")
+    prune_process_logs(configured, keep=2)
+    assert sorted(path.name for path in tmp_path.iterdir()) == sorted(
+        [log.name for log in logs[:2]] + [log.name + ".1" for log in logs[:2]] + ["resume_processor.log"])
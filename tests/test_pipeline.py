@@ -0,0 +1,40 @@
+import multiprocessing
+import threading
+import time
+
+import pytest
+
+from src.benchmark.corpus import generate_corpus
+from src.benchmark.mock_gateway import MockGateway
+from src.models.job_descriptions import JOB_DESCRIPTIONS
+from src.processing.resume_processor import iter_resumes
+
+JD_KEY = next(iter(JOB_DESCRIPTIONS))
+
+def _stage_threads():
+    return [thread.name for thread in threading.enumerate() if thread.name in ("resume-extract", "resume-dispatch")]
+
+@pytest.mark.parametrize("extract_workers", [0, 2])
+def test_closing_the_event_stream_stops_every_stage(extract_workers):
+    with MockGateway(latency_ms=200, latency_sigma=0) as gateway:
+        events = iter_resumes(generate_corpus(40, ("txt", "docx"), 1, 2), JD_KEY, JOB_DESCRIPTIONS, gateway.url, {}, 10,
+                              0, max_concurrency=2, extract_workers=extract_workers, extract_queue_size=2)
+        next(events)
+        events.close()
+        assert _stage_threads() == []
+    deadline = time.monotonic() + 5
+    while multiprocessing.active_children() and time.monotonic() < deadline:
+        time.sleep(0.1)
+    assert multiprocessing.active_children() == []
+
+class _UnreadableUpload:
+    @property
+    def name(self):
+        raise OSError("upload vanished")
+
+def test_a_failing_stage_surfaces_in_the_consumer():
+    with MockGateway(latency_ms=0) as gateway:
+        events = iter_resumes([_UnreadableUpload()], JD_KEY, JOB_DESCRIPTIONS, gateway.url, {}, 10, 0)
+        with pytest.raises(OSError, match="upload vanished"):
+            list(events)
+    assert _stage_threads() == []
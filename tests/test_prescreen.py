@@ -0,0 +1,22 @@
+import queue
+
+from src.processing.resume_processor import _prescreen_items
+
+def _extracted(pulled):
+    for index, text in enumerate(["Python and SQL developer", "Gardener", "SQL analyst"]):
+        pulled.append(index)
+        yield index, f"resume{index}.txt", text
+
+def test_threshold_only_prescreen_streams_resumes_to_dispatch():
+    pulled, completed = [], queue.Queue()
+    items = _prescreen_items(_extracted(pulled), completed, "Python, SQL", min_coverage=0.5)
+    index, _, _, extra_fields = next(items)
+    assert (index, pulled) == (0, [0])
+    assert extra_fields == {"Skill Coverage %": 100.0}
+    assert [item[0] for item in items] == [2]
+    assert completed.get_nowait()["skipped"]
+
+def test_top_k_prescreen_waits_for_the_whole_batch():
+    pulled, completed = [], queue.Queue()
+    items = _prescreen_items(_extracted(pulled), completed, "Python, SQL", top_k=1)
+    assert next(items)[0] == 0 and pulled == [0, 1, 2]
@@ -0,0 +1,11 @@
+from src.api.prompt_builder import normalize_lines
+
+def test_running_page_headers_are_dropped():
+    text = ("Jane Doe\njane@example.com\nPython Developer\nSkills:\n- SQL\nPage 1 of 2\n"
+            "Jane Doe\njane@example.com\nExperience:\nBuilt pipelines\nPage 2 of 2")
+    assert normalize_lines(text) == ["Jane Doe", "jane@example.com", "Python Developer", "Skills:", "- SQL",
+                                     "Experience:", "Built pipelines"]
+
+def test_body_lines_matching_an_opening_line_are_kept():
+    text = "Jane Doe\njane@example.com\nPython\nSkills:\nPython\nSQL"
+    assert normalize_lines(text) == ["Jane Doe", "jane@example.com", "Python", "Skills:", "Python", "SQL"]
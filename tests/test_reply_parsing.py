@@ -0,0 +1,99 @@
+import json
+
+import pytest
+
+from src.processing.resume_processor import (parse_analysis_to_dict, parse_multi_analysis_to_dict, score_to_float,
+                                             split_packed_reply, years_to_float)
+
+JSON_REPLY = {"candidate_name": "Jane Doe", "years_of_experience": 6, "education_level": "B.Tech, Computer Science",
+              "relevant_skills": ["Python", "SQL"], "most_recent_role": "Data Engineer", "fitment_score": 8,
+              "strengths": "Pipelines", "gaps": "No Spark"}
+
+@pytest.mark.parametrize("value, expected", [
+    ("8/10", 8.0), ("4/5", 8.0), ("8.5", 8.5), (7, 7.0), ("Score: 6 out of 10", 6.0), ("N/A", None), ("", None)
+])
+def test_score_to_float(value, expected):
+    assert score_to_float(value) == expected
+
+@pytest.mark.parametrize("value, expected", [("5 years", 5.0), ("3.5", 3.5), (4, 4.0), ("Unknown", None)])
+def test_years_to_float(value, expected):
+    assert years_to_float(value) == expected
+
+def test_json_reply_in_code_fences():
+    row = parse_analysis_to_dict(f"Here you go:\n```json\n{json.dumps(JSON_REPLY)}\n```", "Data Engineer")
+    assert row["Candidate Name"] == "Jane Doe"
+    assert row["Relevant Skills Matching JD"] == "Python, SQL"
+    assert row["Fitment Score"] == "8/10" and row["Score_Numeric"] == 8.0
+    assert row["Experience_Years"] == 6.0
+    assert row["Gaps/Weaknesses"] == "No Spark"
+
+def test_truncated_json_reply_keeps_the_complete_fields():
+    text = json.dumps(JSON_REPLY)
+    row = parse_analysis_to_dict(text[:text.index('"strengths"') + len('"strengths": "Pipe')], "Data Engineer")
+    assert row["Candidate Name"] == "Jane Doe"
+    assert row["Score_Numeric"] == 8.0
+    assert row["Strengths"] == "Not specified"
+    assert row["Gaps/Weaknesses"] == "Not specified"
+
+def test_free_text_reply_with_bold_labels():
+    text = ("**Candidate Name:** John Smith\n"
+            "- **Years of Experience:** Unknown\n"
+            "**Relevant Skills Matching JD (Python, SQL):** Python\n"
+            "**Fitment Score:** 4/5\n"
+            "**Strengths:** N/A\n")
+    row = parse_analysis_to_dict(text, "Data Engineer")
+    assert row["Candidate Name"] == "John Smith"
+    assert row["Relevant Skills Matching JD"] == "Python"
+    assert row["Score_Numeric"] == 8.0
+    assert row["Experience_Years"] is None
+    assert row["Strengths"] == "Not specified"
+
+def test_empty_reply_gives_an_unscored_row():
+    row = parse_analysis_to_dict("", "Data Engineer")
+    assert row["Fitment Score"] == "N/A" and row["Score_Numeric"] is None
+
+def test_multi_jd_json_reply_matches_jobs_by_title():
+    reply = {"candidate_name": "Jane Doe", "years_of_experience": 6, "jobs": [
+        {"title": "Analyst", "fitment_score": 4, "gaps": "No BI tools"},
+        {"title": "Data Engineer", "fitment_score": 9},
+        {"title": "Data Engineer", "fitment_score": 1}
+    ]}
+    row = parse_multi_analysis_to_dict(json.dumps(reply), ["Data Engineer", "Analyst", "Architect"])
+    assert row["JD Analyzed Against"] == "Data Engineer" and row["Score_Numeric"] == 9.0
+    assert row["Candidate Name"] == "Jane Doe"
+    assert row["Data Engineer Fitment Score"] == 9.0
+    assert row["Analyst Fitment Score"] == 4.0
+    assert row["Architect Fitment Score"] is None
+
+def test_multi_jd_json_reply_without_titles_is_matched_by_position():
+    reply = {"jobs": [{"fitment_score": 3}, {"fitment_score": 5}]}
+    row = parse_multi_analysis_to_dict(json.dumps(reply), ["Data Engineer", "Analyst"])
+    assert (row["Data Engineer Fitment Score"], row["Analyst Fitment Score"]) == (3.0, 5.0)
+
+def test_multi_jd_text_reply_with_jd_blocks():
+    text = ("Candidate Name: Jane Doe\nYears of Experience: 6\n"
+            "=== JD: Analyst ===\nFitment Score: 5/10\nGaps/Weaknesses: No BI tools\n"
+            "**=== JD: Data Engineer ===**\nFitment Score: 7/10\n"
+            "=== JD: Analyst ===\nFitment Score: 10/10\n")
+    row = parse_multi_analysis_to_dict(text, ["Data Engineer", "Analyst", "Architect"])
+    assert row["JD Analyzed Against"] == "Data Engineer" and row["Score_Numeric"] == 7.0
+    assert row["Candidate Name"] == "Jane Doe" and row["Experience_Years"] == 6.0
+    assert row["Analyst Fitment Score"] == 5.0
+    assert row["Architect Fitment Score"] is None
+
+def _candidate(resume, score, name):
+    return {"resume": resume, "candidate_name": name, "fitment_score": score}
+
+def test_packed_reply_is_matched_on_resume_numbers():
+    reply = {"candidates": [_candidate(3, 6, "C"), _candidate(1, 8, "A"), _candidate(1, 2, "A again"),
+                            _candidate(2, None, "B"), _candidate(9, 5, "Out of range")]}
+    split = split_packed_reply(json.dumps(reply), 4)
+    assert [entry and entry["candidate_name"] for entry in split] == ["A", None, "C", None]
+
+def test_packed_reply_without_numbers_falls_back_to_position():
+    reply = {"candidates": [{"candidate_name": "A", "fitment_score": 7}, {"candidate_name": "B", "fitment_score": "6/10"}]}
+    assert [entry["candidate_name"] for entry in split_packed_reply(json.dumps(reply), 2)] == ["A", "B"]
+
+@pytest.mark.parametrize("reply", ["", "not json", '{"candidates": "none"}', '{"candidates": [{"resume": 1'])
+def test_malformed_packed_reply_retries_every_resume(reply):
+    assert split_packed_reply(reply, 2) == [None, None]
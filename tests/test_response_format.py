@@ -0,0 +1,45 @@
+import pytest
+import requests
+
+from src.api import client
+
+def _rejection(status, body):
+    response = requests.Response()
+    response.status_code = status
+    response._content = body.encode()
+    return requests.HTTPError(f"{status} Client Error", response=response)
+
+@pytest.fixture
+def gateway(monkeypatch):
+    sent = []
+    replies = []
+    def post(api_url, headers, payload, **kwargs):
+        sent.append(payload)
+        reply = replies.pop(0)
+        if isinstance(reply, Exception):
+            raise reply
+        return reply
+    monkeypatch.setattr(client, "post_with_retries", post)
+    monkeypatch.setattr(client, "_response_format_supported", True)
+    return sent, replies
+
+def test_unrelated_client_error_keeps_response_format(gateway):
+    sent, replies = gateway
+    replies.append(_rejection(400, '{"error": {"message": "max_tokens is too large"}}'))
+    with pytest.raises(requests.HTTPError):
+        client._post_completion({"response_format": {"type": "json_object"}}, "url", {})
+    assert len(sent) == 1 and client._response_format_supported
+
+def test_rejected_response_format_is_dropped(gateway):
+    sent, replies = gateway
+    replies += [_rejection(400, '{"error": "Unrecognized request argument: response_format"}'), "ok"]
+    response, payload = client._post_completion({"response_format": {"type": "json_object"}}, "url", {})
+    assert response == "ok" and "response_format" not in payload
+    assert not client._response_format_supported
+
+def test_failed_json_generation_retries_only_that_request(gateway):
+    sent, replies = gateway
+    replies += [_rejection(400, '{"error": "Failed to generate JSON"}'), "ok"]
+    response, payload = client._post_completion({"response_format": {"type": "json_object"}}, "url", {})
+    assert response == "ok" and "response_format" not in payload
+    assert client._response_format_supported
@@ -0,0 +1,52 @@
+import sqlite3
+
+from src.benchmark.corpus import BenchmarkUpload
+from src.benchmark.mock_gateway import MockGateway
+from src.models.job_descriptions import JOB_DESCRIPTIONS
+from src.processing.resume_processor import iter_resumes, order_columns
+from src.processing.results_store import ResultsStore
+
+JD_KEY = next(iter(JOB_DESCRIPTIONS))
+RESUME = "Asha Anand\nSenior Java Developer\nSkills: Java, Spring Boot, SQL, Docker\nEducation: Bachelor of Engineering\n"
+
+def _uploads():
+    return [BenchmarkUpload("a.txt", RESUME.encode()), BenchmarkUpload("b.txt", RESUME.encode()),
+            BenchmarkUpload("c.txt", "Ravi Rao\nQA Automation Engineer\nSkills: Selenium, TestNG, Jenkins\n".encode())]
+
+def test_exact_duplicates_keep_the_representative_row(tmp_path):
+    store = ResultsStore(tmp_path / "results.sqlite3")
+    with MockGateway(latency_ms=0) as gateway:
+        events = list(iter_resumes(_uploads(), JD_KEY, JOB_DESCRIPTIONS, gateway.url, {}, 10, 0, max_concurrency=2,
+                                   dedupe_threshold=0.8))
+    rows = [(order_columns(event["row"]), event["resume_hash"]) for event in events if event["row"]]
+    assert len(rows) == 3
+    store.save_results(rows, run_id="run")
+
+    stored = {row["File Name"]: row for row in store.iter_rows(run_id="run")}
+    assert set(stored) == {"a.txt", "b.txt", "c.txt"}
+    assert stored["b.txt"]["Duplicate Of"] == "a.txt"
+    assert not stored["a.txt"].get("Duplicate Of")
+    assert store.count(run_id="run") == 3
+
+def test_rescreening_a_file_replaces_its_row(tmp_path):
+    store = ResultsStore(tmp_path / "results.sqlite3")
+    row = {"File Name": "a.txt", "JD Analyzed Against": "Developer", "Score_Numeric": 5}
+    store.save_results([(row, "hash")], run_id="first")
+    store.save_results([(dict(row, Score_Numeric=7), "hash")], run_id="second")
+    assert store.count() == 1
+    assert next(store.iter_rows())["Score_Numeric"] == 7
+
+def test_old_stores_are_migrated_to_per_file_rows(tmp_path):
+    db_path = tmp_path / "results.sqlite3"
+    with sqlite3.connect(db_path) as conn:
+        conn.execute(
+            "CREATE TABLE results (id INTEGER PRIMARY KEY, resume_hash TEXT NOT NULL, jd TEXT NOT NULL, file_name TEXT, "
+            "candidate_name TEXT, score REAL, experience REAL, run_id TEXT, session_id TEXT, "
+            "analyzed_at REAL NOT NULL, row TEXT NOT NULL, UNIQUE (resume_hash, jd))"
+        )
+        conn.execute("INSERT INTO results (resume_hash, jd, file_name, analyzed_at, row) "
+                     "VALUES ('hash', 'Developer', 'a.txt', 0, '{\"File Name\": \"a.txt\"}')")
+    conn.close()
+    store = ResultsStore(db_path)
+    store.save_results([({"File Name": "b.txt", "JD Analyzed Against": "Developer"}, "hash")])
+    assert sorted(row["File Name"] for row in store.iter_rows(sort="File Name")) == ["a.txt", "b.txt"]
@@ -0,0 +1,47 @@
+import argparse
+import threading
+import time
+
+from src.benchmark.corpus import generate_corpus
+from src.benchmark.mock_gateway import MockGateway
+from src.cli import work
+from src.models.job_descriptions import JOB_DESCRIPTIONS
+from src.processing.job_queue import JobQueue
+
+JD_KEY = next(iter(JOB_DESCRIPTIONS))
+
+def _config(tmp_path, gateway_url):
+    config_path = tmp_path / "config.ini"
+    config_path.write_text(
+        f"[API]\nurl = {gateway_url}\nkey = k\nmax_tokens = 250\ntemperature = 0.5\ntop_p = 0.9\nrequest_delay = 0\n"
+        f"[PROCESSING]\nsupported_extensions = .txt\nmax_file_size_mb = 10\n[CACHE]\nenabled = false\n"
+        f"[RESULTS]\ndb_path = {tmp_path / 'results.sqlite3'}\n"
+        f"[JOBS]\ndb_path = {tmp_path / 'jobs.sqlite3'}\nspool_dir = {tmp_path / 'spool'}\npoll_seconds = 0.1\n"
+        f"max_parallel_jobs = 2\n"
+    )
+    return config_path
+
+def _counter(job, name):
+    return sum(counter["value"] for counter in job["metrics"]["counters"] if counter["name"] == name)
+
+def test_jobs_from_two_sessions_run_side_by_side(tmp_path):
+    job_queue = JobQueue(tmp_path / "jobs.sqlite3", tmp_path / "spool")
+    params = {"selected_jd": JD_KEY, "job_descriptions": {JD_KEY: JOB_DESCRIPTIONS[JD_KEY]}}
+    job_ids = [job_queue.submit(generate_corpus(15, ("txt",), 1, 1, seed=seed), params, session_id)
+               for seed, session_id in enumerate(("first-recruiter", "second-recruiter"))]
+    with MockGateway(latency_ms=150, latency_sigma=0) as gateway:
+        args = argparse.Namespace(config=str(_config(tmp_path, gateway.url)), once=True, idle_exit=0)
+        worker = threading.Thread(target=work, args=(args,))
+        worker.start()
+        both_progressed = False
+        while worker.is_alive():
+            jobs = [job_queue.get(job_id) for job_id in job_ids]
+            both_progressed |= all(job["status"] == "running" and job["processed"] > 0 for job in jobs)
+            time.sleep(0.1)
+        worker.join()
+    jobs = [job_queue.get(job_id) for job_id in job_ids]
+    assert both_progressed
+    assert [job["status"] for job in jobs] == ["done", "done"]
+    # Each job's metrics cover only its own resumes and API calls
+    assert [_counter(job, "resumes_total") for job in jobs] == [15, 15]
+    assert [_counter(job, "api_requests_total") for job in jobs] == [15, 15]